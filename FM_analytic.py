@@ -0,0 +1,294 @@
+"""Vectorized evaluation of the analytic deck surface.
+
+Mirrors the geometry that ``FM_features`` lofts with OpenCASCADE: the
+circle-plus-tangent kick profile (``rad_nose``/``rad_tail``) along Y and the
+concave cross-section of ``create_profile_wire`` along X. Works on the
+parameter dict returned by ``FM_features.mold_params`` and needs only NumPy.
+"""
+import numpy as np
+
+import FM_validity
+
+FLAT_RADIUS = FM_validity.FLAT_RADIUS
+TANGENCY_SHOULDER = 0.1
+
+def concave_radius(p):
+    return FM_validity.concave_radius(p["board_width"], p["tub_width"], p["concave_depth"])
+
+def surface_radius(p, surface):
+    radius = concave_radius(p)
+    if radius >= FLAT_RADIUS:
+        return radius
+    if surface == "gap":
+        return radius + p["mold_gap"]
+    if surface == "veneer":
+        return radius - p["veneer_thick"]
+    return radius
+
+def surface_offset(p, surface):
+    if surface == "gap":
+        return p["mold_gap"]
+    if surface == "veneer":
+        return -p["veneer_thick"]
+    return 0.0
+
+def kick_start(p):
+    return FM_validity.kick_start(p["wheelbase"], p["truck_hole_len"], p["kick_gap"])
+
+def kick_profile(d, radius, angle_deg):
+    """Height and slope (degrees) at distance ``d`` >= 0 past the kick start."""
+    d = np.asarray(d, dtype=float)
+    angle = np.radians(angle_deg)
+    limit = radius * np.sin(angle)
+    on_arc = d <= limit
+    d_arc = np.minimum(d, limit)
+    z_arc = radius - np.sqrt(np.maximum(radius**2 - d_arc**2, 0.0))
+    z_line = (radius - radius * np.cos(angle)) + (d - limit) * np.tan(angle)
+    slope = np.where(on_arc, np.degrees(np.arcsin(np.clip(d_arc / radius, -1.0, 1.0))), angle_deg)
+    return np.where(on_arc, z_arc, z_line), slope
+
+# --- KICK STATIONS ---
+
+def _natural_spline(t, x):
+    n = len(t)
+    h = np.diff(t)
+    A = np.zeros((n, n))
+    b = np.zeros(n)
+    A[0, 0] = A[-1, -1] = 1.0
+    for i in range(1, n - 1):
+        A[i, i - 1], A[i, i], A[i, i + 1] = h[i - 1], 2.0 * (h[i - 1] + h[i]), h[i]
+        b[i] = 3.0 * ((x[i + 1] - x[i]) / h[i] - (x[i] - x[i - 1]) / h[i - 1])
+    c = np.linalg.solve(A, b)
+
+    def evaluate(tt):
+        i = np.clip(np.searchsorted(t, tt) - 1, 0, n - 2)
+        dt = tt - t[i]
+        slope = (x[i + 1] - x[i]) / h[i] - h[i] * (2.0 * c[i] + c[i + 1]) / 3.0
+        return x[i] + slope * dt + c[i] * dt**2 + (c[i + 1] - c[i]) / (3.0 * h[i]) * dt**3
+    return evaluate
+
+def kick_deviation(stations, radius, angle_deg, samples=64):
+    """Height error of a smooth curve through the stations, per interval.
+
+    The loft interpolates its sections with a spline, so the profile is
+    rebuilt as a chord-length parametrised cubic spline through the station
+    points and compared with the exact arc-plus-line kick.
+    """
+    d = np.asarray(stations, dtype=float)
+    z, _ = kick_profile(d, radius, angle_deg)
+    if len(d) < 3:
+        tt = np.linspace(0.0, 1.0, samples)
+        d_s = d[0] + (d[-1] - d[0]) * tt
+        z_s = z[0] + (z[-1] - z[0]) * tt
+        return np.array([np.abs(z_s - kick_profile(d_s, radius, angle_deg)[0]).max()])
+    t = np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(d), np.diff(z)))])
+    curve_d, curve_z = _natural_spline(t, d), _natural_spline(t, z)
+    errors = []
+    for i in range(len(d) - 1):
+        tt = np.linspace(t[i], t[i + 1], samples)
+        d_s = curve_d(tt)
+        errors.append(np.abs(curve_z(tt) - kick_profile(np.maximum(d_s, 0.0), radius, angle_deg)[0]).max())
+    return np.array(errors)
+
+def kick_stations(length, radius, angle_deg, tolerance, max_stations=24):
+    """Distances past the kick start where loft sections go.
+
+    Starts from the kick start, the arc/line tangency (plus a shoulder
+    section just past it) and the tip, then bisects the interval with the
+    largest deviation until every interval is within ``tolerance``. Long
+    straight runs get few sections, tight transition radii get more.
+    """
+    tangency = float(radius * np.sin(np.radians(angle_deg)))
+    stations = [0.0, length]
+    if 1e-6 < tangency < length - 1e-6:
+        stations.insert(1, tangency)
+        # a second section just past the tangency keeps the arc curvature
+        # from bulging the interpolated straight run
+        if tangency + TANGENCY_SHOULDER < length - 1e-6:
+            stations.insert(2, tangency + TANGENCY_SHOULDER)
+    while len(stations) < max_stations:
+        errors = kick_deviation(stations, radius, angle_deg)
+        if errors.max() <= tolerance:
+            break
+        i = int(np.argmax(errors))
+        stations.insert(i + 1, 0.5 * (stations[i] + stations[i + 1]))
+    return stations
+
+def kick_z(p, y):
+    y = np.asarray(y, dtype=float)
+    y_start = kick_start(p)
+    z_nose, _ = kick_profile(np.maximum(y - y_start, 0.0), p["rad_nose"], p["angle_nose"])
+    z_tail, _ = kick_profile(np.maximum(-y_start - y, 0.0), p["rad_tail"], p["angle_tail"])
+    return np.where(y > y_start, z_nose, np.where(y < -y_start, z_tail, 0.0))
+
+def concave_profile(x, radius, flat_width):
+    """Cross-section height of ``create_profile_wire`` at ``x`` (z_off = 0)."""
+    x = np.abs(np.asarray(x, dtype=float))
+    if radius > 50000:
+        return np.zeros_like(x)
+    half_flat = flat_width / 2.0 if flat_width > 0.1 else 0.0
+    side = np.maximum(x - half_flat, 0.0)
+    return radius - np.sqrt(np.maximum(radius**2 - side**2, 0.0))
+
+def concave_weight(p, y):
+    # 1 across ConcaveLength, fading to the flat section 0.1 before each kick
+    y = np.abs(np.asarray(y, dtype=float))
+    y_end = p["concave_len"] / 2.0
+    y_flat = kick_start(p) - 0.1
+    if y_flat <= y_end:
+        return np.where(y <= y_end + 0.01, 1.0, 0.0)
+    return np.clip((y_flat - y) / (y_flat - y_end), 0.0, 1.0)
+
+def surface_z(p, x, y, surface="master"):
+    """Height of the master, gap or veneer surface at (x, y)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    radius = surface_radius(p, surface)
+    concave = concave_profile(x, radius, p["tub_width"]) * concave_weight(p, y)
+    return kick_z(p, y) + concave + surface_offset(p, surface)
+
+# --- SECTION GRID ---
+
+GRID_STEP = 1.0 # mm between grid rows along the board
+GRID_COLUMNS = 25
+
+def section_frames(p, y):
+    """Height and rotation (degrees) of the loft section placed at station ``y``."""
+    y = np.asarray(y, dtype=float)
+    y_start = kick_start(p)
+    z_nose, a_nose = kick_profile(np.maximum(y - y_start, 0.0), p["rad_nose"], p["angle_nose"])
+    z_tail, a_tail = kick_profile(np.maximum(-y_start - y, 0.0), p["rad_tail"], p["angle_tail"])
+    nose = y > y_start
+    tail = y < -y_start
+    z = np.where(nose, z_nose, np.where(tail, z_tail, 0.0))
+    angle = np.where(nose, a_nose, np.where(tail, -a_tail, 0.0))
+    return z, angle
+
+def loft_grid(p, x, y, surface="master"):
+    """``(len(x), len(y), 3)`` points of a lofted surface, sections at stations ``y``.
+
+    Like ``loft_sections``: the profile is rotated about X with its section,
+    then moved to the station and up by the surface offset.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    z0, angle = section_frames(p, y)
+    h = concave_profile(x, surface_radius(p, surface), p["tub_width"])[:, None] * concave_weight(p, y)[None, :]
+    a = np.radians(angle)[None, :]
+    X = np.broadcast_to(x[:, None], h.shape)
+    Y = y[None, :] - h * np.sin(a)
+    Z = z0[None, :] + h * np.cos(a) + surface_offset(p, surface)
+    return np.stack([X, Y, Z], -1)
+
+def grid_normals(P):
+    n = np.cross(np.gradient(P, axis=0), np.gradient(P, axis=1))
+    n /= np.maximum(np.linalg.norm(n, axis=-1, keepdims=True), 1e-12)
+    return n
+
+def surface_grid(p, x, y, surface="master"):
+    """Points of the surface the build uses: lofted, or the master moved along its normals.
+
+    With ``p["surface_engine"] == "BSpline"`` the gap and veneer surfaces are
+    the master grid offset by ``MoldGap`` / ``VeneerThickness`` along the
+    normals, as ``FM_features`` builds them.
+    """
+    if p.get("surface_engine") != "BSpline" or surface == "master":
+        return loft_grid(p, x, y, surface)
+    P = loft_grid(p, x, y, "master")
+    return P + grid_normals(P) * surface_offset(p, surface)
+
+def grid_axes(p, half_width, y_tip, step=GRID_STEP, columns=GRID_COLUMNS):
+    """Sample columns across and rows along the deck, with rows and columns on every crease."""
+    x = np.linspace(-half_width, half_width, columns)
+    if p["tub_width"] > 0.1:
+        x = np.union1d(x, [-p["tub_width"] / 2.0, p["tub_width"] / 2.0])
+    ks = kick_start(p)
+    ce = p["concave_len"] / 2.0
+    breaks = [ce, ks - 0.1, ks,
+              ks + p["rad_nose"] * np.sin(np.radians(p["angle_nose"])),
+              -ks - p["rad_tail"] * np.sin(np.radians(p["angle_tail"]))]
+    breaks += [-b for b in breaks[:3]]
+    y = np.linspace(-y_tip, y_tip, int(np.ceil(2.0 * y_tip / step)) + 1)
+    y = np.union1d(y, [b for b in breaks if -y_tip < b < y_tip])
+    # drop rows closer than a tenth of a step to a crease row
+    keep = np.concatenate([[True], np.diff(y) > 0.1 * step])
+    return x, y[keep]
+
+# --- OUTLINE ---
+
+def _bezier(poles, t):
+    t = t[:, None]
+    p0, p1, p2, p3 = [np.asarray(pt, dtype=float) for pt in poles]
+    return ((1 - t)**3) * p0 + 3 * ((1 - t)**2) * t * p1 + 3 * (1 - t) * (t**2) * p2 + (t**3) * p3
+
+def outline_half_width(p, y, samples=200):
+    """Half width of the shaper outline at ``y`` (same Bezier tips as the BRep)."""
+    y = np.asarray(y, dtype=float)
+    base = (p["wheelbase"] / 2) + p["truck_hole_len"] + p["kick_gap"]
+    y_n = base + p["nose_len"]
+    y_t = -(base + p["tail_len"])
+    w_half = p["board_width"] / 2.0
+    t = np.linspace(0.0, 1.0, samples)
+
+    f = p["nose_flatness"]
+    y0 = y_n - p["nose_taper"]
+    nose = _bezier([(w_half, y0), (w_half, y0 + p["nose_taper"] * f),
+                    (0.1 + (w_half - 0.1) * f, y_n), (0.1, y_n)], t)
+    f = p["tail_flatness"]
+    y0 = y_t + p["tail_taper"]
+    tail = _bezier([(w_half, y0), (w_half, y0 - p["tail_taper"] * f),
+                    (0.1 + (w_half - 0.1) * f, y_t), (0.1, y_t)], t)
+
+    half = np.full_like(y, w_half)
+    in_nose = y > nose[0, 1]
+    in_tail = y < tail[0, 1]
+    half = np.where(in_nose, np.interp(y, nose[:, 1], nose[:, 0]), half)
+    half = np.where(in_tail, np.interp(-y, -tail[:, 1], tail[:, 0]), half)
+    return np.where((y > y_n) | (y < y_t), 0.0, half), y_t, y_n
+
+# --- MESH ---
+
+def _grid_triangles(nu, nv, offset=0, flip=False):
+    i, j = np.meshgrid(np.arange(nu - 1), np.arange(nv - 1), indexing="ij")
+    a = offset + i * nv + j
+    b = a + nv
+    c = b + 1
+    d = a + 1
+    if flip:
+        tris = np.concatenate([np.stack([a, c, b], -1), np.stack([a, d, c], -1)])
+    else:
+        tris = np.concatenate([np.stack([a, b, c], -1), np.stack([a, c, d], -1)])
+    return tris.reshape(-1, 3)
+
+def _strip(top, bottom):
+    # quads between two index rows of equal length
+    a, b = top[:-1], top[1:]
+    c, d = bottom[1:], bottom[:-1]
+    return np.concatenate([np.stack([a, b, c], -1), np.stack([a, c, d], -1)])
+
+def deck_mesh(p, nu=41, nv=161):
+    """Closed triangle mesh of the pressed deck (veneer under master, trimmed by the outline).
+
+    Returns ``(points, triangles)`` as ``(N, 3)`` float and ``(M, 3)`` int arrays.
+    Truck holes are not drilled: this is a display preview.
+    """
+    _, y_t, y_n = outline_half_width(p, np.zeros(1))
+    v = np.linspace(y_t, y_n, nv)
+    half, _, _ = outline_half_width(p, v)
+    u = np.linspace(-1.0, 1.0, nu)
+    X = u[:, None] * np.maximum(half, 0.05)[None, :]
+    Y = np.broadcast_to(v[None, :], X.shape)
+    z_top = surface_z(p, X, Y, "master")
+    z_bot = surface_z(p, X, Y, "veneer")
+
+    top = np.stack([X, Y, z_top], -1).reshape(-1, 3)
+    bot = np.stack([X, Y, z_bot], -1).reshape(-1, 3)
+    n = nu * nv
+    points = np.concatenate([top, bot])
+
+    idx = np.arange(n).reshape(nu, nv)
+    tris = [_grid_triangles(nu, nv), _grid_triangles(nu, nv, offset=n, flip=True)]
+    # closed boundary loop of the parameter grid: u=-1, v=max, u=+1 reversed, v=min reversed
+    ring = np.concatenate([idx[0, :], idx[1:, -1], idx[-1, -2::-1], idx[-2:0:-1, 0], idx[:1, 0]])
+    tris.append(_strip(ring, ring + n))
+    return points, np.concatenate(tris).astype(np.int32)
@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import FreeCAD as fc # type: ignore
+import FM_prefs
+import FM_stages
+
+# Mold builds off the GUI thread. One worker thread runs the builds in
+# order, so the molds queued behind Board_Preview reuse its lofts from the
+# stage cache. A build whose object has moved on is dropped at the next
+# stage boundary (OCC calls themselves cannot be interrupted). Results are
+# handed back to the GUI thread by a polling QTimer.
+
+POLL_MS = 40
+
+_lock = threading.Lock()
+_executor = None
+_watch = []
+_timer = None
+
+def enabled():
+    return fc.GuiUp and FM_prefs.get_bool("BackgroundRecompute", False)
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="FB_Build")
+        return _executor
+
+def submit(func, is_stale, *args, **kwargs):
+    """Run ``func(*args, **kwargs)`` in the worker; the future's result is ``(value, seconds)``."""
+    def run():
+        if is_stale():
+            raise FM_stages.Cancelled("superseded before it started")
+        t0 = time.perf_counter()
+        with FM_stages.cancellable(is_stale):
+            value = func(*args, **kwargs)
+        return value, time.perf_counter() - t0
+    return executor().submit(run)
+
+def when_done(future, callback):
+    """Call ``callback()`` on the GUI thread once ``future`` has finished."""
+    global _timer
+    from PySide import QtCore # type: ignore
+    _watch.append((future, callback))
+    if _timer is None:
+        _timer = QtCore.QTimer()
+        _timer.timeout.connect(_poll)
+    if not _timer.isActive():
+        _timer.start(POLL_MS)
+
+def _poll():
+    done = [w for w in _watch if w[0].done()]
+    for item in done:
+        _watch.remove(item)
+        try:
+            item[1]()
+        except Exception as e:
+            fc.Console.PrintError(f"Background build hand-over failed: {e}\n")
+    if not _watch:
+        _timer.stop()
+
+def pending():
+    return len(_watch)
+
+def wait(timeout=None):
+    """Block until every queued build has been swapped in (for macros run in the GUI)."""
+    from PySide import QtGui # type: ignore
+    t_end = None if timeout is None else time.monotonic() + timeout
+    while _watch and (t_end is None or time.monotonic() < t_end):
+        QtGui.QApplication.processEvents()
+        time.sleep(0.01)
+    return not _watch
+
+def show_status(text):
+    try:
+        import FreeCADGui as fcg # type: ignore
+        bar = fcg.getMainWindow().statusBar()
+        if text:
+            bar.showMessage(text)
+        else:
+            bar.clearMessage()
+    except Exception:
+        pass
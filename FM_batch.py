@@ -0,0 +1,279 @@
+"""Headless batch generator for Fingerboard Mold Pro.
+
+Runs under FreeCADCmd (no GUI), one worker process per variant:
+
+    FreeCADCmd FM_batch.py --pass --preset "OLD SCHOOL (46/15)" --out ./decks
+    FreeCADCmd FM_batch.py --pass --all-presets --workers 6 --out ./decks
+    FreeCADCmd FM_batch.py --pass --params variants.csv --types Male_Mold,Female_Mold
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import traceback
+
+BASEDIR = os.path.dirname(os.path.abspath(__file__))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import FM_validity
+
+MOLD_TYPES = ["Board_Preview", "Male_Mold", "Female_Mold", "Shaper_Template"]
+EXPORT_TYPES = ["Male_Mold", "Female_Mold", "Shaper_Template"]
+STL_TOLERANCE = 0.01
+
+# --- VARIANT SOURCES ---
+
+def _parse_value(raw):
+    if isinstance(raw, str):
+        txt = raw.strip()
+        if txt.lower() in ("true", "false"):
+            return txt.lower() == "true"
+        try:
+            return float(txt)
+        except ValueError:
+            return txt
+    return raw
+
+def load_preset_variants(names, preset_file):
+    import FM_presets
+    data = FM_presets.store(preset_file).data()
+    if names is None:
+        names = sorted(data.keys())
+    variants = []
+    for name in names:
+        if name not in data:
+            raise KeyError(f"Preset '{name}' not found in {preset_file}")
+        variants.append({"name": name, "params": dict(data[name])})
+    return variants
+
+def load_param_file(path):
+    variants = []
+    if path.lower().endswith(".csv"):
+        with open(path, 'r', newline='') as f:
+            for i, row in enumerate(csv.DictReader(f)):
+                name = (row.pop("Name", None) or "").strip() or f"variant_{i + 1:03d}"
+                params = {k.strip(): _parse_value(v) for k, v in row.items() if k and v not in (None, "")}
+                variants.append({"name": name, "params": params})
+        return variants
+
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        for name, params in data.items():
+            variants.append({"name": name, "params": dict(params)})
+    else:
+        for i, params in enumerate(data):
+            params = dict(params)
+            name = params.pop("Name", None) or f"variant_{i + 1:03d}"
+            variants.append({"name": name, "params": params})
+    return variants
+
+# --- PROCESS POOL ---
+
+def _mp_context():
+    # fork keeps the FreeCAD modules already loaded by FreeCADCmd
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+def _pool_entry(work, job, results):
+    try:
+        result = work(job)
+    except Exception as e:
+        result = {"status": "failed", "error": str(e), "traceback": traceback.format_exc()}
+    results.put((job["id"], result))
+
+def run_pool(jobs, work, workers=None, on_result=None):
+    """Run ``work(job)`` for every job in its own process, ``workers`` at a time.
+
+    Jobs are dicts with a unique ``id`` and are pulled lazily from ``jobs``.
+    ``on_result(job, result)`` is called in the parent as each job finishes.
+    A worker that dies without reporting (e.g. an OCC crash) produces a
+    failed result instead of stopping the run.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    ctx = _mp_context()
+    results = ctx.Queue()
+    running = {}
+    pending = iter(jobs)
+    exhausted = False
+
+    def finish(job_id, result):
+        proc, job = running.pop(job_id)
+        proc.join()
+        if on_result:
+            on_result(job, result)
+
+    while True:
+        while not exhausted and len(running) < workers:
+            try:
+                job = next(pending)
+            except StopIteration:
+                exhausted = True
+                break
+            proc = ctx.Process(target=_pool_entry, args=(work, job, results))
+            proc.start()
+            running[job["id"]] = (proc, job)
+        if not running:
+            break
+        try:
+            job_id, result = results.get(timeout=0.2)
+            finish(job_id, result)
+        except queue.Empty:
+            for job_id, (proc, job) in list(running.items()):
+                if proc.is_alive():
+                    continue
+                # drain a result that may have landed after the timeout
+                try:
+                    while True:
+                        done_id, result = results.get(timeout=0.5)
+                        finish(done_id, result)
+                except queue.Empty:
+                    pass
+                if job_id in running:
+                    finish(job_id, {"status": "failed",
+                                    "error": f"Worker exited with code {proc.exitcode}"})
+
+# --- WORKER ---
+
+def variant_params(values, doc_name="FB_Variant"):
+    """Clamped ``mold_params`` dict for a set of property values, via a throwaway document."""
+    import FreeCAD as fc  # type: ignore
+    import FM_features
+
+    doc = fc.newDocument(doc_name)
+    try:
+        obj = doc.addObject("Part::FeaturePython", "Board_Preview")
+        FM_features.FB_Mold(obj)
+        obj.Proxy.apply_values(obj, values)
+        return FM_features.mold_params(obj)
+    finally:
+        fc.closeDocument(doc.Name)
+
+def build_variant(job):
+    import FM_export
+
+    t_start = time.perf_counter()
+    invalid = FM_validity.errors(FM_validity.check(FM_validity.complete(job["params"])))
+    if invalid:
+        return {"status": "failed", "error": "; ".join(f"{p}: {msg}" for _, p, msg in invalid),
+                "outputs": [], "seconds": round(time.perf_counter() - t_start, 4)}
+    params = variant_params(job["params"], f"FB_Batch_{job['id']}")
+    label = FM_export.safe_label(job["name"]) or f"variant_{job['id']}"
+    outputs = FM_export.export_parts(params, job["out_dir"], label, job["types"],
+                                     tolerance=job["tolerance"], engine=job.get("engine"),
+                                     fmt=job.get("format") or "STL", budgets=job.get("budgets"))
+
+    errors = [f"{o['type']}: {o['error']}" for o in outputs if o["status"] != "ok"]
+    return {
+        "status": "failed" if errors else "ok",
+        "error": "; ".join(errors) or None,
+        "outputs": outputs,
+        "seconds": round(time.perf_counter() - t_start, 4),
+    }
+
+# --- DRIVER ---
+
+def run_batch(variants, out_dir, types=None, workers=None, manifest_path=None,
+              tolerance=None, log=print, engine=None, fmt="STL", budgets=None):
+    types = types or EXPORT_TYPES
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(out_dir, "manifest.json")
+    jobs = [{"id": i, "name": v["name"], "params": v["params"], "types": types,
+             "out_dir": out_dir, "tolerance": tolerance, "engine": engine, "format": fmt,
+             "budgets": budgets}
+            for i, v in enumerate(variants)]
+
+    entries = {}
+
+    def on_result(job, result):
+        entries[job["id"]] = dict({"name": job["name"], "params": job["params"]}, **result)
+        state = "OK" if result.get("status") == "ok" else f"FAILED ({result.get('error')})"
+        log(f"[{len(entries)}/{len(jobs)}] {job['name']}: {state}")
+
+    t0 = time.time()
+    run_pool(jobs, build_variant, workers, on_result)
+    manifest = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t0)),
+        "seconds": round(time.time() - t0, 3),
+        "workers": workers or os.cpu_count(),
+        "types": types,
+        "engine": engine or "preference",
+        "format": fmt,
+        "failed": sum(1 for e in entries.values() if e.get("status") != "ok"),
+        "variants": [entries[i] for i in sorted(entries)],
+    }
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=4)
+    log(f"Manifest written to {manifest_path}")
+    return manifest
+
+def parse_budgets(specs, types):
+    """``--budget`` values to ``{MoldType: triangles}``; a bare number applies to every part."""
+    budgets = {}
+    for spec in specs:
+        if "=" in spec:
+            name, value = [v.strip() for v in spec.split("=", 1)]
+            budgets[name] = int(value)
+        else:
+            budgets.update({t: int(spec) for t in types})
+    return budgets or None
+
+def _script_args():
+    if "--pass" in sys.argv:
+        return sys.argv[sys.argv.index("--pass") + 1:]
+    return sys.argv[1:]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="FM_batch", description="Headless Fingerboard Mold Pro batch generator")
+    parser.add_argument("--preset", action="append", default=[], help="Preset name from fb_presets.json (repeatable)")
+    parser.add_argument("--all-presets", action="store_true", help="Build every preset in the presets file")
+    parser.add_argument("--presets-file", default=None, help="Presets JSON (default: installed fb_presets.json)")
+    parser.add_argument("--params", action="append", default=[], help="JSON or CSV file of parameter sets (repeatable)")
+    parser.add_argument("--types", default=",".join(EXPORT_TYPES), help="Comma separated MoldType list")
+    parser.add_argument("--out", default="fb_batch_output", help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--manifest", default=None, help="Manifest path (default: <out>/manifest.json)")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Linear deflection in mm (default: TessLinear preference)")
+    parser.add_argument("--budget", action="append", default=[],
+                        help="Triangle budget: N for every part or MoldType=N (repeatable)")
+    parser.add_argument("--engine", choices=["BRep", "Analytic"], default=None,
+                        help="STL engine (default: ExportEngine preference)")
+    parser.add_argument("--format", choices=["STL", "3MF"], default="STL",
+                        help="One STL per part, or one 3MF per variant with every part at its layout position")
+    args = parser.parse_args(_script_args() if argv is None else argv)
+
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+    unknown = [t for t in types if t not in MOLD_TYPES]
+    if unknown:
+        parser.error(f"Unknown MoldType: {', '.join(unknown)}")
+
+    preset_file = args.presets_file
+    if preset_file is None:
+        import FM_presets
+        preset_file = FM_presets.PRESET_FILE
+        if not os.path.exists(preset_file):
+            preset_file = os.path.join(BASEDIR, "fb_presets.json")
+
+    variants = []
+    if args.all_presets:
+        variants.extend(load_preset_variants(None, preset_file))
+    elif args.preset:
+        variants.extend(load_preset_variants(args.preset, preset_file))
+    for path in args.params:
+        variants.extend(load_param_file(path))
+    if not variants:
+        parser.error("Nothing to build: use --preset, --all-presets or --params")
+
+    manifest = run_batch(variants, args.out, types, args.workers, args.manifest, args.tolerance,
+                         engine=args.engine, fmt=args.format, budgets=parse_budgets(args.budget, types))
+    return 1 if manifest["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import FreeCAD as fc # type: ignore
+import FM_prefs
+
+# Booleans for the mold assembly. A step is ``(op, tools)`` with op one of
+# "cut", "fuse", "common". The fast path runs each step as ONE OCC boolean
+# over all its tools through Part's list form (``shape.cut([a, b], fuzzy)``),
+# which builds a single BRepAlgoAPI operation with SetRunParallel enabled
+# and the fuzzy value applied. The serial chain applies one tool at a time;
+# the legacy single-shape form it falls back to is neither parallel nor fuzzy.
+
+OPS = ("cut", "fuse", "common")
+DEFAULT_FUZZY = 0.0
+
+STATS = {"fast": 0, "serial": 0}
+
+def fuzzy_value():
+    return max(0.0, FM_prefs.get_float("BooleanFuzzy", DEFAULT_FUZZY))
+
+def multi_tool_enabled():
+    # BooleanParallel was this preference's old name
+    return FM_prefs.get_bool("BooleanMultiTool", FM_prefs.get_bool("BooleanParallel", True))
+
+def is_valid_solid(shape):
+    return (shape is not None and not shape.isNull() and shape.isValid()
+            and len(shape.Solids) > 0)
+
+def fast_chain(base, steps, fuzzy=0.0):
+    shape = base
+    for op, tools in steps:
+        if op not in OPS:
+            raise ValueError(f"Unknown boolean op: {op}")
+        tools = [t for t in tools if t is not None]
+        if tools:
+            shape = getattr(shape, op)(tools, fuzzy)
+    return shape
+
+def serial_chain(base, steps, fuzzy=0.0):
+    shape = base
+    for op, tools in steps:
+        for tool in tools:
+            if tool is None:
+                continue
+            if fuzzy > 0:
+                shape = getattr(shape, op)([tool], fuzzy)
+            else:
+                shape = getattr(shape, op)(tool)
+    return shape
+
+def chain(base, steps, fuzzy=0.0, multi_tool=True, serial_steps=None, label="boolean"):
+    """Apply ``steps`` to ``base``, one multi-tool boolean per step.
+
+    ``serial_steps`` is the legacy order (defaults to ``steps``). With
+    ``multi_tool`` off it is run one tool at a time, still with ``fuzzy``.
+    When the fast path fails or returns an invalid shape it is replayed
+    exactly as the legacy chain did, without fuzzy value.
+    """
+    serial_steps = steps if serial_steps is None else serial_steps
+    if all(t is None for _, tools in steps for t in tools):
+        return base
+    if not multi_tool:
+        STATS["serial"] += 1
+        return serial_chain(base, serial_steps, fuzzy)
+    try:
+        shape = fast_chain(base, steps, fuzzy)
+        if is_valid_solid(shape):
+            STATS["fast"] += 1
+            return shape
+        fc.Console.PrintWarning(f"FingerboardMoldPro: {label} boolean gave an invalid shape, using the serial chain\n")
+    except Exception as e:
+        fc.Console.PrintWarning(f"FingerboardMoldPro: {label} boolean failed ({e}), using the serial chain\n")
+    STATS["serial"] += 1
+    return serial_chain(base, serial_steps)
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import FM_prefs
+
+DEFAULT_CACHE_SIZE = 64
+
+def cache_size():
+    return max(1, FM_prefs.get_int("StageCacheSize", DEFAULT_CACHE_SIZE))
+
+def params_key(params, keys=None, ndigits=6):
+    # Floats are rounded so values that differ only by unit-conversion noise
+    # (e.g. 44.0 vs 44.000000000001) share a cache entry.
+    if keys is None:
+        keys = sorted(params)
+    items = []
+    for k in keys:
+        v = params[k]
+        if isinstance(v, float):
+            v = round(v, ndigits)
+        items.append((k, v))
+    raw = json.dumps(items, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+class LRUCache:
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max(1, int(max_size))
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def get_or_build(self, key, builder):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = builder()
+        self.put(key, value)
+        return value
+
+    def resize(self, max_size):
+        with self._lock:
+            self.max_size = max(1, int(max_size))
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {"size": len(self._data), "max_size": self.max_size,
+                "hits": self.hits, "misses": self.misses}
@@ -1,7 +1,6 @@
 import os
-import json
 from PySide import QtGui, QtCore # type: ignore
-from FM_features import PRESET_FILE 
+from FM_presets import PRESETS
 import FreeCAD as fc  # type: ignore
 import FreeCADGui as fcg  # type: ignore
 
@@ -12,9 +11,15 @@ PARAMS_TO_SAVE = [
     "NoseFlatness", "TailFlatness", 
     "NoseTaperStart", "TailTaperStart",
     "TransitionLength", "KickGap", 
-    "TubWidth", "AddFillet", "ConcaveStyle", "SideLocks" 
+    "TubWidth", "AddFillet", "ConcaveStyle", "SideLocks", "HolePattern"
 ]
 
+def preview_of(obj):
+    """The Board_Preview ``obj`` is linked to, or ``obj`` itself."""
+    if getattr(obj, "MoldType", "") == "Board_Preview":
+        return obj
+    return next((o for o in obj.OutList if getattr(o, "MoldType", "") == "Board_Preview"), obj)
+
 class CmdCreateMold:
     def GetResources(self):
         return {
@@ -24,6 +29,7 @@ class CmdCreateMold:
         }
     def Activated(self):
         import FM_features
+        import FM_export
         doc = fc.activeDocument()
         if not doc:
             doc = fc.newDocument()
@@ -33,19 +39,13 @@ class CmdCreateMold:
         FM_features.ViewProviderMold(master.ViewObject)
         master.MoldType = "Board_Preview"
         
-        slaves = [
-            ("Male_Mold", fc.Vector(0, 150, 0), 0), 
-            ("Female_Mold", fc.Vector(0, 150, 60), 0),
-            ("Shaper_Template", fc.Vector(150, 0, 0), 180)
-        ]
-        
-        for name, pos, rotation in slaves:
+        for name, (pos, rotation) in FM_export.PART_LAYOUT.items():
             slave_obj = doc.addObject("Part::FeaturePython", name)
             FM_features.FB_Mold(slave_obj)
             FM_features.ViewProviderMold(slave_obj.ViewObject)
             slave_obj.MoldType = name
             
-            slave_obj.Placement.Base = pos
+            slave_obj.Placement.Base = fc.Vector(*pos)
             if rotation != 0:
                 slave_obj.Placement.Rotation = fc.Rotation(fc.Vector(1, 0, 0), rotation)
             
@@ -57,7 +57,7 @@ class CmdCreateMold:
                 "NoseLength", "TailLength", "NoseAngle", "TailAngle",
                 "TruckHoleDiam", "TruckHoleDistL", "TruckHoleDistW", "ShaperHeight",
                 "NoseFlatness", "TailFlatness", "NoseTaperStart", "TailTaperStart",
-                "TubWidth", "AddFillet", "ConcaveStyle", "SideLocks"]
+                "TubWidth", "AddFillet", "ConcaveStyle", "SideLocks", "HolePattern"]
 
             for prop in props_to_link:
                 if hasattr(master, prop) and hasattr(slave_obj, prop):
@@ -99,18 +99,8 @@ class CmdSavePreset:
         except Exception as e:
             fc.Console.PrintError(f"Error reading parameters: {e}\n")
             return
-        existing_data = {}
-        if os.path.exists(PRESET_FILE):
-            try:
-                with open(PRESET_FILE, 'r') as f:
-                    existing_data = json.load(f)
-            except:
-                pass # If file is broken, overwrite it
-        
-        existing_data[preset_name] = new_data       
         try:
-            with open(PRESET_FILE, 'w') as f:
-                json.dump(existing_data, f, indent=4)
+            PRESETS.put(preset_name, new_data) # a broken file is overwritten
             fc.Console.PrintMessage(f"Preset '{preset_name}' saved successfully!\n")
         except Exception as e:
             fc.Console.PrintError(f"Error writing file: {e}\n")
@@ -134,14 +124,12 @@ class CmdDeletePreset:
         }
 
     def Activated(self):
-        if not os.path.exists(PRESET_FILE):
+        if not PRESETS.exists():
             fc.Console.PrintWarning("No preset file found.\n")
             return
 
-        data = {}
         try:
-            with open(PRESET_FILE, 'r') as f:
-                data = json.load(f)
+            data = PRESETS.data()
         except Exception as e:
             fc.Console.PrintError(f"Error reading file: {e}\n")
             return
@@ -169,10 +157,8 @@ class CmdDeletePreset:
             )
             
             if confirm == QtGui.QMessageBox.Yes:
-                del data[item]
                 try:
-                    with open(PRESET_FILE, 'w') as f:
-                        json.dump(data, f, indent=4)
+                    PRESETS.delete(item)
                     fc.Console.PrintMessage(f"Preset '{item}' deleted.\n")
                     
                     doc = fc.activeDocument()
@@ -197,7 +183,9 @@ class CmdExportStl:
         }
 
     def Activated(self):
-        import Mesh # type: ignore 
+        import FM_background
+        import FM_features
+        import FM_export
         sel = fcg.Selection.getSelection()
         if not sel:
             fc.Console.PrintWarning("Select a Mold object to export.\n")
@@ -209,29 +197,87 @@ class CmdExportStl:
         save_dir = QtGui.QFileDialog.getExistingDirectory(None, "Select Export Folder")
         if not save_dir:
             return # Cancelled by user
-        original_type = obj.MoldType
-        original_label = obj.Label      
-        parts_to_export = ["Male_Mold", "Female_Mold", "Shaper_Template"]       
         fc.Console.PrintMessage("--- Batch Export Started ---\n")        
+        # the export reads STAGE_CACHE, so no build may still be writing to it
+        FM_background.wait()
         try:
-            for m_type in parts_to_export:
-                obj.MoldType = m_type
-                obj.recompute()                
-                safe_label = "".join([c for c in original_label if c.isalnum() or c in (' ', '_', '-')]).strip()
-                filename = f"{safe_label}_{m_type}.stl"
-                filepath = os.path.join(save_dir, filename)
-                Mesh.export([obj], filepath, tolerance=0.01)
-                fc.Console.PrintMessage(f"Saved: {filename}\n")
+            params = FM_features.mold_params(obj)
+            fmt = FM_export.export_format()
+            results = FM_export.export_parts(params, save_dir, obj.Label, placement=obj.Placement,
+                                             fmt=fmt, placements=self.part_placements(obj))
+            for res in results:
+                if "fallback" in res:
+                    fc.Console.PrintWarning(f"{res['type']}: analytic mesher skipped ({res['fallback']}), using BRep\n")
+                if res["status"] == "ok":
+                    fc.Console.PrintMessage(f"Saved: {res['type']} -> {os.path.basename(res['path'])} "
+                                            f"({FM_export.mesh_summary(res)})\n")
+                    if res.get("within_budget") is False:
+                        fc.Console.PrintWarning(f"{res['type']}: {res['triangles']} triangles is still over the "
+                                                f"budget of {res['budget']} at the coarsest deflection\n")
+                else:
+                    fc.Console.PrintError(f"Error exporting {res['type']}: {res['error']}\n")
         except Exception as e:
             fc.Console.PrintError(f"Error during export: {e}\n")
         finally:
-            obj.MoldType = original_type
-            obj.recompute()
             fc.Console.PrintMessage("--- Export Completed ---\n")
+    def part_placements(self, obj):
+        # the molds linked to the same Board_Preview, wherever they were moved to
+        master = preview_of(obj)
+        return {o.MoldType: o.Placement for o in [master] + master.InList if hasattr(o, "MoldType")}
     def IsActive(self):
         return len(fcg.Selection.getSelection()) > 0
         
+class CmdGapAnalysis:
+
+    def GetResources(self):
+        return {
+            'MenuText': 'Analyze Mold Gap',
+            'ToolTip': 'Measure the pressing gap between the Male and Female surfaces and show it as a colored point cloud',
+            'Pixmap': os.path.join(ICONDIR, 'CreateMold.svg')
+        }
+
+    def Activated(self):
+        import FM_features
+        import FM_gap
+        sel = fcg.Selection.getSelection()
+        if not sel or not hasattr(sel[0], "MoldType"):
+            fc.Console.PrintWarning("Select a Mold object to analyze.\n")
+            return
+        obj = sel[0]
+        try:
+            result = FM_gap.analyze(FM_features.mold_params(obj))
+        except Exception as e:
+            fc.Console.PrintError(f"Gap analysis failed: {e}\n")
+            return
+        fc.Console.PrintMessage(f"{obj.Label}: {FM_gap.summary(result)}\n")
+        if result["below_veneer"]:
+            fc.Console.PrintWarning(f"{obj.Label}: the Female surface comes closer than VeneerThickness "
+                                    f"({result['min']:.3f} mm at {result['min_at']})\n")
+        self.show(obj, result)
+
+    def show(self, obj, result):
+        # the Male surface points, coloured by gap, on top of the Board_Preview
+        import Points # type: ignore
+        doc = obj.Document
+        name = f"{obj.Name}_GapMap"
+        cloud = doc.getObject(name) or doc.addObject("Points::Feature", name)
+        cloud.Label = f"{obj.Label} Gap"
+        cloud.Points = Points.Points([fc.Vector(*pt) for pt in result["points"].tolist()])
+        cloud.Placement = preview_of(obj).Placement
+        if not hasattr(cloud, "Color"):
+            cloud.addProperty("App::PropertyColorList", "Color", "Display", "Gap per point")
+        cloud.Color = [tuple(c) for c in result["colors"].tolist()]
+        if cloud.ViewObject:
+            cloud.ViewObject.PointSize = 3
+            if "Color" in cloud.ViewObject.listDisplayModes():
+                cloud.ViewObject.DisplayMode = "Color"
+        doc.recompute()
+
+    def IsActive(self):
+        return len(fcg.Selection.getSelection()) > 0
+
 fcg.addCommand('FB_CreateMold', CmdCreateMold())
 fcg.addCommand("FB_SavePreset", CmdSavePreset())
 fcg.addCommand("FB_DeletePreset", CmdDeletePreset())
-fcg.addCommand("FB_ExportSTL", CmdExportStl())
\ No newline at end of file
+fcg.addCommand("FB_ExportSTL", CmdExportStl())
+fcg.addCommand("FB_GapAnalysis", CmdGapAnalysis())
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""Property limits as one declarative table, without FreeCAD.
+
+Each entry gives a property's lower and upper bound, either a number or a
+function of the already resolved values, and the properties those bounds
+read. ``resolve`` clamps a whole parameter set in one pass in dependency
+order, so a change to ``VeneerThickness`` also re-checks ``MoldGap``. It
+returns every write at once. ``FB_Mold`` applies those writes to its
+properties, and ``FM_validity.derive`` uses the same table for the
+geometry, so the properties and the built parts always agree.
+"""
+from collections import namedtuple
+
+import FM_holes
+
+Limit = namedtuple("Limit", "low high deps unit low_note high_note quiet")
+
+def limit(low=None, high=None, deps=(), unit="mm", low_note="", high_note="", quiet=()):
+    return Limit(low, high, tuple(deps), unit, low_note, high_note, tuple(quiet))
+
+def board_length(v):
+    return v["Wheelbase"] + 2 * v["TruckHoleDistL"] + 2 * v["KickGap"] + v["NoseLength"] + v["TailLength"]
+
+def transition_limit(v):
+    # the arc must end before the kick does
+    return min(10.0, max(min(v["NoseLength"], v["TailLength"]) - 2.0, 1.0))
+
+LIMITS = {
+    "MoldCoreWidth": limit(29.0, 60.0),
+    "MoldCoreHeight": limit(5.0, 25.0),
+    "MoldBaseWidth": limit(lambda v: v["MoldCoreWidth"], lambda v: v["MoldCoreWidth"] + 40.0,
+                           deps=("MoldCoreWidth",), low_note="MoldCoreWidth", high_note="MoldCoreWidth + 40mm"),
+    "MoldBaseHeight": limit(0.0, 20.0, quiet=("low",)),
+    "MoldCornerRadius": limit(0.1, 5.0),
+    "GuideDiameter": limit(0.1, lambda v: (v["MoldBaseWidth"] - v["MoldCoreWidth"]) / 2.0 - 2.0,
+                           deps=("MoldBaseWidth", "MoldCoreWidth"), high_note="to fit in MoldBase"),
+    "BoardWidth": limit(29.0, lambda v: v["MoldCoreWidth"], deps=("MoldCoreWidth",), high_note="MoldCoreWidth"),
+    "TubWidth": limit(0.0, lambda v: v["BoardWidth"] - 2.0, deps=("BoardWidth",), quiet=("low", "high")),
+    "Wheelbase": limit(30.0, 50.0),
+    "ConcaveDrop": limit(0.0, 3.4, quiet=("low",)),
+    "ConcaveLength": limit(0.1, lambda v: v["Wheelbase"], deps=("Wheelbase",), high_note="Wheelbase",
+                           quiet=("low",)),
+    "KickGap": limit(0.5, 5.0, quiet=("low",)),
+    "NoseLength": limit(5.0, 23.0),
+    "TailLength": limit(5.0, 23.0),
+    "NoseAngle": limit(0.0, 45.0, unit="°", quiet=("low",)),
+    "TailAngle": limit(0.0, 45.0, unit="°", quiet=("low",)),
+    "TransitionLength": limit(0.1, transition_limit, deps=("NoseLength", "TailLength"),
+                              high_note="to fit in Nose/Tail"),
+    "VeneerThickness": limit(2.0, 3.5),
+    "MoldGap": limit(lambda v: v["VeneerThickness"], 4.0, deps=("VeneerThickness",), low_note="VeneerThickness"),
+    "MoldLength": limit(board_length, 130.0,
+                        deps=("Wheelbase", "TruckHoleDistL", "KickGap", "NoseLength", "TailLength"),
+                        low_note="the board length"),
+    "ShaperHeight": limit(0.5, 50.0),
+    "NoseFlatness": limit(0, 100, unit="%", quiet=("low", "high")),
+    "TailFlatness": limit(0, 100, unit="%", quiet=("low", "high")),
+}
+
+# Enumeration properties: their values, or a function returning them
+CHOICES = {"ConcaveStyle": ["Flat", "Organic"], "HolePattern": FM_holes.names}
+
+def choices(name):
+    values = CHOICES[name]
+    return values() if callable(values) else values
+
+def _order(limits):
+    """Limited properties, each after every limited property its bounds read."""
+    order, state = [], {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError("Cyclic property limits: " + " -> ".join(path + [name]))
+        state[name] = "visiting"
+        for dep in limits[name].deps:
+            if dep in limits:
+                visit(dep, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for name in limits:
+        visit(name, [])
+    return order
+
+ORDER = _order(LIMITS)
+
+def dependents(names):
+    """``names`` plus every limited property whose bounds depend on them, in ``ORDER``."""
+    hit = set(names)
+    for name in ORDER:
+        if any(dep in hit for dep in LIMITS[name].deps):
+            hit.add(name)
+    return [name for name in ORDER if name in hit]
+
+def _bound(bound, values):
+    return bound(values) if callable(bound) else bound
+
+def clamp(n, minn, maxn):
+    # the lower bound wins when the two cross, as in the geometry
+    return max(min(maxn, n), minn)
+
+def resolve(values, changed=None):
+    """Clamp ``values`` in dependency order.
+
+    With ``changed``, only those properties and the ones depending on them
+    are clamped; the rest keep their values. Returns ``(resolved, writes,
+    notes)``: the full value dict, ``{property: new value}`` for everything
+    that moved and ``[(property, message), ...]`` to show the user.
+    """
+    resolved = dict(values)
+    names = ORDER if changed is None else dependents(changed)
+    writes, notes = {}, []
+    for name in names:
+        rule = LIMITS[name]
+        if name not in resolved or any(dep not in resolved for dep in rule.deps):
+            continue # e.g. a document still being restored
+        value = resolved[name]
+        low = _bound(rule.low, resolved)
+        high = _bound(rule.high, resolved)
+        new = clamp(value, low, high)
+        if new == value:
+            continue
+        resolved[name] = writes[name] = new
+        side = "low" if new == low else "high"
+        if side not in rule.quiet:
+            notes.append((name, _note(name, rule, side, new)))
+    return resolved, writes, notes
+
+def _note(name, rule, side, value):
+    word = "minimum" if side == "low" else "maximum"
+    why = rule.low_note if side == "low" else rule.high_note
+    text = f"{name} {word} is {value:g}{rule.unit}"
+    if why.startswith("to "):
+        return f"{name} limited to {value:g}{rule.unit} {why}!"
+    if why:
+        text += f" ({why})"
+    return text + "!"
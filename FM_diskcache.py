@@ -0,0 +1,141 @@
+import gzip
+import os
+import tempfile
+import threading
+
+import FreeCAD as fc # type: ignore
+import Part # type: ignore
+import FM_cache
+import FM_prefs
+
+# Finished parts kept on disk between sessions and shared by batch workers.
+# One BREP file per shape, named by a hash of the part's stage key (clamped
+# parameters + MoldType) and the geometry-code version. Reading a file
+# refreshes its mtime, and the oldest files are removed once the folder
+# grows past DiskCacheMB.
+
+DEFAULT_SIZE_MB = 512
+SUFFIXES = (".brep.gz", ".brep")
+
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+
+def enabled():
+    return FM_prefs.get_bool("DiskCache", False)
+
+def cache_dir():
+    path = FM_prefs.get_string("DiskCacheDir", "")
+    return path or os.path.join(fc.getUserAppDataDir(), "FingerboardMoldPro", "shape_cache")
+
+def size_limit():
+    return max(0, FM_prefs.get_int("DiskCacheMB", DEFAULT_SIZE_MB)) * 1024 * 1024
+
+def compress():
+    return FM_prefs.get_bool("DiskCacheCompress", True)
+
+def disk_key(stage_key, version):
+    return FM_cache.params_key({"stage": stage_key, "geometry_version": version})
+
+def _paths(key, folder=None):
+    folder = folder or cache_dir()
+    return [os.path.join(folder, key + suffix) for suffix in SUFFIXES]
+
+def load(key):
+    """The cached shape for ``key``, or None."""
+    for path in _paths(key):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            if path.endswith(".gz"):
+                data = gzip.decompress(data)
+            shape = Part.Shape()
+            shape.importBrepFromString(data.decode("utf-8"))
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            fc.Console.PrintWarning(f"Discarding unreadable cached shape {path}: {e}\n")
+            _remove(path)
+            continue
+        if shape.isNull():
+            _remove(path)
+            continue
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        stats["hits"] += 1
+        return shape
+    stats["misses"] += 1
+    return None
+
+def store(key, shape):
+    folder = cache_dir()
+    try:
+        os.makedirs(folder, exist_ok=True)
+        data = shape.exportBrepToString().encode("utf-8")
+        path = os.path.join(folder, key + (SUFFIXES[0] if compress() else SUFFIXES[1]))
+        if path.endswith(".gz"):
+            data = gzip.compress(data, compresslevel=6)
+        fd, tmp_path = tempfile.mkstemp(prefix=".fb_", suffix=".tmp", dir=folder)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            _remove(tmp_path)
+            raise
+        stats["writes"] += 1
+    except Exception as e:
+        fc.Console.PrintWarning(f"Could not write shape cache: {e}\n")
+        return
+    evict(folder)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _entries(folder):
+    entries = []
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return entries
+    for name in names:
+        if not name.endswith(SUFFIXES):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue # removed by another process
+        entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+def evict(folder=None, limit=None):
+    """Remove least recently used files until the folder fits ``limit`` bytes (0 = no limit)."""
+    folder = folder or cache_dir()
+    limit = size_limit() if limit is None else limit
+    if limit <= 0:
+        return 0
+    with _lock:
+        entries = sorted(_entries(folder))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            _remove(path)
+            total -= size
+            removed += 1
+        stats["evicted"] += removed
+        return removed
+
+def clear(folder=None):
+    for _, _, path in _entries(folder or cache_dir()):
+        _remove(path)
+
+def usage(folder=None):
+    entries = _entries(folder or cache_dir())
+    return {"files": len(entries), "bytes": sum(size for _, size, _ in entries)}
@@ -0,0 +1,207 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import FreeCAD as fc # type: ignore
+import Mesh # type: ignore
+import FM_features
+import FM_meshgen
+import FM_meshio
+import FM_prefs
+import FM_tessellate
+
+EXPORT_PARTS = ["Male_Mold", "Female_Mold", "Shaper_Template"]
+STL_TOLERANCE = 0.01
+ENGINES = ["BRep", "Analytic"]
+FORMATS = ["STL", "3MF"]
+
+# Where CmdCreateMold puts the linked molds: position and rotation about X
+PART_LAYOUT = {
+    "Male_Mold": ((0, 150, 0), 0),
+    "Female_Mold": ((0, 150, 60), 0),
+    "Shaper_Template": ((150, 0, 0), 180),
+}
+
+def export_engine():
+    engine = FM_prefs.get_string("ExportEngine", "BRep")
+    return engine if engine in ENGINES else "BRep"
+
+def export_format():
+    fmt = FM_prefs.get_string("ExportFormat", "STL")
+    return fmt if fmt in FORMATS else "STL"
+
+def layout_placement(m_type):
+    pos, rotation = PART_LAYOUT.get(m_type, ((0, 0, 0), 0))
+    return fc.Placement(fc.Vector(*pos), fc.Rotation(fc.Vector(1, 0, 0), rotation))
+
+def safe_label(label):
+    return "".join([c for c in label if c.isalnum() or c in (' ', '_', '-')]).strip()
+
+def mesh_summary(result):
+    text = f"{result.get('triangles', 0)} triangles"
+    if result.get("max_deviation") is not None:
+        text += f", max deviation {result['max_deviation']:.4f} mm"
+    if result.get("linear") is not None:
+        text += f", deflection {result['linear']:g} mm / {result['angular']:g} deg"
+    return text
+
+def tessellate(shape, tolerance=STL_TOLERANCE):
+    # Same deflection Mesh.export(..., tolerance=) applies to Part features
+    return Mesh.Mesh(shape.tessellate(tolerance))
+
+def face_triangles(shape, tolerance=STL_TOLERANCE):
+    """Yield ``(n, 3, 3)`` triangle arrays one face at a time.
+
+    OCC reuses the discretisation of edges already meshed for a
+    neighbouring face, so the faces still close up. The triangulation is
+    stored on the shape, so a copy is meshed: ``shape`` may be shared
+    through the stage cache and meshed by several export threads at once.
+    """
+    for face in shape.copy().Faces:
+        points, tris = face.tessellate(tolerance)
+        if not tris:
+            continue
+        pts = np.array([(v.x, v.y, v.z) for v in points], dtype=float)
+        yield pts[np.array(tris, dtype=np.int64)]
+
+def _write_part(shape, filepath, placement, tolerance, budget=0):
+    """Write one STL; returns ``(seconds, report)`` with at least ``triangles``."""
+    t0 = time.perf_counter()
+    if FM_tessellate.enabled():
+        # adaptive deflection, one BRepMesh run written out face by face
+        with FM_meshio.StlWriter(filepath) as writer:
+            report = FM_tessellate.stream(
+                shape, lambda points, tris: writer.add(FM_meshgen.transform_points(points, placement)[tris]),
+                linear=tolerance, budget=budget)
+        return time.perf_counter() - t0, report
+    # fixed deflection, streamed face by face: the part never exists as one Mesh in memory
+    with FM_meshio.StlWriter(filepath) as writer:
+        for tris in face_triangles(shape, tolerance):
+            writer.add(FM_meshgen.transform_points(tris, placement))
+    return time.perf_counter() - t0, {"triangles": writer.count}
+
+def _write_analytic(p, m_type, filepath, placement):
+    points, tris = FM_meshgen.part_mesh(p, m_type)
+    return FM_meshio.write_stl(filepath, FM_meshgen.transform_points(points, placement), tris)
+
+def part_arrays(p, m_type, engine, tolerance=STL_TOLERANCE, budget=0):
+    """Indexed ``(points, tris, engine_used, fallback, report)`` for one part."""
+    fallback = None
+    if engine == "Analytic":
+        try:
+            points, tris = FM_meshgen.part_mesh(p, m_type)
+            return points, tris, "Analytic", None, {"triangles": len(tris)}
+        except NotImplementedError as e:
+            fallback = str(e)
+    shape = FM_features.build_part(p, m_type)
+    if FM_tessellate.enabled():
+        points, tris, report = FM_tessellate.tessellate(shape, linear=tolerance, budget=budget)
+        return points, tris, "BRep", fallback, report
+    soup = list(face_triangles(shape, tolerance))
+    points, tris = FM_meshio.weld(np.concatenate(soup) if soup else np.zeros((0, 3, 3)))
+    return points, tris, "BRep", fallback, {"triangles": len(tris)}
+
+def export_3mf(p, out_dir, label, parts=None, placements=None, tolerance=None, engine=None, budgets=None):
+    """Write every requested part into one ``<label>.3mf``, each at its placement.
+
+    ``placements`` maps MoldType to a ``FreeCAD.Placement``; missing parts use
+    ``PART_LAYOUT``. Returns one result dict per part like ``export_parts``.
+    """
+    parts = parts or EXPORT_PARTS
+    name = safe_label(label) or "Mold"
+    engine = engine or export_engine()
+    tolerance = tolerance or FM_tessellate.settings()["linear"]
+    placements = placements or {}
+    filepath = os.path.join(out_dir, f"{name}.3mf")
+    results = []
+    with FM_meshio.ThreeMFWriter(filepath) as writer:
+        for m_type in parts:
+            t0 = time.perf_counter()
+            result = {"type": m_type, "engine": engine, "format": "3MF"}
+            try:
+                budget = FM_tessellate.part_budget(m_type, budgets)
+                points, tris, used, fallback, report = part_arrays(p, m_type, engine, tolerance, budget)
+                placement = placements.get(m_type) or layout_placement(m_type)
+                writer.add_object(m_type, points, tris, placement.toMatrix().A)
+                result.update(report)
+                result.update(status="ok", engine=used, path=filepath)
+                if fallback:
+                    result["fallback"] = fallback
+            except Exception as e:
+                result.update(status="failed", error=str(e))
+            result["build_s"] = round(time.perf_counter() - t0, 4)
+            results.append(result)
+    return results
+
+def export_parts(p, out_dir, label, parts=None, placement=None, tolerance=None, workers=None,
+                 engine=None, fmt="STL", placements=None, budgets=None):
+    """Build every requested part and write the STLs.
+
+    ``p`` is the dict from ``FM_features.mold_params``. Shapes are built in
+    sequence through the stage graph, so lofts, cutters and drill pattern
+    are computed once for all parts, then tessellated and written
+    concurrently. With the ``Analytic`` engine (default: the ``ExportEngine``
+    preference) parts are meshed straight from the surface equations by
+    ``FM_meshgen``; parts it cannot represent fall back to the BRep path.
+    Returns one result dict per part; a failing part does not stop the others.
+    ``fmt="3MF"`` packs all parts into one archive instead (see ``export_3mf``).
+    ``tolerance`` is the linear deflection (default: the TessLinear preference)
+    and ``budgets`` maps MoldType to a triangle budget (see ``FM_tessellate``).
+    """
+    if fmt == "3MF":
+        return export_3mf(p, out_dir, label, parts, placements, tolerance, engine, budgets)
+    parts = parts or EXPORT_PARTS
+    tolerance = tolerance or FM_tessellate.settings()["linear"]
+    name = safe_label(label) or "Mold"
+    engine = engine or export_engine()
+
+    results = []
+    shapes = {}
+    for m_type in parts:
+        t0 = time.perf_counter()
+        result = {"type": m_type, "engine": "BRep"}
+        if engine == "Analytic":
+            filepath = os.path.join(out_dir, f"{name}_{m_type}.stl")
+            try:
+                count = _write_analytic(p, m_type, filepath, placement)
+                result.update(status="ok", engine="Analytic", path=filepath, triangles=count,
+                              build_s=round(time.perf_counter() - t0, 4))
+                results.append(result)
+                continue
+            except NotImplementedError as e:
+                result["fallback"] = str(e)
+            except Exception as e:
+                result.update(status="failed", error=str(e), build_s=round(time.perf_counter() - t0, 4))
+                results.append(result)
+                continue
+        try:
+            shapes[m_type] = FM_features.build_part(p, m_type)
+            result["status"] = "ok"
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+        result["build_s"] = round(time.perf_counter() - t0, 4)
+        results.append(result)
+
+    jobs = {}
+    with ThreadPoolExecutor(max_workers=workers or max(1, len(shapes))) as pool:
+        for m_type, shape in shapes.items():
+            filepath = os.path.join(out_dir, f"{name}_{m_type}.stl")
+            budget = FM_tessellate.part_budget(m_type, budgets)
+            jobs[m_type] = (filepath, pool.submit(_write_part, shape, filepath, placement, tolerance, budget))
+
+    for result in results:
+        if result["type"] not in jobs or result["engine"] != "BRep":
+            continue
+        filepath, job = jobs[result["type"]]
+        try:
+            seconds, report = job.result()
+            result.update(report)
+            result["export_s"] = round(seconds, 4)
+            result["path"] = filepath
+        except Exception as e:
+            result["status"] = "failed"
+            result["error"] = str(e)
+    return results
@@ -1,9 +1,22 @@
 import FreeCAD as fc # type: ignore
 import Part  # type: ignore
+import contextlib
 import math
 import traceback
-import json
 import os
+import time
+import FM_analytic
+import FM_background
+import FM_boolean
+import FM_cache
+import FM_constraints
+import FM_diskcache
+import FM_holes
+import FM_prefs
+import FM_presets
+import FM_profile
+import FM_stages
+import FM_validity
 
 # --- GEOMETRY UTILS ---
 
@@ -103,16 +116,629 @@ def make_rounded_box(width, length, height, M_Radius):
 def clamp(n, minn, maxn):
     return max(min(maxn, n), minn)
 
+# --- MOLD BUILD ---
+
+OVERRUN_MARGIN = 4.0
+STEPS_KICK = 5
+DEFAULT_KICK_TOLERANCE = 0.05
+EXTRUSION_LIMIT = 100.0
+TIGHT_MARGIN = 1.0
+BSPLINE_TOLERANCE = 0.005
+PREVIEW_OFFSET_TOLERANCE = 1e-3
+
+def property_values(fp):
+    """Raw property values of ``fp`` as plain numbers, for ``FM_validity``."""
+    values = {}
+    for name in FM_validity.DEFAULTS:
+        if hasattr(fp, name):
+            value = getattr(fp, name)
+            values[name] = value.Value if hasattr(value, "Value") else value
+        elif name in FM_validity.LEGACY:
+            values[name] = FM_validity.LEGACY[name]
+    return values
+
+def mold_params(fp):
+    # clamped parameters and derived dimensions: see FM_validity.derive
+    p = FM_validity.derive(property_values(fp))
+    # 0 keeps the legacy fixed STEPS_KICK sampling
+    p["kick_tol"] = max(0.0, FM_prefs.get_float("KickTolerance", DEFAULT_KICK_TOLERANCE))
+    p["bool_fuzzy"] = FM_boolean.fuzzy_value()
+    p["bool_multi_tool"] = FM_boolean.multi_tool_enabled()
+    p["light_preview"] = FM_prefs.get_bool("LightPreview", False)
+    p["tight_bounds"] = FM_prefs.get_bool("TightBounds", False)
+    p["surface_engine"] = FM_prefs.get_string("SurfaceEngine", "Loft")
+    p["hole_pattern"] = FM_holes.pattern_key(getattr(fp, "HolePattern", FM_holes.DEFAULT))
+    return p
+
+def make_pentagon_lock(w_base, h_tot, length, tol=0.0):
+
+    wb = w_base + (2*tol)
+    a_eff = w_base / 2.0
+    r_eff = h_tot
+    # hs = sqrt(R^2 - A^2)
+    if r_eff > a_eff + 1.0:
+        hs = math.sqrt(r_eff**2 - a_eff**2)
+    else:
+        hs = r_eff * 0.5 # Fallback
+
+    p1 = fc.Vector(-wb/2, 0, 0)
+    p2 = fc.Vector(wb/2, 0, 0)
+    p3 = fc.Vector(wb/2, 0, hs)
+    p4 = fc.Vector(0, 0, h_tot + tol) # Punta
+    p5 = fc.Vector(-wb/2, 0, hs)
+
+    wire = Part.makePolygon([p1, p2, p3, p4, p5, p1])
+    face = Part.Face(wire)
+    prism = face.extrude(fc.Vector(0, length, 0))
+    return prism
+
+def make_female_cap(w_base, h_cap_total, length, male_h_tot):
+    box = Part.makeBox(w_base, length, h_cap_total, fc.Vector(-w_base/2, 0, 0))
+    cutter = make_pentagon_lock(w_base, male_h_tot, length, LOCK_TOLERANCE)
+    return box.cut(cutter)
+
+# --- BUILD STAGES ---
+# Each stage declares the clamped parameters it reads and the stages it
+# consumes. A part only evaluates the stages it depends on, and each stage is
+# cached on its own inputs (e.g. NoseFlatness only reaches "outline").
+
+LOCK_EXT_LEN = 6.0
+LOCK_TOLERANCE = 0.05
+LOCK_OVERLAP = 0.1
+FILLET_RADIUS = 10.0
+
+STAGE_CACHE = FM_cache.LRUCache(FM_cache.cache_size())
+GRAPH = FM_stages.StageGraph(STAGE_CACHE)
+
+@GRAPH.stage("sections", inputs=(
+    "core_width", "board_width", "tub_width", "concave_depth", "wheelbase",
+    "truck_hole_len", "kick_gap", "concave_len", "mold_len",
+    "rad_nose", "rad_tail", "angle_nose", "angle_tail", "kick_tol"))
+def stage_sections(p):
+    board_width = p["board_width"]
+    tub_width = p["tub_width"]
+    concave_depth = p["concave_depth"]
+    rad_nose = p["rad_nose"]
+    rad_tail = p["rad_tail"]
+    angle_nose = p["angle_nose"]
+    angle_tail = p["angle_tail"]
+
+    # --- CONCAVE CALCULATION ---
+    radius_concave = FM_validity.concave_radius(board_width, tub_width, concave_depth)
+
+    y_kick_start_nose = FM_validity.kick_start(p["wheelbase"], p["truck_hole_len"], p["kick_gap"])
+    y_kick_start_tail = -y_kick_start_nose
+
+    y_concave_end = p["concave_len"] / 2.0
+
+    y_tip_nose = p["mold_len"]/2.0 + OVERRUN_MARGIN
+    y_tip_tail = -(p["mold_len"]/2.0 + OVERRUN_MARGIN)
+
+    # --- SECTIONS ---
+    # (y, z, rotation, flat) stations shared by the master, gap and veneer lofts
+    slices = []
+
+    def add_slice(y_pos, z_pos, rot_angle):
+        is_outside_concave = abs(y_pos) > (y_concave_end + 0.01)
+        is_kick_rot = abs(rot_angle) > 0.1
+        slices.append((y_pos, z_pos, rot_angle, is_outside_concave or is_kick_rot))
+
+    def kick_slice(d_y, rad, angle):
+        limit_y_curved = rad * math.sin(math.radians(angle))
+        if d_y <= limit_y_curved:
+            arg = rad**2 - d_y**2
+            if arg < 0: arg = 0
+            z_curr = rad - math.sqrt(arg)
+            alpha = math.degrees(math.asin(clamp(d_y/rad, -1, 1)))
+            return z_curr, alpha
+        z_limit = rad - (rad * math.cos(math.radians(angle)))
+        excess_y = d_y - limit_y_curved
+        return z_limit + (excess_y * math.tan(math.radians(angle))), angle
+
+    def kick_stations(dist, rad, angle):
+        if p["kick_tol"] <= 0:
+            return [dist * i / float(STEPS_KICK) for i in range(STEPS_KICK + 1)]
+        return FM_analytic.kick_stations(dist, rad, angle, p["kick_tol"])
+
+    # --- TAIL ---
+    dist_tail = abs(y_tip_tail - y_kick_start_tail)
+    for d_y in reversed(kick_stations(dist_tail, rad_tail, angle_tail)):
+        z_curr, alpha = kick_slice(d_y, rad_tail, angle_tail)
+        add_slice(y_kick_start_tail - d_y, z_curr, -alpha)
+
+    # --- SPLIT 1 ---
+    idx_split_1 = len(slices) - 1
+
+    # --- FLAT CENTER ---
+    if y_kick_start_tail < -y_concave_end:
+        add_slice(y_kick_start_tail + 0.1, 0, 0)
+
+    add_slice(-y_concave_end, 0, 0)
+    add_slice(y_concave_end, 0, 0)
+
+    if y_kick_start_nose > y_concave_end:
+        add_slice(y_kick_start_nose - 0.1, 0, 0)
+
+    # --- SPLIT 2 ---
+    idx_split_2 = len(slices) - 1
+
+    # --- NOSE ---
+    dist_nose = y_tip_nose - y_kick_start_nose
+    for d_y in kick_stations(dist_nose, rad_nose, angle_nose):
+        z_curr, alpha = kick_slice(d_y, rad_nose, angle_nose)
+        add_slice(y_kick_start_nose + d_y, z_curr, alpha)
+
+    return {
+        "slices": slices, "split_1": idx_split_1, "split_2": idx_split_2,
+        "radius_concave": radius_concave, "gen_width": p["core_width"] + 5.0,
+        "tub_width": tub_width,
+    }
+
+def create_hybrid_loft(sect_list, style, idx_split_1, idx_split_2):
+    if style == "Organic" or len(sect_list) < 5:
+        return Part.makeLoft(sect_list, False, False)
+
+    seg_tail = sect_list[0 : idx_split_1 + 1]
+    seg_center = sect_list[idx_split_1 : idx_split_2 + 1]
+    seg_nose = sect_list[idx_split_2 : ]
+
+    loft_tail = Part.makeLoft(seg_tail, False, False)
+    loft_center = Part.makeLoft(seg_center, False, True)
+    loft_nose = Part.makeLoft(seg_nose, False, False)
+
+    all_faces = loft_tail.Faces + loft_center.Faces + loft_nose.Faces
+    return Part.makeShell(all_faces)
+
+def loft_sections(sec, style, radius, z_offset):
+    wires = []
+    with FM_stages.timed("profile_wires"):
+        for y_pos, z_pos, rot_angle, force_flat in sec["slices"]:
+            w = create_profile_wire(0, sec["gen_width"], radius, is_flat=force_flat, angle_rot=rot_angle, flat_width=sec["tub_width"])
+            w.translate(fc.Vector(0, y_pos, z_pos + z_offset))
+            wires.append(w)
+    with FM_stages.timed("hybrid_loft"):
+        surf = create_hybrid_loft(wires, style, sec["split_1"], sec["split_2"])
+    if surf.isNull():
+        raise Exception("Loft generation failed")
+    return surf
+
+# --- B-SPLINE SURFACES ---
+# With SurfaceEngine = BSpline the master surface is one B-spline
+# approximated through a NumPy grid of the section model (FM_analytic),
+# and the gap and veneer surfaces are the same grid moved along its
+# normals, so MoldGap and VeneerThickness are uniform. The lofts stay as
+# the fallback when the approximation fails or an offset would fold.
+
+@GRAPH.stage("deck_grid", inputs=("surface_engine",), deps=("sections",))
+def stage_deck_grid(p, sec):
+    if p["surface_engine"] != "BSpline":
+        return None
+    x, y = FM_analytic.grid_axes(p, sec["gen_width"] / 2.0, p["mold_len"]/2.0 + OVERRUN_MARGIN)
+    points = FM_analytic.loft_grid(p, x, y)
+    return points, FM_analytic.grid_normals(points)
+
+def bspline_face(points, tolerance=BSPLINE_TOLERANCE):
+    rows = [[fc.Vector(*pt) for pt in row] for row in points.tolist()]
+    surf = Part.BSplineSurface()
+    surf.approximate(Points=rows, DegMin=3, DegMax=3, Continuity=2, Tolerance=tolerance,
+                     ParamType="ChordLength")
+    return surf.toShape()
+
+def grid_surface(p, grid, offset, label):
+    """B-spline surface ``offset`` along the deck grid normals, or None to loft instead."""
+    if grid is None:
+        return None
+    points, normals = grid
+    # an offset towards a centre of curvature folds once it passes the radius
+    radii = [p["rad_nose"], p["rad_tail"], p["radius_concave"]]
+    if offset > 0 and min(radii) <= offset:
+        fc.Console.PrintWarning(f"FingerboardMoldPro: {label} offset {offset:g} mm folds a {min(radii):g} mm "
+                                f"radius, lofting instead\n")
+        return None
+    try:
+        with FM_stages.timed("bspline"):
+            return bspline_face(points + normals * offset)
+    except Exception as e:
+        fc.Console.PrintWarning(f"FingerboardMoldPro: B-spline {label} surface failed ({e}), lofting instead\n")
+        return None
+
+@GRAPH.stage("loft_master", inputs=("concave_style",), deps=("sections", "deck_grid"))
+def stage_loft_master(p, sec, grid):
+    surf = grid_surface(p, grid, 0.0, "master")
+    if surf is not None:
+        return surf
+    return loft_sections(sec, p["concave_style"], sec["radius_concave"], 0.0)
+
+@GRAPH.stage("loft_gap", inputs=("concave_style", "mold_gap"), deps=("sections", "deck_grid"))
+def stage_loft_gap(p, sec, grid):
+    surf = grid_surface(p, grid, p["mold_gap"], "gap")
+    if surf is not None:
+        return surf
+    radius_concave = sec["radius_concave"]
+    radius_gap = radius_concave + p["mold_gap"] if radius_concave < FM_validity.FLAT_RADIUS else radius_concave
+    return loft_sections(sec, p["concave_style"], radius_gap, p["mold_gap"])
+
+@GRAPH.stage("loft_veneer", inputs=("concave_style", "veneer_thick"), deps=("sections", "deck_grid"))
+def stage_loft_veneer(p, sec, grid):
+    surf = grid_surface(p, grid, -p["veneer_thick"], "veneer")
+    if surf is not None:
+        return surf
+    radius_concave = sec["radius_concave"]
+    radius_ven = radius_concave - p["veneer_thick"] if radius_concave < FM_validity.FLAT_RADIUS else radius_concave
+    return loft_sections(sec, p["concave_style"], radius_ven, -p["veneer_thick"])
+
+# --- TIGHT BOUNDS ---
+# With TightBounds the cutters and stock bodies span the part being built
+# plus TIGHT_MARGIN instead of fixed 100 mm slabs. Every stock body ends
+# TIGHT_MARGIN past the surface that trims it and every cutter reaches
+# 2 * TIGHT_MARGIN past it, so the parts come out the same.
+
+def extrusion_depth(p, z_from, z_to):
+    """Extrusion length from a surface whose far extreme is ``z_from`` to ``2 * TIGHT_MARGIN`` past ``z_to``."""
+    if not p["tight_bounds"]:
+        return EXTRUSION_LIMIT
+    return abs(z_from - z_to) + 2 * TIGHT_MARGIN
+
+def drill_cutter(p, part, drill_comp, bbox):
+    # holes only as long as the part they go through
+    if not p["tight_bounds"]:
+        return drill_comp
+    return FM_holes.cutter(p, part, bbox.ZMin - TIGHT_MARGIN, bbox.ZLength + 2 * TIGHT_MARGIN, outer_face(p, part))
+
+@GRAPH.stage("cutter_up", inputs=("tight_bounds",), deps=("loft_master",))
+def stage_cutter_up(p, s_master):
+    bbox = s_master.BoundBox
+    return s_master.extrude(fc.Vector(0,0,extrusion_depth(p, bbox.ZMin, bbox.ZMax)))
+
+@GRAPH.stage("cutter_down", inputs=("tight_bounds",), deps=("loft_gap", "loft_master"))
+def stage_cutter_down(p, surf_gap, s_master):
+    # down through the bottom of the female core (see stage_base_female)
+    z_bottom = s_master.BoundBox.ZMin - TIGHT_MARGIN
+    return surf_gap.extrude(fc.Vector(0,0,-extrusion_depth(p, surf_gap.BoundBox.ZMax, z_bottom)))
+
+@GRAPH.stage("cutter_down_veneer", inputs=("tight_bounds",), deps=("loft_veneer",))
+def stage_cutter_down_veneer(p, surf_veneer):
+    bbox = surf_veneer.BoundBox
+    return surf_veneer.extrude(fc.Vector(0,0,-extrusion_depth(p, bbox.ZMax, bbox.ZMin)))
+
+DRILL_INPUTS = ("core_width", "base_width", "mold_len", "guide_diam", "wheelbase",
+                "truck_hole_len", "truck_hole_width", "truck_hole_diam", "hole_pattern")
+# parameters that place the face each part's countersinks are cut into
+FACE_INPUTS = {
+    "Board_Preview": (),
+    "Male_Mold": ("camber", "core_base_depth", "base_height"),
+    "Female_Mold": ("camber", "core_base_depth", "base_height", "mold_gap"),
+    "Shaper_Template": ("shaper_height",),
+}
+
+def male_bottom(p):
+    return p["camber"] - p["core_base_depth"] - p["base_height"]
+
+def female_top(p):
+    return (p["core_base_depth"] + 2*p["base_height"] + p["mold_gap"]) - p["camber"]
+
+def shaper_top(p):
+    z_board_top_surface = 5.0
+    return z_board_top_surface + p["shaper_height"]
+
+def outer_face(p, part):
+    """``(z, direction into the part)`` of the face countersinks are cut into, None for the preview."""
+    if part == "Male_Mold":
+        return male_bottom(p), 1
+    if part == "Female_Mold":
+        return female_top(p), -1
+    if part == "Shaper_Template":
+        return shaper_top(p), -1
+    return None
+
+def drill_stage(part):
+    return "drill_" + part
+
+def register_drill(part):
+    @GRAPH.stage(drill_stage(part), inputs=DRILL_INPUTS + FACE_INPUTS[part])
+    def stage_drill(p):
+        return FM_holes.cutter(p, part, -EXTRUSION_LIMIT, EXTRUSION_LIMIT*2, outer_face(p, part))
+
+for _part in FACE_INPUTS:
+    register_drill(_part)
+
+BOOL_INPUTS = ("bool_fuzzy", "bool_multi_tool")
+
+def booleans(p, base, steps, serial_steps=None, label="boolean"):
+    return FM_boolean.chain(base, steps, p["bool_fuzzy"], p["bool_multi_tool"], serial_steps, label)
+
+BASE_INPUTS = ("core_width", "core_base_depth", "base_width", "base_height",
+               "M_Radius", "mold_len", "mold_gap", "camber", "add_fillet", "tight_bounds")
+
+@GRAPH.stage("base_male", inputs=BASE_INPUTS, deps=("loft_master",))
+def stage_base_male(p, s_master):
+    core_width = p["core_width"]
+    mold_len = p["mold_len"]
+    base_height = p["base_height"]
+    z_max_safe = s_master.BoundBox.ZMax + (TIGHT_MARGIN if p["tight_bounds"] else 50)
+    z_m_bot = male_bottom(p)
+
+    m_base = make_rounded_box(p["base_width"], mold_len, base_height, p["M_Radius"])
+    m_base.translate(fc.Vector(0, 0, z_m_bot))
+    m_core = Part.makeBox(core_width, mold_len, (z_max_safe) - z_m_bot, fc.Vector(-core_width/2, -mold_len/2, z_m_bot))
+
+    fill_m = None
+    use_fillet_radius = FILLET_RADIUS if p["add_fillet"] else 0.0
+    if use_fillet_radius > 0.1:
+        fill_m = create_fillet_fillers(core_width, mold_len, z_m_bot + base_height, use_fillet_radius, True)
+    return m_core, fill_m, m_base
+
+@GRAPH.stage("base_female", inputs=BASE_INPUTS, deps=("loft_master",))
+def stage_base_female(p, s_master):
+    core_width = p["core_width"]
+    mold_len = p["mold_len"]
+    base_height = p["base_height"]
+    z_bottom = s_master.BoundBox.ZMin - (TIGHT_MARGIN if p["tight_bounds"] else 5)
+    z_f_top = female_top(p)
+    f_base_z = z_f_top - base_height
+    f_base = make_rounded_box(p["base_width"], mold_len, base_height, p["M_Radius"])
+    f_base.translate(fc.Vector(0, 0, f_base_z))
+    f_core = Part.makeBox(core_width, mold_len, z_f_top - z_bottom, fc.Vector(-core_width/2, -mold_len/2, z_bottom))
+
+    fill_f = None
+    use_fillet_radius = FILLET_RADIUS if p["add_fillet"] else 0.0
+    if use_fillet_radius > 0.1:
+        fill_f = create_fillet_fillers(core_width, mold_len, f_base_z, use_fillet_radius, False)
+    return f_core, fill_f, f_base
+
+@GRAPH.stage("male_body", inputs=("tight_bounds",) + BOOL_INPUTS, deps=("base_male", "cutter_up", "drill_Male_Mold"))
+def stage_male_body(p, base, cutter_up, drill_comp):
+    m_core, fill_m, m_base = base
+    drill_comp = drill_cutter(p, "Male_Mold", drill_comp, m_core.BoundBox)
+    # The base plate lies below the master surface (z <= -core_base_depth),
+    # so cutter_up never reaches it: fuse everything once, then cut once.
+    return booleans(p, m_core,
+                    [("fuse", [fill_m, m_base]), ("cut", [cutter_up, drill_comp])],
+                    [("fuse", [fill_m]), ("cut", [cutter_up]), ("fuse", [m_base]), ("cut", [drill_comp])],
+                    label="Male body")
+
+@GRAPH.stage("female_body", inputs=("tight_bounds",) + BOOL_INPUTS, deps=("base_female", "cutter_down", "drill_Female_Mold"))
+def stage_female_body(p, base, cutter_down, drill_comp):
+    f_core, fill_f, f_base = base
+    drill_comp = drill_cutter(p, "Female_Mold", drill_comp, f_core.BoundBox)
+    # Tall kicks push the gap surface into the top plate, so the plate is
+    # fused only after cutter_down.
+    return booleans(p, f_core,
+                    [("fuse", [fill_f]), ("cut", [cutter_down]), ("fuse", [f_base]), ("cut", [drill_comp])],
+                    label="Female body")
+
+@GRAPH.stage("locks_male", inputs=("side_locks", "core_width", "mold_len"), deps=("male_body",))
+def stage_locks_male(p, male):
+    if not p["side_locks"]:
+        return []
+    core_width = p["core_width"]
+    mold_len = p["mold_len"]
+    h_male_real = male.BoundBox.ZMax - male.BoundBox.ZMin
+    R_lock = h_male_real + 5.0
+    z_lock_base = male.BoundBox.ZMin
+
+    lock_n = make_pentagon_lock(core_width, R_lock, LOCK_EXT_LEN)
+    lock_n.translate(fc.Vector(0, mold_len/2.0 - LOCK_OVERLAP, z_lock_base))
+
+    lock_t = make_pentagon_lock(core_width, R_lock, LOCK_EXT_LEN)
+    lock_t.translate(fc.Vector(0, -(mold_len/2.0) - LOCK_EXT_LEN + LOCK_OVERLAP, z_lock_base))
+    return [lock_n, lock_t]
+
+@GRAPH.stage("locks_female", inputs=("side_locks", "core_width", "mold_len"), deps=("female_body", "loft_master"))
+def stage_locks_female(p, female, s_master):
+    if not p["side_locks"]:
+        return []
+    core_width = p["core_width"]
+    mold_len = p["mold_len"]
+    bbox = s_master.BoundBox
+    male_z_min = bbox.ZMin
+    male_z_max = bbox.ZMax
+    h_male_estimated = male_z_max - male_z_min
+    R_lock_male = h_male_estimated + 5.0
+
+    z_fem_top = female.BoundBox.ZMax
+    z_ground = bbox.ZMin
+    h_cap_tot = z_fem_top - z_ground
+
+    cap_n = make_female_cap(core_width, h_cap_tot, LOCK_EXT_LEN, R_lock_male)
+    cap_n.translate(fc.Vector(0, mold_len/2.0 - LOCK_OVERLAP, z_ground))
+
+    cap_t = make_female_cap(core_width, h_cap_tot, LOCK_EXT_LEN, R_lock_male)
+    cap_t.translate(fc.Vector(0, -(mold_len/2.0) - LOCK_EXT_LEN + LOCK_OVERLAP, z_ground))
+    return [cap_n, cap_t]
+
+@GRAPH.stage("outline", inputs=(
+    "wheelbase", "truck_hole_len", "kick_gap", "nose_len", "tail_len", "board_width",
+    "nose_taper", "tail_taper", "nose_flatness", "tail_flatness"))
+def stage_outline(p):
+    wheelbase = p["wheelbase"]
+    truck_hole_len = p["truck_hole_len"]
+    kick_gap = p["kick_gap"]
+    y_n = (wheelbase/2) + truck_hole_len + kick_gap + p["nose_len"]
+    y_t = -((wheelbase/2) + truck_hole_len + kick_gap + p["tail_len"])
+    w_half = p["board_width"] / 2.0
+    half_ntw = 0.1
+    half_ttw = 0.1
+    nose_taper = p["nose_taper"]
+    tail_taper = p["tail_taper"]
+    nose_flatness = p["nose_flatness"]
+    tail_flatness = p["tail_flatness"]
+
+    nose_start_y = y_n - nose_taper
+    p0_n = fc.Vector(w_half, nose_start_y, 0)
+    p3_n = fc.Vector(half_ntw, y_n, 0)
+    p1_n = fc.Vector(w_half, nose_start_y + (nose_taper * nose_flatness), 0)
+    p2_n = fc.Vector(half_ntw + (w_half - half_ntw) * nose_flatness, y_n, 0)
+    bz_nose = Part.BezierCurve()
+    bz_nose.setPoles([p0_n, p1_n, p2_n, p3_n])
+
+    tail_start_y = y_t + tail_taper
+    p0_t = fc.Vector(w_half, tail_start_y, 0)
+    p3_t = fc.Vector(half_ttw, y_t, 0)
+    p1_t = fc.Vector(w_half, tail_start_y - (tail_taper * tail_flatness), 0)
+    p2_t = fc.Vector(half_ttw + (w_half - half_ttw) * tail_flatness, y_t, 0)
+    bz_tail = Part.BezierCurve()
+    bz_tail.setPoles([p0_t, p1_t, p2_t, p3_t])
+
+    l_nose_tip = Part.makeLine(p3_n, fc.Vector(0, y_n, 0))
+    l_tail_tip = Part.makeLine(fc.Vector(0, y_t, 0), p3_t)
+    l_mid = Part.makeLine(p0_t, p0_n)
+
+    tail_curve_shp = bz_tail.toShape()
+    tail_curve_shp.reverse()
+    w_half_shp = Part.Wire([l_tail_tip, tail_curve_shp, l_mid, bz_nose.toShape(), l_nose_tip])
+    w_full_shp = Part.Wire([w_half_shp, w_half_shp.mirror(fc.Vector(0,0,0), fc.Vector(1,0,0))])
+
+    return Part.Face(w_full_shp)
+
+# --- PARTS ---
+
+@GRAPH.stage("Male_Mold", inputs=BOOL_INPUTS, deps=("male_body", "locks_male"))
+def stage_male(p, male, locks):
+    return booleans(p, male, [("fuse", locks)], label="Male_Mold locks")
+
+@GRAPH.stage("Female_Mold", inputs=BOOL_INPUTS, deps=("female_body", "locks_female"))
+def stage_female(p, female, caps):
+    return booleans(p, female, [("fuse", caps)], label="Female_Mold locks")
+
+@GRAPH.stage("Shaper_Template", inputs=("shaper_height", "tight_bounds") + BOOL_INPUTS,
+             deps=("outline", "cutter_down_veneer", "drill_Shaper_Template", "loft_veneer"))
+def stage_shaper(p, face, cutter_down_veneer, drill_comp, surf_veneer):
+    z_flat_top = shaper_top(p)
+
+    depth = 100
+    if p["tight_bounds"]:
+        depth = z_flat_top - (surf_veneer.BoundBox.ZMin - TIGHT_MARGIN)
+    shaper_block = face.extrude(fc.Vector(0, 0, -depth))
+    shaper_block.translate(fc.Vector(0, 0, z_flat_top))
+    drill_comp = drill_cutter(p, "Shaper_Template", drill_comp, shaper_block.BoundBox)
+
+    return booleans(p, shaper_block, [("cut", [cutter_down_veneer, drill_comp])], label="Shaper_Template")
+
+@GRAPH.stage("Board_Preview", inputs=("core_width", "mold_len", "tight_bounds") + BOOL_INPUTS,
+             deps=("outline", "cutter_up", "cutter_down_veneer", "drill_Board_Preview", "loft_master", "loft_veneer"))
+def stage_preview(p, face, cutter_up, cutter_down_veneer, drill_comp, s_master, surf_veneer):
+    core_width = p["core_width"]
+    mold_len = p["mold_len"]
+    if p["tight_bounds"]:
+        # the block is far wider than the outline, so block & cookie is the
+        # cookie alone: extrude it between the veneer and master surfaces
+        z0 = surf_veneer.BoundBox.ZMin - TIGHT_MARGIN
+        cookie = face.extrude(fc.Vector(0, 0, s_master.BoundBox.ZMax + TIGHT_MARGIN - z0))
+        cookie.translate(fc.Vector(0, 0, z0))
+        drill_comp = drill_cutter(p, "Board_Preview", drill_comp, cookie.BoundBox)
+        return booleans(p, cookie, [("cut", [cutter_up, cutter_down_veneer, drill_comp])],
+                        label="Board_Preview")
+    veneer_block = Part.makeBox(core_width+50, mold_len+50, 100, fc.Vector(-(core_width+50)/2, -(mold_len+50)/2, -50))
+    cookie = face.extrude(fc.Vector(0,0,100))
+    cookie.translate(fc.Vector(0,0,-50))
+
+    # (block - cutters) & cookie - drill == (block & cookie) - all cutters
+    return booleans(p, veneer_block,
+                    [("common", [cookie]), ("cut", [cutter_up, cutter_down_veneer, drill_comp])],
+                    [("cut", [cutter_up, cutter_down_veneer]), ("common", [cookie]), ("cut", [drill_comp])],
+                    label="Board_Preview")
+
+@GRAPH.stage("Board_Preview_Light", inputs=("veneer_thick",) + DRILL_INPUTS, deps=("outline", "loft_master"))
+def stage_preview_light(p, face, s_master):
+    # The master surface trimmed to the outline (holes punched in 2D first)
+    # and thickened by the veneer along its normals into one solid: no
+    # boolean between solids. The rim and hole walls follow the normals
+    # rather than running vertically.
+    discs = [Part.Face(Part.Wire(Part.makeCircle(d/2, fc.Vector(cx, cy, 0))))
+             for cx, cy, d in FM_holes.holes(p, "Board_Preview")]
+    region = face.cut(discs)
+    cookie = region.extrude(fc.Vector(0, 0, 2*EXTRUSION_LIMIT))
+    cookie.translate(fc.Vector(0, 0, -EXTRUSION_LIMIT))
+    top = s_master.common(cookie)
+    if not top.Faces:
+        raise Exception("Preview surface trim failed")
+    deck = Part.makeShell(top.Faces)
+    # thicken towards -Z whichever way the loft faces
+    f0 = deck.Faces[0]
+    u0, u1, v0, v1 = f0.ParameterRange
+    up = f0.normalAt((u0 + u1) / 2.0, (v0 + v1) / 2.0).z > 0
+    offset = -p["veneer_thick"] if up else p["veneer_thick"]
+    solids = deck.makeOffsetShape(offset, PREVIEW_OFFSET_TOLERANCE, fill=True).Solids
+    if len(solids) != 1:
+        raise Exception(f"Preview thickening gave {len(solids)} solids")
+    return solids[0]
+
+MOLD_TYPES = ["Board_Preview", "Male_Mold", "Female_Mold", "Shaper_Template"]
+# Bump whenever a change to the build stages alters the shapes they produce:
+# it is part of the on-disk cache key.
+GEOMETRY_VERSION = 3
+
+def part_stage(p, mold_type):
+    """Stage that builds ``mold_type`` (the LightPreview preference swaps the preview)."""
+    if mold_type == "Board_Preview" and p.get("light_preview"):
+        return "Board_Preview_Light"
+    return mold_type
+
+def build_part(p, mold_type, timings=None):
+    # Cached results are shared between objects: callers must not modify them in place.
+    if mold_type not in MOLD_TYPES:
+        raise ValueError(f"Unknown MoldType: {mold_type}")
+    STAGE_CACHE.resize(FM_cache.cache_size())
+    mold_type = part_stage(p, mold_type)
+    key = GRAPH.key(p, mold_type)
+    if key in STAGE_CACHE or not FM_diskcache.enabled():
+        return GRAPH.evaluate(p, mold_type, timings=timings)
+
+    d_key = FM_diskcache.disk_key(key, GEOMETRY_VERSION)
+    t0 = time.perf_counter()
+    shape = FM_diskcache.load(d_key)
+    if shape is not None:
+        STAGE_CACHE.put(key, shape)
+        if timings is not None:
+            timings[mold_type + "/disk_cache"] = time.perf_counter() - t0
+        return shape
+    shape = GRAPH.evaluate(p, mold_type, timings=timings)
+    FM_diskcache.store(d_key, shape)
+    return shape
+
 class ViewProviderMold:
     def __init__(self, vobj):
         vobj.Proxy = self
     def attach(self, vobj):
         self.ViewObject = vobj
         self.Object = vobj.Object
+        self.fast_node = None
         self.set_appearance(self.Object.MoldType)
     def updateData(self, fp, prop):
         if prop == "MoldType":
             self.set_appearance(fp.MoldType)
+        elif prop == "Shape":
+            self.update_fast_preview(fp)
+    def onChanged(self, vobj, prop):
+        if prop == "Visibility" and getattr(self, "fast_node", None) is not None:
+            self.update_fast_preview(vobj.Object)
+    def update_fast_preview(self, fp):
+        # FastPreview meshes are drawn as a plain Coin node next to the (empty) Shape
+        mesh = getattr(fp.Proxy, "fast_mesh", None)
+        if mesh is None and getattr(self, "fast_node", None) is None:
+            return
+        from pivy import coin # type: ignore
+        if getattr(self, "fast_node", None) is None:
+            self.fast_node = coin.SoSeparator()
+            hints = coin.SoShapeHints()
+            hints.vertexOrdering = coin.SoShapeHints.COUNTERCLOCKWISE
+            hints.shapeType = coin.SoShapeHints.SOLID
+            self.fast_material = coin.SoMaterial()
+            self.fast_coords = coin.SoCoordinate3()
+            self.fast_faces = coin.SoIndexedFaceSet()
+            for node in (hints, self.fast_material, self.fast_coords, self.fast_faces):
+                self.fast_node.addChild(node)
+            self.ViewObject.RootNode.addChild(self.fast_node)
+        if mesh is None or not self.ViewObject.Visibility:
+            self.fast_faces.coordIndex.setNum(0)
+            self.fast_coords.point.setNum(0)
+            return
+        points, triangles = mesh
+        index = [i for tri in triangles.tolist() for i in (tri[0], tri[1], tri[2], -1)]
+        self.fast_material.diffuseColor = self.ViewObject.ShapeColor[:3]
+        self.fast_coords.point.setValues(0, len(points), points.tolist())
+        self.fast_faces.coordIndex.setValues(0, len(index), index)
     def set_appearance(self, mold_type):
         if mold_type == "Male_Mold":
             self.ViewObject.ShapeColor = (0.2, 0.6, 0.8)
@@ -130,10 +756,17 @@ class ViewProviderMold:
     def __getstate__(self): return None
     def __setstate__(self, state): return None
 
-PRESET_FILE = os.path.join(fc.getUserAppDataDir(), "Mod", "FingerboardMoldPro", "fb_presets.json")
-SHAPE_FILE = os.path.join(fc.getUserAppDataDir(), "Mod", "FingerboardMoldPro", "fb_shapes.json")
+PRESET_FILE = FM_presets.PRESET_FILE
+SHAPE_FILE = FM_presets.SHAPE_FILE
+
+# Properties that are not design inputs: editing them keeps the preset name
+NOT_INPUTS = ["Proxy", "Shape", "Label", "MoldType", "NoseShape", "TailShape", "TotalLengthCheck",
+              "NoseHeightCheck", "TailHeightCheck", "ValidityStatus", "BuildState", "AddFillet", "FastPreview"] + FM_profile.TIMING_PROPS
 
 class FB_Mold:
+    execute_count = 0
+    skip_count = 0
+
     def __init__(self, obj):
         obj.addProperty("App::PropertyLength", "MoldBaseWidth", "Mold Base").MoldBaseWidth = 75.0
         obj.addProperty("App::PropertyLength", "MoldBaseHeight", "Mold Base").MoldBaseHeight = 10.0
@@ -166,6 +799,7 @@ class FB_Mold:
         obj.addProperty("App::PropertyLength", "TruckHoleDiam", "Truck Holes").TruckHoleDiam = 1.7
         obj.addProperty("App::PropertyLength", "TruckHoleDistL", "Truck Holes").TruckHoleDistL = 7.5
         obj.addProperty("App::PropertyLength", "TruckHoleDistW", "Truck Holes").TruckHoleDistW = 5.5
+        self.add_hole_properties(obj)
         
         obj.addProperty("App::PropertyLength", "ShaperHeight", "Shaper").ShaperHeight = 10.0
         obj.addProperty("App::PropertyPercent", "NoseFlatness", "Shaper").NoseFlatness = 60
@@ -180,6 +814,7 @@ class FB_Mold:
         self.reload_presets_list(obj)
         obj.addProperty("App::PropertyEnumeration", "MoldType", "Base")
         obj.MoldType = ["Board_Preview", "Male_Mold", "Female_Mold", "Shaper_Template"]
+        obj.addProperty("App::PropertyBool", "FastPreview", "Base").FastPreview = False
         
         obj.addProperty("App::PropertyLength", "TotalLengthCheck", "Info")
         obj.setEditorMode("TotalLengthCheck", 1)
@@ -187,61 +822,103 @@ class FB_Mold:
         obj.setEditorMode("NoseHeightCheck", 1)    
         obj.addProperty("App::PropertyLength", "TailHeightCheck", "Info")
         obj.setEditorMode("TailHeightCheck", 1)
+        self.add_info_properties(obj)
+        FM_profile.add_properties(obj)
         
         self.is_updating_preset = False
+        self.pending = None
+        self.fingerprint = None
         obj.Proxy = self
 
+    def __getstate__(self): return None
+    def __setstate__(self, state):
+        self.is_updating_preset = False
+        self.pending = None
+        self.fingerprint = None
+        return None
+
+    def onDocumentRestored(self, fp):
+        self.add_hole_properties(fp)
+        self.add_info_properties(fp)
+        FM_profile.add_properties(fp)
+
+    def add_info_properties(self, obj):
+        for name in ("ValidityStatus", "BuildState"):
+            if not hasattr(obj, name):
+                obj.addProperty("App::PropertyString", name, "Info")
+                obj.setEditorMode(name, 1)
+        obj.BuildState = "" # a build in flight when the file was saved is gone
+
+    def add_hole_properties(self, obj):
+        if not hasattr(obj, "HolePattern"):
+            obj.addProperty("App::PropertyEnumeration", "HolePattern", "Truck Holes",
+                            "Guide, truck and pin holes from fb_holes.json")
+            obj.HolePattern = FM_holes.names()
+        else:
+            self.reload_hole_patterns(obj)
+
+    def reload_hole_patterns(self, obj):
+        current = obj.HolePattern
+        items = FM_holes.names()
+        if current not in items:
+            items.append(current) # keep a pattern removed from the file selectable
+        self.is_updating_preset = True
+        try:
+            obj.HolePattern = items
+            obj.HolePattern = current
+        finally:
+            self.is_updating_preset = False
+
     def reload_presets_list(self, obj):
         items = ["Custom"]
-        if os.path.exists(PRESET_FILE):
-            try:
-                with open(PRESET_FILE, 'r') as f:
-                    data = json.load(f)
-                    items.extend(sorted(data.keys()))
-            except Exception:
-                pass 
-        obj.Preset = items
+        try:
+            items.extend(FM_presets.PRESETS.names())
+        except Exception:
+            pass 
+        # refreshing the list must not re-apply the selected preset
+        self.is_updating_preset = True
+        try:
+            obj.Preset = items
+        finally:
+            self.is_updating_preset = False
+
+    def preset_values(self, preset_name):
+        return FM_presets.PRESETS.get(preset_name)
 
     def apply_preset(self, obj, preset_name):
-        if not os.path.exists(PRESET_FILE): return
         try:
-            with open(PRESET_FILE, 'r') as f:
-                all_data = json.load(f)
-            if preset_name not in all_data: return
-            data = all_data[preset_name]
-            self.is_updating_preset = True 
+            data = self.preset_values(preset_name)
+            if data is None: return
+            self.apply_values(obj, data, recompute=True)
+        except Exception as e:
+            fc.Console.PrintError(f"Error loading preset: {e}\n")
+            self.is_updating_preset = False
+
+    def apply_values(self, obj, data, recompute=False):
+        with self.transaction(obj, recompute=recompute, keep_preset=True):
             for key, val in data.items():
                 if hasattr(obj, key):
                     try:
                         setattr(obj, key, val)
                     except Exception:
                         pass
-            self.is_updating_preset = False
-            obj.recompute()
-        except Exception as e:
-            fc.Console.PrintError(f"Error loading preset: {e}\n")
-            self.is_updating_preset = False
 
     def reload_shapes_list(self, obj):
         items = ["Custom"]
-        if os.path.exists(SHAPE_FILE):
-            try:
-                with open(SHAPE_FILE, 'r') as f:
-                    data = json.load(f)
-                    items.extend(sorted(data.keys()))
-            except Exception:
-                pass
+        try:
+            items.extend(FM_presets.SHAPES.names())
+        except Exception:
+            pass
         obj.NoseShape = items
         obj.TailShape = items
 
     def apply_shape_preset(self, obj, shape_name, side):
-        if not os.path.exists(SHAPE_FILE) or shape_name == "Custom": return
+        if shape_name == "Custom": return
+        # also runs inside onChanged and commit(): restore their flag, don't clear it
+        updating = getattr(self, "is_updating_preset", False)
         try:
-            with open(SHAPE_FILE, 'r') as f:
-                data = json.load(f)
-            
-            if shape_name in data:
-                params = data[shape_name]
+            params = FM_presets.SHAPES.get(shape_name)
+            if params is not None:
                 self.is_updating_preset = True 
                 mapping = {
                     "TaperStart": f"{side}TaperStart"
@@ -249,14 +926,18 @@ class FB_Mold:
                 for gen_key, obj_key in mapping.items():
                     if gen_key in params and hasattr(obj, obj_key):
                         setattr(obj, obj_key, params[gen_key])
-                self.is_updating_preset = False
                 obj.touch() 
 
         except Exception as e:
             fc.Console.PrintError(f"Shape Error: {e}\n")
-            self.is_updating_preset = False
+        finally:
+            self.is_updating_preset = updating
 
     def onChanged(self, fp, prop):
+        if getattr(self, "pending", None) is not None:
+            if not self.is_updating_preset:
+                self.pending.append(prop)
+            return
         if hasattr(self, "is_updating_preset") and self.is_updating_preset: 
             return       
         if prop == "MoldType":
@@ -266,589 +947,287 @@ class FB_Mold:
         if prop == "AddFillet":
              fp.touch() # Force recompute
 
-        self.is_updating_preset = True
-        try:
-            if prop == "Preset":
-                if fp.Preset != "Custom":
-                    self.apply_preset(fp, fp.Preset)
+        if prop == "FastPreview":
+             fp.touch()
+
+        if prop == "Preset":
+            if fp.Preset != "Custom":
+                self.is_updating_preset = True
+                try:
                     fp.NoseShape = "Custom"
                     fp.TailShape = "Custom"
-            
-            elif prop == "NoseShape":
-                self.apply_shape_preset(fp, fp.NoseShape, "Nose")
-            elif prop == "TailShape":
-                self.apply_shape_preset(fp, fp.TailShape, "Tail")            
-            
-            elif prop == "BoardWidth":
-                min_bw = 29.0
-                if fp.BoardWidth.Value < min_bw:
-                    fp.BoardWidth = min_bw
-                    fc.Console.PrintWarning(f"BoardWidth minimum is {min_bw}mm!\n")
-                elif fp.BoardWidth.Value > fp.MoldCoreWidth.Value:                                                                                                                          
-                    fp.BoardWidth = fp.MoldCoreWidth.Value
-                    fc.Console.PrintWarning(f"BoardWidth cannot exceed MoldCoreWidth ({fp.MoldCoreWidth.Value}mm)!\n")
-            
-            elif prop == "TubWidth":
-                if fp.TubWidth.Value > (fp.BoardWidth.Value - 2.0):
-                    fp.TubWidth = fp.BoardWidth.Value - 2.0
-            
-            elif prop == "ConcaveDrop":
-                max_val = 3.4
-                if fp.ConcaveDrop.Value > max_val:
-                    fp.ConcaveDrop = max_val
-                    fc.Console.PrintWarning(f"ConcaveDrop limited to {max_val}mm!\n")
-                elif fp.ConcaveDrop.Value < 0.0:
-                    fp.ConcaveDrop = 0.0
-            elif prop == "ConcaveLength":
-                max_len = fp.Wheelbase.Value
-                if fp.ConcaveLength.Value > max_len:
-                    fp.ConcaveLength = max_len
-                    fc.Console.PrintWarning(f"Based on Wheelbase cannot exceed ({max_len}mm)!\n")
-                elif fp.ConcaveLength.Value < 0.0:
-                    fp.ConcaveLength = 0.0
-            elif prop == "Wheelbase":
-                min_wb = 30.0
-                if fp.Wheelbase.Value < min_wb:
-                    fp.Wheelbase = min_wb
-                    fc.Console.PrintWarning(f"Wheelbase minimum is {min_wb}mm!\n")
-                elif fp.Wheelbase.Value > 50.0:
-                    fp.Wheelbase = 50.0
-                    fc.Console.PrintWarning("Wheelbase maximum is 50mm!\n")
-            elif prop == "TransitionLength":
-                limit = min(fp.NoseLength.Value, fp.TailLength.Value) - 2.0
-                if limit < 1.0: limit = 1.0              
-                if fp.TransitionLength.Value > limit:
-                    fp.TransitionLength = limit
-                    fc.Console.PrintWarning(f"TransitionLength shortened to {limit}mm to fit in Nose/Tail!\n")
-                elif fp.TransitionLength.Value < 0.1:
-                    fp.TransitionLength = 0.1
-                    fc.Console.PrintWarning("TransitionLength minimum is 0.1mm!\n")
-            elif prop == "NoseAngle":
-                max_angle = 45.0
-                if fp.NoseAngle.Value > max_angle:
-                    fp.NoseAngle = max_angle
-                    fc.Console.PrintWarning(f"NoseAngle limited to {max_angle}°!\n")
-                elif fp.NoseAngle.Value < 0.0:
-                    fp.NoseAngle = 0.0
-            elif prop == "TailAngle":
-                max_angle = 45.0
-                if fp.TailAngle.Value > max_angle:
-                    fp.TailAngle = max_angle
-                    fc.Console.PrintWarning(f"TailAngle limited to {max_angle}°!\n")
-                elif fp.TailAngle.Value < 0.0:
-                    fp.TailAngle = 0.0
-            elif prop == "ShaperHeight":
-                if fp.ShaperHeight.Value < 0.5:
-                    fp.ShaperHeight = 0.5
-                    fc.Console.PrintWarning("ShaperHeight limited to 0.5mm (Min)!\n")
-                if fp.ShaperHeight.Value > 50.0:
-                    fp.ShaperHeight = 50.0
-                    fc.Console.PrintWarning("ShaperHeight limited to 50.0mm (Max)!\n")
-            elif prop == "NoseFlatness":
-                if fp.NoseFlatness > 100:
-                    fp.NoseFlatness = 100
-                elif fp.NoseFlatness < 0:
-                    fp.NoseFlatness = 0            
-            elif prop == "TailFlatness":
-                if fp.TailFlatness > 100:
-                    fp.TailFlatness = 100
-                elif fp.TailFlatness < 0:
-                    fp.TailFlatness = 0
-            elif prop == "VeneerThickness":
-                if fp.VeneerThickness.Value < 1.0:
-                    fp.VeneerThickness = 1.0
-                    fc.Console.PrintWarning("VeneerThickness limited to 1.0mm (Min)!\n")
-                elif fp.VeneerThickness.Value > 3.5:
-                    fp.VeneerThickness = 3.5
-                    fc.Console.PrintWarning("VeneerThickness limited to 3.5mm (Max)!\n")
-            elif prop == "KickGap":
-                if fp.KickGap.Value < 0.0:
-                    fp.KickGap = 0.0
-                elif fp.KickGap.Value > 5.0:
-                    fp.KickGap = 5.0
-                    fc.Console.PrintWarning("KickGap limited to 5.0mm (Max)!\n")
-            elif prop == "NoseLength":
-                if fp.NoseLength.Value < 5.0:
-                    fp.NoseLength = 5.0
-                    fc.Console.PrintWarning("NoseLength limited to 5.0mm (Min)!\n")
-                elif fp.NoseLength.Value > 23.0:
-                    fp.NoseLength = 23.0
-                    fc.Console.PrintWarning("NoseLength limited to 23.0mm (Max)!\n")
-            elif prop == "TailLength":
-                if fp.TailLength.Value < 5.0:
-                    fp.TailLength = 5.0
-                    fc.Console.PrintWarning("TailLength limited to 5.0mm (Min)!\n")
-                elif fp.TailLength.Value > 23.0:
-                    fp.TailLength = 23.0
-                    fc.Console.PrintWarning("TailLength limited to 23.0mm (Max)!\n")
-            elif prop == "GuideDiameter":
-                max_diam = ((fp.MoldBaseWidth.Value - fp.MoldCoreWidth.Value) / 2.0) - 2.0
-                if fp.GuideDiameter.Value < 0.1:
-                    fp.GuideDiameter = 0.1
-                    fc.Console.PrintWarning("GuideDiameter minimum is 0.1mm!\n")
-                elif fp.GuideDiameter.Value > max_diam:
-                    fp.GuideDiameter = max_diam
-                    fc.Console.PrintWarning(f"GuideDiameter limited to {max_diam}mm to fit in MoldBase!\n")
-            elif prop == "MoldCoreWidth":
-                if fp.MoldCoreWidth.Value < 29.0:
-                    fp.MoldCoreWidth = 29.0
-                    fc.Console.PrintWarning("MoldCoreWidth minimum is 29.0mm!\n")
-                elif fp.MoldCoreWidth.Value > 60.0:
-                    fp.MoldCoreWidth = 60.0
-                    fc.Console.PrintWarning("MoldCoreWidth maximum is 60.0mm!\n")
-            elif prop == "MoldCoreHeight":
-                if fp.MoldCoreHeight.Value < 5.0:
-                    fp.MoldCoreHeight = 5.0
-                    fc.Console.PrintWarning("MoldCoreHeight minimum is 5.0mm!\n")                    
-                elif fp.MoldCoreHeight.Value > 25.0:
-                    fp.MoldCoreHeight = 25.0
-                    fc.Console.PrintWarning("MoldCoreHeight maximum is 25.0mm!\n")
-            elif prop == "MoldBaseWidth":
-                min_base_w = fp.MoldCoreWidth.Value
-                if fp.MoldBaseWidth.Value < min_base_w:
-                    fp.MoldBaseWidth = min_base_w
-                    fc.Console.PrintWarning(f"MoldBaseWidth minimum is MoldCoreWidth = {min_base_w}mm!\n")
-                elif fp.MoldBaseWidth.Value > (fp.MoldCoreWidth.Value + 40.0):
-                    fp.MoldBaseWidth = fp.MoldCoreWidth.Value + 40.0
-                    fc.Console.PrintWarning(f"MoldBaseWidth maximum is MoldCoreWidth + 40mm = {fp.MoldCoreWidth.Value + 40.0}mm!\n")
-            elif prop == "MoldBaseHeight":
-                if fp.MoldBaseHeight.Value < 0.0:
-                    fp.MoldBaseHeight = 0.0
-                elif fp.MoldBaseHeight.Value > 20.0:
-                    fp.MoldBaseHeight = 20.0
-                    fc.Console.PrintWarning("MoldBaseHeight maximum is 20.0mm!\n")
-            elif prop == "MoldCornerRadius":
-                if fp.MoldCornerRadius.Value < 0.1:
-                    fp.MoldCornerRadius = 0.1
-                    fc.Console.PrintWarning("MoldCornerRadius minimum is 0.1mm!\n")
-                elif fp.MoldCornerRadius.Value > 5.0:
-                    fp.MoldCornerRadius = 5.0
-                    fc.Console.PrintWarning("MoldCornerRadius maximum is 5.0mm!\n")
-            elif prop == "MoldLength":
-                min_len = fp.TotalLengthCheck.Value
-                if fp.MoldLength.Value < min_len:
-                    fp.MoldLength = min_len
-                    fc.Console.PrintWarning(f"MoldLength minimum is equal to TotalLength ({min_len}mm)!\n")
-                elif fp.MoldLength.Value > 130.0:
-                    fp.MoldLength = 130.0
-                    fc.Console.PrintWarning("MoldLength maximum is 130.0mm!\n")
-            elif prop == "MoldGap":
-                min_gap = fp.VeneerThickness.Value
-                if fp.MoldGap.Value < min_gap:
-                    fp.MoldGap = min_gap
-                    fc.Console.PrintWarning(f"MoldGap minimum is equal to VeneerThickness ({min_gap}mm)!\n")
-                elif fp.MoldGap.Value > 4.0:
-                    fp.MoldGap = 4.0
-                    fc.Console.PrintWarning("MoldGap maximum is 4.0mm!\n")
-
-            elif prop not in ["Proxy", "Shape", "Label", "MoldType", "TotalLengthCheck", "NoseHeightCheck", "TailHeightCheck", "ValidityStatus", "AddFillet"]:
-                if hasattr(fp, "Preset") and fp.Preset != "Custom":
-                    fp.Preset = "Custom"        
+                finally:
+                    self.is_updating_preset = False
+                self.apply_preset(fp, fp.Preset)
+            return
+
+        self.is_updating_preset = True
+        try:
+            self.handle_change(fp, prop)
         except Exception as e:
             fc.Console.PrintError(f"Error in onChanged: {e}\n")
         finally:
             self.is_updating_preset = False
 
+    def handle_change(self, fp, prop, keep_preset=False):
+        """Clamp ``prop`` to its limits (or apply a shape preset)."""
+        self.apply_changes(fp, [prop], keep_preset)
+
+    def apply_changes(self, fp, changed, keep_preset=False):
+        """Shape presets, then every limit touched by ``changed`` in one pass (see FM_constraints)."""
+        written = []
+        for prop in changed:
+            if prop == "NoseShape":
+                self.apply_shape_preset(fp, fp.NoseShape, "Nose")
+                written.append("NoseTaperStart")
+            elif prop == "TailShape":
+                self.apply_shape_preset(fp, fp.TailShape, "Tail")
+                written.append("TailTaperStart")
+
+        _, writes, notes = FM_constraints.resolve(property_values(fp), list(changed) + written)
+        for name, value in writes.items():
+            setattr(fp, name, value)
+        for name, msg in notes:
+            fc.Console.PrintWarning(msg + "\n")
+
+        if not keep_preset and hasattr(fp, "Preset") and fp.Preset != "Custom":
+            if any(prop not in NOT_INPUTS for prop in changed):
+                fp.Preset = "Custom"
+
+    # --- TRANSACTIONS ---
+
+    @contextlib.contextmanager
+    def transaction(self, fp, recompute=True, keep_preset=False):
+        """Apply many property changes as one edit.
+
+        While the block runs ``onChanged`` only records property names. On
+        exit the changed properties, and every property whose limits depend
+        on them, are clamped in one pass (``FM_constraints``), and the object
+        and the molds linked to it are recomputed together once.
+        Nested transactions join the outermost one.
+        """
+        outer = getattr(self, "pending", None) is None
+        if outer:
+            self.pending = []
+            self.tx_recompute = recompute
+            self.tx_keep_preset = keep_preset
+        else:
+            self.tx_recompute = self.tx_recompute or recompute
+            self.tx_keep_preset = self.tx_keep_preset or keep_preset
+        try:
+            yield fp
+        except Exception:
+            if outer:
+                self.pending = None
+            raise
+        if outer:
+            self.commit(fp)
+
+    def commit(self, fp):
+        changed, self.pending = list(dict.fromkeys(self.pending)), None
+        keep_preset = self.tx_keep_preset
+        self.is_updating_preset = True
+        try:
+            if "Preset" in changed and fp.Preset != "Custom":
+                data = self.preset_values(fp.Preset) or {}
+                for key, val in data.items():
+                    if hasattr(fp, key):
+                        setattr(fp, key, val)
+                changed.extend(k for k in data if k not in changed)
+                fp.NoseShape = "Custom"
+                fp.TailShape = "Custom"
+                keep_preset = True
+            try:
+                self.apply_changes(fp, [prop for prop in changed if prop != "Preset"], keep_preset)
+            except Exception as e:
+                fc.Console.PrintError(f"Error clamping {', '.join(changed)}: {e}\n")
+        finally:
+            self.is_updating_preset = False
+        if self.tx_recompute and changed:
+            self.recompute_group(fp, len(changed))
+
+    def recompute_group(self, fp, changes=1):
+        # the expression-linked molds are in the master's InList
+        group = [fp] + [o for o in fp.InList if isinstance(getattr(o, "Proxy", None), FB_Mold)]
+        before = FB_Mold.execute_count
+        skipped = FB_Mold.skip_count
+        fp.touch()
+        fp.Document.recompute(group)
+        fc.Console.PrintLog(f"{fp.Label}: {changes} property changes -> 1 recompute "
+                            f"({FB_Mold.execute_count - before} executes for {len(group)} objects, "
+                            f"{FB_Mold.skip_count - skipped} unchanged, "
+                            f"up to {changes} recomputes unbatched)\n")
+
     def execute(self, fp):
+        FB_Mold.execute_count += 1
+        self.last_error = None
         try:
-            OVERRUN_MARGIN = 4.0
-            EXTRUSION_LIMIT = 100.0
-            
-            # --- CLAMP PARAMS ---
-            core_width = clamp(fp.MoldCoreWidth.Value, 29.0, 60.0)
-            core_base_depth = clamp(fp.MoldCoreHeight.Value, 5.0, 25.0)
-            base_width = clamp(fp.MoldBaseWidth.Value, core_width, (core_width + 40.0))
-            base_height = clamp(fp.MoldBaseHeight.Value, 0.0, 20.0)
-            M_Radius = clamp(fp.MoldCornerRadius.Value, 0.1, 5.0)
-            board_width = clamp(fp.BoardWidth.Value, 29.0, core_width)
-            wheelbase = clamp(fp.Wheelbase.Value, 30.0, 50.0)
-            concave_depth = clamp(fp.ConcaveDrop.Value, 0.0, 3.4)
-            
-            tub_width = 0.0
-            if hasattr(fp, "TubWidth"):
-                tub_width = clamp(fp.TubWidth.Value, 0.0, board_width - 2.0)
-            
-            truck_hole_len = fp.TruckHoleDistL.Value
-            truck_hole_width = fp.TruckHoleDistW.Value
-            truck_hole_diam = fp.TruckHoleDiam.Value
-            
-            concave_len = clamp(fp.ConcaveLength.Value, 0.1, wheelbase)
-            camber = 0.0
-            kick_gap = clamp(fp.KickGap.Value, 0.5, 5.0)
-            nose_len = clamp(fp.NoseLength.Value, 5.0, 23.0)
-            tail_len = clamp(fp.TailLength.Value, 5.0, 23.0)
-            
-            angle_nose = clamp(fp.NoseAngle.Value, 0.0, 45.0)
-            angle_tail = clamp(fp.TailAngle.Value, 0.0, 45.0)
-            
-            # Calculate Radius from Transition Length
-            trans_len = clamp(fp.TransitionLength.Value, 0.1, 10.0)
-            
-            sin_n = math.sin(math.radians(angle_nose))
-            rad_nose = (trans_len / sin_n) if sin_n > 0.001 else 500.0
-            
-            sin_t = math.sin(math.radians(angle_tail))
-            rad_tail = (trans_len / sin_t) if sin_t > 0.001 else 500.0
-            
-            rad_nose = clamp(rad_nose, 2.0, 1000.0)
-            rad_tail = clamp(rad_tail, 2.0, 1000.0)
-            
-            fp.TotalLengthCheck = wheelbase + (2 * truck_hole_len) + (2 * kick_gap) + nose_len + tail_len
-            board_len = fp.TotalLengthCheck.Value
-            mold_len = clamp(fp.MoldLength.Value, board_len, 130.0)            
-            veneer_thick = clamp(fp.VeneerThickness.Value, 2.0, 3.5)
-            mold_gap = clamp(fp.MoldGap.Value, veneer_thick, 4.0)
-            guide_diam = clamp(fp.GuideDiameter.Value, 0.1, (((base_width - core_width) / 2.0) - 2.0))
-            shaper_height = clamp(fp.ShaperHeight.Value, 0.5, 50.0)
-            
-            # --- Check Heights ---
-            limit_y_nose = rad_nose * math.sin(math.radians(angle_nose))
-            if nose_len <= limit_y_nose:
-                arg = rad_nose**2 - nose_len**2
-                if arg < 0: arg = 0
-                h_nose_raw = rad_nose - math.sqrt(arg)
-            else:
-                h_curve = rad_nose - (rad_nose * math.cos(math.radians(angle_nose)))
-                h_lin = (nose_len - limit_y_nose) * math.tan(math.radians(angle_nose))
-                h_nose_raw = h_curve + h_lin
-            
-            limit_y_tail = rad_tail * math.sin(math.radians(angle_tail))
-            if tail_len <= limit_y_tail:
-                arg = rad_tail**2 - tail_len**2
-                if arg < 0: arg = 0
-                h_tail_raw = rad_tail - math.sqrt(arg)
+            values = property_values(fp)
+            p = mold_params(fp)
+            fp.TotalLengthCheck = p["board_len"]
+            fp.NoseHeightCheck = p["h_nose"]
+            fp.TailHeightCheck = p["h_tail"]
+            self.check_validity(fp, values, p)
+            if self.use_fast_preview(fp, p):
+                self.cancel_background(fp)
+                self.fingerprint = None
+                self.show_fast_preview(fp, p)
+                return
+            self.fast_mesh = None
+            # the part's stage key hashes exactly the clamped inputs its geometry reads
+            fingerprint = GRAPH.key(p, part_stage(p, fp.MoldType))
+            ready, self.ready = getattr(self, "ready", None), None
+            if ready is not None and ready[0] == fingerprint:
+                self.finish_background(fp, p, *ready)
+                return
+            profile = getattr(self, "profile_next", False) or FM_profile.take_profile_request()
+            if (not profile and fingerprint == getattr(self, "fingerprint", None)
+                    and not fp.Shape.isNull()):
+                self.cancel_background(fp)
+                FB_Mold.skip_count += 1
+                return
+            if not profile and fingerprint == getattr(self, "building", None):
+                FB_Mold.skip_count += 1 # already on its way
+                return
+            self.fingerprint = None
+            if not profile and FM_background.enabled():
+                self.start_background(fp, p, fingerprint)
+                return
+            self.cancel_background(fp)
+            timings = {}
+            t0 = time.perf_counter()
+            if profile:
+                self.profile_next = False
+                shape = FM_profile.run_profiled(fp.Label, build_part, p, fp.MoldType, timings)
             else:
-                h_curve = rad_tail - (rad_tail * math.cos(math.radians(angle_tail)))
-                h_lin = (tail_len - limit_y_tail) * math.tan(math.radians(angle_tail))
-                h_tail_raw = h_curve + h_lin
+                shape = build_part(p, fp.MoldType, timings)
+            fp.Shape = shape
+            self.fingerprint = fingerprint
+            FM_profile.record(fp, p, timings, time.perf_counter() - t0, shape)
+        except FM_validity.InvalidParameters as e:
+            self.cancel_background(fp)
+            self.fingerprint = None
+            self.last_error = str(e)
+            fc.Console.PrintError(f"{fp.Label}: {e}\n")
+            fp.Shape = Part.makeBox(20,20,20)
+        except Exception as e:
+            self.fingerprint = None
+            self.last_error = str(e)
+            fc.Console.PrintError(f"\n--- FATAL ERROR ---\n{str(e)}\n")
+            traceback.print_exc()
+            fp.Shape = Part.makeBox(20,20,20)
 
-            fp.NoseHeightCheck = h_nose_raw
-            fp.TailHeightCheck = h_tail_raw
+    # --- BACKGROUND BUILD ---
 
-            # --- CONCAVE CALCULATION ---
-            eff_width_half = (board_width - tub_width) / 2.0
-            if concave_depth > 0.01 and eff_width_half > 0.1:
-               radius_concave = (eff_width_half**2 + concave_depth**2) / (2.0 * concave_depth)
-            else:
-                radius_concave = 100000.0
-            
-            flat_zone_len = wheelbase + (2 * truck_hole_len) + (2 * kick_gap)
-            y_kick_start_nose = flat_zone_len / 2.0
-            y_kick_start_tail = -y_kick_start_nose
-            
-            y_concave_end = concave_len / 2.0
-            
-            y_tip_nose = mold_len/2.0 + OVERRUN_MARGIN
-            y_tip_tail = -(mold_len/2.0 + OVERRUN_MARGIN)
-            
-            gen_width = core_width + 5.0
-            
-            offset_z_gap_flat = mold_gap
-            offset_z_ven_flat = -veneer_thick
-            
-            radius_gap = radius_concave + mold_gap if radius_concave < 5000 else radius_concave
-            radius_ven = radius_concave - veneer_thick if radius_concave < 5000 else radius_concave
+    def start_background(self, fp, p, fingerprint):
+        # the old shape stays on screen until the new one is swapped in by a
+        # recompute on the GUI thread; edits made meanwhile supersede this build
+        self.generation = getattr(self, "generation", 0) + 1
+        generation = self.generation
+        self.building = fingerprint
+        timings = {}
+        future = FM_background.submit(build_part, lambda: self.generation != generation, p, fp.MoldType, timings)
+        FM_background.when_done(future, lambda: self.background_done(fp, generation, fingerprint, future, timings))
+        self.set_build_state(fp, "building…")
 
-            # --- SECTIONS ---
-            sections_master = []
-            sections_gap = []
-            sections_veneer = []
-            
-            def add_slice(y_pos, z_pos, rot_angle):
-                is_outside_concave = abs(y_pos) > (y_concave_end + 0.01)
-                is_kick_rot = abs(rot_angle) > 0.1
-                force_flat = is_outside_concave or is_kick_rot
-                
-                wm = create_profile_wire(0, gen_width, radius_concave, is_flat=force_flat, angle_rot=rot_angle, flat_width=tub_width)
-                wm.translate(fc.Vector(0, y_pos, z_pos))
-                
-                wg = create_profile_wire(0, gen_width, radius_gap, is_flat=force_flat, angle_rot=rot_angle, flat_width=tub_width)
-                wg.translate(fc.Vector(0, y_pos, z_pos + offset_z_gap_flat))
-                
-                wv = create_profile_wire(0, gen_width, radius_ven, is_flat=force_flat, angle_rot=rot_angle, flat_width=tub_width)
-                wv.translate(fc.Vector(0, y_pos, z_pos + offset_z_ven_flat))
-                
-                sections_master.append(wm)
-                sections_gap.append(wg)
-                sections_veneer.append(wv)
-
-            # --- TAIL ---
-            STEPS_KICK = 5
-            dist_tail = abs(y_tip_tail - y_kick_start_tail)
-            for i in range(STEPS_KICK + 1):
-                idx = STEPS_KICK - i
-                ratio = idx / float(STEPS_KICK)
-                d_y = dist_tail * ratio 
-                y_curr = y_kick_start_tail - d_y
-                limit_y_curved = rad_tail * math.sin(math.radians(angle_tail))
-                if d_y <= limit_y_curved:
-                    arg = rad_tail**2 - d_y**2
-                    if arg < 0: arg=0
-                    z_curr = rad_tail - math.sqrt(arg)
-                    alpha = math.degrees(math.asin(clamp(d_y/rad_tail, -1, 1)))
-                    rot = -alpha 
-                else:
-                    z_limit = rad_tail - (rad_tail * math.cos(math.radians(angle_tail)))
-                    excess_y = d_y - limit_y_curved
-                    z_curr = z_limit + (excess_y * math.tan(math.radians(angle_tail)))
-                    rot = -angle_tail
-                add_slice(y_curr, z_curr, rot)
-
-            # --- SPLIT 1 ---
-            idx_split_1 = len(sections_master) - 1
-
-            # --- FLAT CENTER ---
-            if y_kick_start_tail < -y_concave_end:
-                add_slice(y_kick_start_tail + 0.1, 0, 0)
-            
-            add_slice(-y_concave_end, 0, 0)
-            add_slice(y_concave_end, 0, 0)
-            
-            if y_kick_start_nose > y_concave_end:
-                add_slice(y_kick_start_nose - 0.1, 0, 0)
-            
-            # --- SPLIT 2 ---
-            idx_split_2 = len(sections_master) - 1
-
-            # --- NOSE ---
-            dist_nose = y_tip_nose - y_kick_start_nose
-            for i in range(STEPS_KICK + 1):
-                ratio = i / float(STEPS_KICK)
-                d_y = dist_nose * ratio
-                y_curr = y_kick_start_nose + d_y
-                limit_y_curved = rad_nose * math.sin(math.radians(angle_nose))
-                if d_y <= limit_y_curved:
-                    arg = rad_nose**2 - d_y**2
-                    if arg < 0: arg = 0
-                    z_curr = rad_nose - math.sqrt(arg)
-                    alpha = math.degrees(math.asin(clamp(d_y/rad_nose, -1, 1)))
-                    rot = alpha
-                else:
-                    z_limit = rad_nose - (rad_nose * math.cos(math.radians(angle_nose)))
-                    excess_y = d_y - limit_y_curved
-                    z_curr = z_limit + (excess_y * math.tan(math.radians(angle_nose)))
-                    rot = angle_nose
-                add_slice(y_curr, z_curr, rot)
-
-            # --- BUILDER FUNCTION (HYBRID LOFT) ---
-            def create_hybrid_loft(sect_list):
-                style = "Organic"
-                if hasattr(fp, "ConcaveStyle"):
-                    style = fp.ConcaveStyle
-                    
-                if style == "Organic" or len(sect_list) < 5:
-                    return Part.makeLoft(sect_list, False, False) 
-                
-                seg_tail = sect_list[0 : idx_split_1 + 1]
-                seg_center = sect_list[idx_split_1 : idx_split_2 + 1]
-                seg_nose = sect_list[idx_split_2 : ]
-                
-                loft_tail = Part.makeLoft(seg_tail, False, False)
-                loft_center = Part.makeLoft(seg_center, False, True) 
-                loft_nose = Part.makeLoft(seg_nose, False, False)
-                
-                all_faces = loft_tail.Faces + loft_center.Faces + loft_nose.Faces
-                return Part.makeShell(all_faces)
-
-            # --- BUILD SURFACES ---
-            s_master = create_hybrid_loft(sections_master)
-            surf_gap = create_hybrid_loft(sections_gap)
-            surf_veneer = create_hybrid_loft(sections_veneer)
-
-            if s_master.isNull() or surf_gap.isNull(): 
-                raise Exception("Loft generation failed")
-
-            # --- SAFE BOUNDS ---
-            bbox = s_master.BoundBox
-            z_max_safe = bbox.ZMax + 50
-            z_min_safe = bbox.ZMin - 50
-
-            cutter_up = s_master.extrude(fc.Vector(0,0,EXTRUSION_LIMIT))
-            cutter_down = surf_gap.extrude(fc.Vector(0,0,-EXTRUSION_LIMIT))
-            cutter_down_veneer = surf_veneer.extrude(fc.Vector(0,0,-EXTRUSION_LIMIT))
-            
-            cyls = []
-            gx = (core_width / 2.0) + ((base_width - core_width) / 4.0)
-            gy = (mold_len / 2.0) - 10.0
-            guide_pos = [(gx,0),(gx,gy),(gx,-gy),(-gx,0),(-gx,gy),(-gx,-gy)]
-            for cx, cy in guide_pos:
-                cyls.append(Part.makeCylinder(guide_diam/2, EXTRUSION_LIMIT*2, fc.Vector(cx, cy, -EXTRUSION_LIMIT)))
-            
-            tx, y_fi, y_ri = truck_hole_width/2, wheelbase/2, -wheelbase/2
-            y_fo, y_ro = y_fi + truck_hole_len, y_ri - truck_hole_len
-            truck_pos = [(tx,y_fi),(-tx,y_fi),(tx,y_fo),(-tx,y_fo),(tx,y_ri),(-tx,y_ri),(tx,y_ro),(-tx,y_ro)]
-            for cx, cy in truck_pos:
-                cyls.append(Part.makeCylinder(truck_hole_diam/2, EXTRUSION_LIMIT*2, fc.Vector(cx, cy, -EXTRUSION_LIMIT)))
-            drill_comp = Part.makeCompound(cyls)
-            
-            # --- SIDE LOCKS ---
-            use_locks = False
-            if hasattr(fp, "SideLocks") and fp.SideLocks:
-                use_locks = True
-                EXT_LEN = 6.0       
-                TOLERANCE = 0.05      
-                OVERLAP = 0.1 
-
-                def make_pentagon_lock(w_base, h_tot, length, tol=0.0):
-                                        
-                    wb = w_base + (2*tol)
-                    a_eff = w_base / 2.0
-                    r_eff = h_tot 
-                    # hs = sqrt(R^2 - A^2)
-                    if r_eff > a_eff + 1.0:
-                        hs = math.sqrt(r_eff**2 - a_eff**2)
-                    else:
-                        hs = r_eff * 0.5 # Fallback
-                    
-                    p1 = fc.Vector(-wb/2, 0, 0)
-                    p2 = fc.Vector(wb/2, 0, 0)
-                    p3 = fc.Vector(wb/2, 0, hs)
-                    p4 = fc.Vector(0, 0, h_tot + tol) # Punta
-                    p5 = fc.Vector(-wb/2, 0, hs)
-                    
-                    wire = Part.makePolygon([p1, p2, p3, p4, p5, p1])
-                    face = Part.Face(wire)
-                    prism = face.extrude(fc.Vector(0, length, 0))
-                    return prism
-
-                def make_female_cap(w_base, h_cap_total, length, male_h_tot):
-                    box = Part.makeBox(w_base, length, h_cap_total, fc.Vector(-w_base/2, 0, 0))
-                    cutter = make_pentagon_lock(w_base, male_h_tot, length, TOLERANCE)
-                    return box.cut(cutter)
-
-            if fp.MoldType == "Male_Mold":
-                z_m_bot = camber - core_base_depth - base_height
-                
-                z_base_real = bbox.ZMin
-                if fp.AddFillet: 
-                    z_base_real = z_m_bot
-                
-                m_base = make_rounded_box(base_width, mold_len, base_height, M_Radius) 
-                m_base.translate(fc.Vector(0, 0, z_m_bot))
-                m_core = Part.makeBox(core_width, mold_len, (z_max_safe) - z_m_bot, fc.Vector(-core_width/2, -mold_len/2, z_m_bot))
-                
-                male_structure = m_core
-                use_fillet_radius = 10.0 if bool(fp.AddFillet) else 0.0
-                if use_fillet_radius > 0.1:
-                    fill_m = create_fillet_fillers(core_width, mold_len, z_m_bot + base_height, use_fillet_radius, True)
-                    male_structure = male_structure.fuse(fill_m)
-                
-                male = male_structure.cut(cutter_up).fuse(m_base).cut(drill_comp)
-
-                # --- APPLY SIDE LOCKS (MALE) ---
-                if use_locks:
-                    h_male_real = male.BoundBox.ZMax - male.BoundBox.ZMin
-                    R_lock = h_male_real + 5.0
-                    z_lock_base = male.BoundBox.ZMin 
-                    
-                    lock_n = make_pentagon_lock(core_width, R_lock, EXT_LEN)
-                    lock_n.translate(fc.Vector(0, mold_len/2.0 - OVERLAP, z_lock_base))
-                    
-                    lock_t = make_pentagon_lock(core_width, R_lock, EXT_LEN)
-                    lock_t.translate(fc.Vector(0, -(mold_len/2.0) - EXT_LEN + OVERLAP, z_lock_base))
-                    
-                    male = male.fuse(lock_n).fuse(lock_t)
-
-                fp.Shape = male
-                
-            elif fp.MoldType == "Female_Mold":
-                z_f_top = (core_base_depth + 2*base_height + mold_gap) - camber
-                f_base_z = z_f_top - base_height
-                f_base = make_rounded_box(base_width, mold_len, base_height, M_Radius)
-                f_base.translate(fc.Vector(0, 0, f_base_z))
-                f_core = Part.makeBox(core_width, mold_len, z_f_top - (bbox.ZMin - 5), fc.Vector(-core_width/2, -mold_len/2, bbox.ZMin - 5))
-                
-                female_structure = f_core
-                use_fillet_radius = 10.0 if bool(fp.AddFillet) else 0.0
-                if use_fillet_radius > 0.1:
-                    fill_f = create_fillet_fillers(core_width, mold_len, f_base_z, use_fillet_radius, False)
-                    female_structure = female_structure.fuse(fill_f)
-
-                female = female_structure.cut(cutter_down).fuse(f_base).cut(drill_comp)
-                
-                # --- APPLY SIDE LOCKS (FEMALE) ---
-                if use_locks:
-                    male_z_min = bbox.ZMin 
-                    male_z_max = bbox.ZMax
-                    h_male_estimated = male_z_max - male_z_min
-                    R_lock_male = h_male_estimated + 5.0
-                    
-                    z_fem_top = female.BoundBox.ZMax
-                    z_ground = bbox.ZMin
-                    h_cap_tot = z_fem_top - z_ground
-                    
-                    cap_n = make_female_cap(core_width, h_cap_tot, EXT_LEN, R_lock_male)
-                    cap_n.translate(fc.Vector(0, mold_len/2.0 - OVERLAP, z_ground))
-                    
-                    cap_t = make_female_cap(core_width, h_cap_tot, EXT_LEN, R_lock_male)
-                    cap_t.translate(fc.Vector(0, -(mold_len/2.0) - EXT_LEN + OVERLAP, z_ground))
-                    
-                    female = female.fuse(cap_n).fuse(cap_t)
-
-                fp.Shape = female
-
-            elif fp.MoldType in ["Shaper_Template", "Board_Preview"]:
-                # Logic unchanged
-                y_n = (wheelbase/2) + truck_hole_len + kick_gap + nose_len
-                y_t = -((wheelbase/2) + truck_hole_len + kick_gap + tail_len)
-                w_half = board_width / 2.0 
-                half_ntw = 0.1
-                half_ttw = 0.1
-                nose_taper = fp.NoseTaperStart.Value
-                tail_taper = fp.TailTaperStart.Value
-                raw_n_flat = fp.NoseFlatness 
-                nose_flatness = clamp(float(raw_n_flat) / 100.0, 0.0, 1.0)
-                raw_t_flat = fp.TailFlatness
-                tail_flatness = clamp(float(raw_t_flat) / 100.0, 0.0, 1.0)
-
-                nose_start_y = y_n - nose_taper
-                p0_n = fc.Vector(w_half, nose_start_y, 0)      
-                p3_n = fc.Vector(half_ntw, y_n, 0)            
-                p1_n = fc.Vector(w_half, nose_start_y + (nose_taper * nose_flatness), 0)
-                p2_n = fc.Vector(half_ntw + (w_half - half_ntw) * nose_flatness, y_n, 0)
-                bz_nose = Part.BezierCurve()
-                bz_nose.setPoles([p0_n, p1_n, p2_n, p3_n])
-                
-                tail_start_y = y_t + tail_taper
-                p0_t = fc.Vector(w_half, tail_start_y, 0)      
-                p3_t = fc.Vector(half_ttw, y_t, 0)            
-                p1_t = fc.Vector(w_half, tail_start_y - (tail_taper * tail_flatness), 0)
-                p2_t = fc.Vector(half_ttw + (w_half - half_ttw) * tail_flatness, y_t, 0)
-                bz_tail = Part.BezierCurve()
-                bz_tail.setPoles([p0_t, p1_t, p2_t, p3_t])
-                
-                l_nose_tip = Part.makeLine(p3_n, fc.Vector(0, y_n, 0))
-                l_tail_tip = Part.makeLine(fc.Vector(0, y_t, 0), p3_t)
-                l_mid = Part.makeLine(p0_t, p0_n)
-                
-                tail_curve_shp = bz_tail.toShape()
-                tail_curve_shp.reverse()
-                w_half_shp = Part.Wire([l_tail_tip, tail_curve_shp, l_mid, bz_nose.toShape(), l_nose_tip])
-                w_full_shp = Part.Wire([w_half_shp, w_half_shp.mirror(fc.Vector(0,0,0), fc.Vector(1,0,0))])
-                
-                face = Part.Face(w_full_shp)
-                  
-                if fp.MoldType == "Shaper_Template":
-                    z_board_top_surface = 5.0 
-                    z_flat_top = z_board_top_surface + shaper_height
-                    
-                    shaper_block = face.extrude(fc.Vector(0, 0, -100))
-                    shaper_block.translate(fc.Vector(0, 0, z_flat_top))
-                    
-                    shaper_final = shaper_block.cut(cutter_down_veneer).cut(drill_comp)
-                    fp.Shape = shaper_final
-
-                elif fp.MoldType == "Board_Preview":
-                    veneer_block = Part.makeBox(core_width+50, mold_len+50, 100, fc.Vector(-(core_width+50)/2, -(mold_len+50)/2, -50))
-                    pressed = veneer_block.cut(cutter_up).cut(cutter_down_veneer)
-                    
-                    cookie = face.extrude(fc.Vector(0,0,100))
-                    cookie.translate(fc.Vector(0,0,-50))
-                    
-                    cut_board = pressed.common(cookie)
-                    fp.Shape = cut_board.cut(drill_comp)               
+    def background_done(self, fp, generation, fingerprint, future, timings):
+        if generation != self.generation:
+            return # superseded: a newer build owns the object now
+        self.building = None
+        try:
+            shape, seconds = future.result()
+            error = None
+        except FM_stages.Cancelled:
+            return
+        except Exception as e:
+            shape, seconds, error = None, 0.0, e
+        self.ready = (fingerprint, shape, error, timings, seconds)
+        try:
+            fp.touch()
+            fp.Document.recompute([fp])
+        except Exception as e: # the document was closed meanwhile
+            self.ready = None
+            fc.Console.PrintLog(f"Dropped background build: {e}\n")
+
+    def finish_background(self, fp, p, fingerprint, shape, error, timings, seconds):
+        self.set_build_state(fp, "")
+        if error is not None:
+            raise error
+        fp.Shape = shape
+        self.fingerprint = fingerprint
+        FM_profile.record(fp, p, timings, seconds, shape)
+
+    def cancel_background(self, fp):
+        if getattr(self, "building", None) is None:
+            return
+        self.generation = getattr(self, "generation", 0) + 1
+        self.building = None
+        self.set_build_state(fp, "")
 
+    def set_build_state(self, fp, text):
+        if hasattr(fp, "BuildState") and fp.BuildState != text:
+            fp.BuildState = text
+        FM_background.show_status(f"{fp.Label}: {text}" if text else "")
+
+    def check_validity(self, fp, values, p):
+        # runs before any OCC work: parameter sets the lofts cannot take stop here
+        issues = FM_validity.check(values, p)
+        text = FM_validity.status(issues)
+        if hasattr(fp, "ValidityStatus") and fp.ValidityStatus != text:
+            fp.ValidityStatus = text
+            for level, prop, msg in issues:
+                if level == FM_validity.WARNING:
+                    fc.Console.PrintWarning(f"{fp.Label}: {prop}: {msg}\n")
+        errors = FM_validity.errors(issues)
+        if errors:
+            raise FM_validity.InvalidParameters("; ".join(f"{prop}: {msg}" for _, prop, msg in errors))
+
+    @classmethod
+    def skip_rate(cls):
+        """Share of executes that reused the existing Shape."""
+        return cls.skip_count / cls.execute_count if cls.execute_count else 0.0
+
+    def profile_recompute(self, fp):
+        """Rebuild ``fp`` once under cProfile (stats go to the Report view)."""
+        self.profile_next = True
+        fp.touch()
+        fp.Document.recompute([fp])
+
+    # --- FAST PREVIEW ---
+
+    def use_fast_preview(self, fp, p):
+        if not fc.GuiUp or fp.MoldType != "Board_Preview":
+            return False
+        if not getattr(fp, "FastPreview", False) or getattr(self, "force_exact", False):
+            return False
+        # an exact shape already in the stage cache is as cheap as the mesh
+        return GRAPH.key(p, part_stage(p, fp.MoldType)) not in STAGE_CACHE
+
+    def show_fast_preview(self, fp, p):
+        self.fast_mesh = FM_analytic.deck_mesh(p)
+        fp.Shape = Part.Shape()
+        self.schedule_exact(fp)
+
+    def schedule_exact(self, fp):
+        delay = FM_prefs.get_int("FastPreviewIdleMs", 1500)
+        if delay <= 0:
+            return
+        from PySide import QtCore # type: ignore
+        if getattr(self, "exact_timer", None) is None:
+            self.exact_timer = QtCore.QTimer()
+            self.exact_timer.setSingleShot(True)
+            self.exact_timer.timeout.connect(lambda: self.build_exact(self.exact_target))
+        self.exact_target = fp
+        self.exact_timer.start(delay)
+
+    def build_exact(self, fp):
+        if getattr(self, "exact_timer", None) is not None:
+            self.exact_timer.stop()
+        self.force_exact = True
+        try:
+            fp.touch()
+            fp.Document.recompute()
         except Exception as e:
-            fc.Console.PrintError(f"\n--- FATAL ERROR ---\n{str(e)}\n")
-            traceback.print_exc()
-            fp.Shape = Part.makeBox(20,20,20)
\ No newline at end of file
+            fc.Console.PrintError(f"Exact preview build failed: {e}\n")
+        finally:
+            self.force_exact = False
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Pressing gap between the Male and Female mold surfaces, NumPy only.
+
+The Male mold is cut by the master loft (``cutter_up``), the Female by the
+gap loft (``cutter_down``): the same sections with the concave radius grown
+by ``MoldGap`` and moved up by ``MoldGap``. That offset is vertical and the
+two arcs are not concentric, so on the kicks and towards the rails the real
+clearance differs from ``MoldGap``. ``analyze`` samples both surfaces on
+matching grids, measures the clearance from every Male point to the Female
+surface and compares it with ``MoldGap`` and ``VeneerThickness``. With the
+BSpline surface engine the gap surface is the master moved along its
+normals instead, and the analysis follows it.
+"""
+import math
+import time
+
+import numpy as np
+
+import FM_analytic
+
+NU = 100 # samples across the board
+NV = 200 # samples along the board
+TOLERANCE = 0.05 # mm from MoldGap before a point counts as a hotspot
+EPS = 1e-3
+MAX_SLOPE = 0.75 # sine of the steepest surface slope the search has to cover
+
+def clearance(M, G, ku, kv):
+    """Distance from every point of ``M`` to the surface sampled by ``G``.
+
+    ``G`` is sampled ``ku``/``kv`` cells further out on each side, so
+    ``G[i + ku, j + kv]`` matches ``M[i, j]``. The closest sample in that
+    window is found with whole-array shifts, then the distance is taken to
+    its tangent plane. Negative where the Female surface dips below the Male.
+    """
+    nu, nv = M.shape[:2]
+    best = np.full((nu, nv), np.inf)
+    shift = np.zeros((nu, nv, 2), dtype=np.int64)
+    for di in range(2 * ku + 1):
+        for dj in range(2 * kv + 1):
+            d2 = ((G[di:di + nu, dj:dj + nv] - M) ** 2).sum(-1)
+            closer = d2 < best
+            best[closer] = d2[closer]
+            shift[closer] = (di, dj)
+    I, J = np.meshgrid(np.arange(nu), np.arange(nv), indexing="ij")
+    I, J = I + shift[..., 0], J + shift[..., 1]
+    Q, NQ = G[I, J], FM_analytic.grid_normals(G)[I, J]
+    return ((Q - M) * NQ).sum(-1)
+
+def gap_colors(gap, nominal, tol=TOLERANCE):
+    """RGB per point: green within ``tol`` of ``nominal``, towards red where tighter, blue where looser."""
+    span = max(nominal * 0.2, tol)
+    tight = np.clip((nominal - tol - gap) / span, 0.0, 1.0)
+    loose = np.clip((gap - nominal - tol) / span, 0.0, 1.0)
+    green = np.array([0.1, 0.8, 0.2])
+    rgb = green + tight[:, None] * (np.array([1.0, 0.0, 0.0]) - green)
+    return rgb + loose[:, None] * (np.array([0.1, 0.3, 1.0]) - rgb)
+
+def analyze(p, nu=NU, nv=NV, tol=TOLERANCE):
+    """Clearance between the Male and Female surfaces over the board outline.
+
+    ``p`` is a ``mold_params`` dict. Returns the sampled Male points inside
+    the outline, their gap and colour, and min/max/mean figures with the
+    places where the gap is smallest and largest.
+    """
+    t0 = time.perf_counter()
+    _, y_t, y_n = FM_analytic.outline_half_width(p, np.zeros(1))
+    w_half = p["board_width"] / 2.0
+    du = 2.0 * w_half / (nu - 1)
+    dv = (y_n - y_t) / (nv - 1)
+    reach = p["mold_gap"] * MAX_SLOPE
+    ku = int(math.ceil(reach / du)) + 1
+    kv = int(math.ceil(reach / dv)) + 1
+
+    x = np.linspace(-w_half - ku * du, w_half + ku * du, nu + 2 * ku)
+    y = np.linspace(y_t - kv * dv, y_n + kv * dv, nv + 2 * kv)
+    G = FM_analytic.surface_grid(p, x, y, "gap")
+    M = FM_analytic.surface_grid(p, x[ku:ku + nu], y[kv:kv + nv], "master")
+    gap = clearance(M, G, ku, kv)
+
+    half, _, _ = FM_analytic.outline_half_width(p, y[kv:kv + nv])
+    inside = np.abs(M[..., 0]) <= half[None, :]
+    points = M[inside]
+    gap = gap[inside]
+    nominal = p["mold_gap"]
+    if not len(gap):
+        raise ValueError("the board outline has no sample points")
+    i_min, i_max = int(np.argmin(gap)), int(np.argmax(gap))
+    return {
+        "points": points, "gap": gap, "colors": gap_colors(gap, nominal, tol),
+        "nominal": nominal, "veneer": p["veneer_thick"], "tolerance": tol,
+        "min": float(gap[i_min]), "max": float(gap[i_max]), "mean": float(gap.mean()),
+        "std": float(gap.std()),
+        "min_at": tuple(round(float(c), 2) for c in points[i_min, :2]),
+        "max_at": tuple(round(float(c), 2) for c in points[i_max, :2]),
+        "hotspots": int((np.abs(gap - nominal) > tol).sum()),
+        "below_veneer": int((gap < p["veneer_thick"] - EPS).sum()),
+        "samples": len(gap), "grid": (nu, nv),
+        "seconds": time.perf_counter() - t0,
+    }
+
+def summary(r):
+    return (f"gap min {r['min']:.3f} mm at {r['min_at']}, max {r['max']:.3f} mm at {r['max_at']}, "
+            f"mean {r['mean']:.3f} mm (MoldGap {r['nominal']:g} mm, std {r['std']:.3f}); "
+            f"{r['hotspots']}/{r['samples']} points off by more than {r['tolerance']:g} mm, "
+            f"{r['below_veneer']} tighter than the {r['veneer']:g} mm veneer "
+            f"[{r['grid'][0]}x{r['grid'][1]} grid, {r['seconds'] * 1000:.0f} ms]")
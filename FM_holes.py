@@ -0,0 +1,172 @@
+import functools
+import json
+
+# Hole patterns. A pattern is a list of hole groups, read by name from
+# fb_holes.json (next to fb_presets.json). Each group expands to
+# (x, y, diameter) holes from the mold parameters:
+#
+#   {"type": "guide", "inset": 10, "rows": 3}      guide pins on the base shelf
+#   {"type": "truck", "dist_l": 7.5, "dist_w": 5.5} four holes per truck
+#   {"type": "pins", "points": [[x, y]], "diameter": 3, "mirror": "xy"}
+#
+# Sizes left out (or null) come from the mold properties. A group may add
+# "countersink": {"diameter": D, "depth": t} (cut into the outer face of the
+# molds and the Shaper), "parts": [...] to drill only some parts and
+# "clearance": {"Female_Mold": 0.1} to grow or shrink its holes per part
+# for press fits; a pattern-level "clearance" applies to every group.
+#
+# All holes of a part are drawn as circles, turned into faces and extruded
+# in one call; the drilled result is cached by the stage graph under the
+# pattern's definition, so editing the file rebuilds only what it changes.
+
+DEFAULT = "Standard"
+STANDARD = {"groups": [{"type": "guide", "inset": 10.0, "rows": 3}, {"type": "truck"}]}
+GROUP_TYPES = ("guide", "truck", "pins")
+MIRRORS = ("", "x", "y", "xy")
+CS_EPS = 0.1 # countersinks start this far outside the face
+
+def canonical(definition):
+    return json.dumps(definition, sort_keys=True, separators=(",", ":"))
+
+STANDARD_KEY = canonical(STANDARD)
+
+def names():
+    items = [DEFAULT]
+    try:
+        # FM_presets needs FreeCAD; without it only the built-in pattern is known
+        import FM_presets
+        items.extend(n for n in FM_presets.HOLES.names() if n != DEFAULT)
+    except Exception:
+        pass
+    return items
+
+def validate(name, definition):
+    if not isinstance(definition, dict) or not isinstance(definition.get("groups"), list):
+        raise ValueError(f"Hole pattern '{name}' needs a \"groups\" list")
+    for group in definition["groups"]:
+        kind = group.get("type") if isinstance(group, dict) else None
+        if kind not in GROUP_TYPES:
+            raise ValueError(f"Hole pattern '{name}': unknown group type {kind!r} (use {', '.join(GROUP_TYPES)})")
+        if kind == "pins" and (not group.get("points") or not group.get("diameter")):
+            raise ValueError(f"Hole pattern '{name}': pins need \"points\" and a \"diameter\"")
+        if group.get("mirror", "") not in MIRRORS:
+            raise ValueError(f"Hole pattern '{name}': mirror must be one of {', '.join(MIRRORS[1:])}")
+    return definition
+
+def definition(name):
+    """The pattern ``name`` from fb_holes.json; the built-in Standard if the file does not have it."""
+    import FM_presets
+    try:
+        data = FM_presets.HOLES.get(name)
+    except ValueError as e:
+        raise ValueError(f"fb_holes.json is not valid JSON: {e}")
+    if data is None:
+        if name != DEFAULT:
+            raise ValueError(f"Hole pattern '{name}' not found in fb_holes.json")
+        return STANDARD
+    return validate(name, data)
+
+def pattern_key(name):
+    """Canonical text of pattern ``name``, as stored in ``p["hole_pattern"]``."""
+    return canonical(definition(name or DEFAULT))
+
+@functools.lru_cache(maxsize=32)
+def _parse(key):
+    return json.loads(key)
+
+def pattern(p):
+    return _parse(p.get("hole_pattern", STANDARD_KEY))
+
+# --- GROUPS ---
+
+def _value(group, key, default):
+    value = group.get(key)
+    return default if value is None else float(value)
+
+def guide_holes(p, group):
+    core_width = p["core_width"]
+    gx = (core_width / 2.0) + ((p["base_width"] - core_width) / 4.0)
+    gy = (p["mold_len"] / 2.0) - _value(group, "inset", 10.0)
+    rows = max(1, int(group.get("rows", 3)))
+    ys = [0.0] if rows == 1 else [gy - 2.0 * gy * i / (rows - 1) for i in range(rows)]
+    d = _value(group, "diameter", p["guide_diam"])
+    return [(sx * gx, y, d) for sx in (1, -1) for y in ys]
+
+def truck_holes(p, group):
+    tx = _value(group, "dist_w", p["truck_hole_width"]) / 2.0
+    y_i = p["wheelbase"] / 2.0
+    y_o = y_i + _value(group, "dist_l", p["truck_hole_len"])
+    d = _value(group, "diameter", p["truck_hole_diam"])
+    return [(sx * tx, sy * y, d) for sy in (1, -1) for y in (y_i, y_o) for sx in (1, -1)]
+
+def pin_holes(p, group):
+    mirror = group.get("mirror", "")
+    holes = []
+    for x, y in group["points"]:
+        pts = [(x, y)]
+        if "x" in mirror:
+            pts += [(-px, py) for px, py in pts]
+        if "y" in mirror:
+            pts += [(px, -py) for px, py in pts]
+        holes.extend((float(px), float(py), float(group["diameter"])) for px, py in dict.fromkeys(pts))
+    return holes
+
+GROUPS = {"guide": guide_holes, "truck": truck_holes, "pins": pin_holes}
+
+def _clearance(spec, group, part):
+    if part is None:
+        return 0.0
+    for source in (group, spec):
+        value = (source.get("clearance") or {}).get(part)
+        if value is not None:
+            return float(value)
+    return 0.0
+
+def expand(p, part=None):
+    """``[(group, x, y, diameter), ...]`` drilled into ``part`` (every hole, unsized, if None)."""
+    spec = pattern(p)
+    out = []
+    for group in spec["groups"]:
+        if part is not None and group.get("parts") and part not in group["parts"]:
+            continue
+        extra = _clearance(spec, group, part)
+        for x, y, d in GROUPS[group["type"]](p, group):
+            if d + extra > 0:
+                out.append((group, x, y, d + extra))
+    return out
+
+def holes(p, part=None):
+    """``[(x, y, diameter), ...]`` of the holes drilled into ``part``."""
+    return [(x, y, d) for _, x, y, d in expand(p, part)]
+
+# --- SOLIDS ---
+
+def countersink(x, y, d, spec, z, direction):
+    import FreeCAD as fc # type: ignore
+    import Part # type: ignore
+    big, small, depth = float(spec["diameter"]) / 2.0, d / 2.0, float(spec["depth"])
+    if big <= small or depth <= 0:
+        return None
+    slope = (big - small) / depth
+    return Part.makeCone(big + slope * CS_EPS, small, depth + CS_EPS,
+                         fc.Vector(x, y, z - direction * CS_EPS), fc.Vector(0, 0, direction))
+
+def cutter(p, part, z0, height, face=None):
+    """All holes of ``part`` as one tool: their circles extruded from ``z0`` in a single call.
+
+    ``face`` is ``(z, direction into the part)`` of the face countersinks
+    are cut into, or None. Returns None when the part has no holes.
+    """
+    import FreeCAD as fc # type: ignore
+    import Part # type: ignore
+    discs, sinks = [], []
+    for group, x, y, d in expand(p, part):
+        discs.append(Part.Face(Part.Wire(Part.makeCircle(d / 2.0, fc.Vector(x, y, z0)))))
+        if group.get("countersink") and face is not None:
+            sinks.append(countersink(x, y, d, group["countersink"], *face))
+    if not discs:
+        return None
+    # a face has one outer boundary, so the "one face" is a compound of discs
+    prism = Part.makeCompound(discs).extrude(fc.Vector(0, 0, height))
+    sinks = [s for s in sinks if s is not None]
+    return Part.makeCompound([prism] + sinks) if sinks else prism
@@ -0,0 +1,529 @@
+"""Watertight Male, Female and Shaper meshes straight from the analytic surfaces.
+
+Every part is a solid between a lower and an upper height function over a
+footprint (mold base or deck outline), drilled by vertical holes. The
+footprint is sampled on a tensor grid in which repeated X values become the
+vertical core walls, the rounded base corners are mapped onto their arcs, and
+each hole replaces a rectangular block of cells with a ring that ends on the
+exact circle. No BRep loft, extrusion or boolean is involved.
+
+Holes come from the part's hole pattern (``FM_holes.expand``). Parts this
+mesher cannot represent exactly (SideLocks, a fillet wider than the base
+shelf, holes that do not fit the shelf or cross a core wall or the
+outline, countersinks) raise ``NotImplementedError`` so callers can fall
+back to the BRep path.
+"""
+import math
+
+import numpy as np
+
+import FM_analytic
+import FM_holes
+import FM_meshio
+
+FILLET_RADIUS = 10.0
+FILLET_BAND = 1.5
+GRID_SPACING = 0.5
+HOLE_SEGMENTS = 8
+HOLE_LAYERS = 3
+SIDE_EPS = 1e-7
+
+# Agreement with the BRep/Mesh.export path checked by compare_with_brep()
+MATCH_VOLUME_REL = 0.01
+MATCH_HAUSDORFF = 0.3
+
+# --- GRID ---
+
+def _axis(breaks, spacing, walls=()):
+    """Node coordinates through every breakpoint, at most ``spacing(a, b)`` apart.
+
+    Every value in ``walls`` is emitted twice with side -1/+1 so the height
+    functions can jump there (a vertical wall between two grid columns).
+    """
+    breaks = sorted(set(round(b, 9) for b in breaks))
+    nodes = [breaks[0]]
+    for a, b in zip(breaks[:-1], breaks[1:]):
+        n = max(1, int(math.ceil((b - a) / spacing(a, b) - 1e-9)))
+        nodes.extend(a + (b - a) * k / n for k in range(1, n + 1))
+    values, sides = [], []
+    walls = [round(w, 9) for w in walls]
+    for v in nodes:
+        if any(abs(v - w) < 1e-9 for w in walls):
+            values.extend([v, v])
+            sides.extend([-1, 1])
+        else:
+            values.append(v)
+            sides.append(0)
+    return np.array(values), np.array(sides)
+
+def _index_of(axis, value):
+    hits = np.nonzero(np.abs(axis - value) < 1e-7)[0]
+    if len(hits) != 1:
+        raise ValueError(f"Grid has no unique node at {value}")
+    return int(hits[0])
+
+def _grid_triangles(mask, nv, offset=0, flip=False):
+    i, j = np.nonzero(mask)
+    a = offset + i * nv + j
+    b = a + nv
+    c = b + 1
+    d = a + 1
+    if flip:
+        tris = np.concatenate([np.stack([a, c, b], -1), np.stack([a, d, c], -1)])
+    else:
+        tris = np.concatenate([np.stack([a, b, c], -1), np.stack([a, c, d], -1)])
+    return tris.reshape(-1, 3)
+
+def _strip(top, bottom):
+    a, b = top[:-1], top[1:]
+    c, d = bottom[1:], bottom[:-1]
+    return np.concatenate([np.stack([a, b, c], -1), np.stack([a, c, d], -1)])
+
+def _weld(points, tris):
+    # merge coincident vertices (equal-height wall copies, zero-height slivers)
+    keys = np.round(points, 9)
+    uniq, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    tris = inverse[tris]
+    keep = (tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 0] != tris[:, 2])
+    tris = tris[keep]
+    # drop grid nodes left inside hole patches
+    used, tris = np.unique(tris, return_inverse=True)
+    return uniq[used], tris.reshape(-1, 3)
+
+def solid_mesh(us, u_sides, vs, to_xy, z_lower, z_upper, holes=()):
+    """Closed mesh of the solid ``z_lower <= z <= z_upper`` over a mapped grid.
+
+    ``to_xy(U, V)`` maps grid coordinates to the plane, ``z_lower``/``z_upper``
+    take ``(X, Y, S)`` where ``S`` is the wall side of each node. ``holes`` are
+    ``(cx, cy, r, (i0, i1, j0, j1))`` with the patch given as grid node indices.
+    """
+    nu, nv = len(us), len(vs)
+    U, V = np.meshgrid(us, vs, indexing="ij")
+    S = np.broadcast_to(u_sides[:, None], U.shape)
+    X, Y = to_xy(U, V)
+    z_top = z_upper(X, Y, S)
+    z_bot = z_lower(X, Y, S)
+    if np.any(z_top - z_bot < 1e-6):
+        raise NotImplementedError("Part thickness reaches zero inside the footprint")
+
+    n = nu * nv
+    points = [np.stack([X, Y, z_top], -1).reshape(-1, 3), np.stack([X, Y, z_bot], -1).reshape(-1, 3)]
+    count = 2 * n
+
+    cells = np.ones((nu - 1, nv - 1), dtype=bool)
+    for _, _, _, (i0, i1, j0, j1) in holes:
+        cells[i0:i1, j0:j1] = False
+    tris = [_grid_triangles(cells, nv), _grid_triangles(cells, nv, offset=n, flip=True)]
+
+    idx = np.arange(n).reshape(nu, nv)
+    ring = np.concatenate([idx[0, :], idx[1:, -1], idx[-1, -2::-1], idx[-2:0:-1, 0], idx[:1, 0]])
+    tris.append(_strip(ring, ring + n))
+
+    for cx, cy, r, (i0, i1, j0, j1) in holes:
+        loop = np.concatenate([idx[i0:i1, j0], idx[i1, j0:j1], idx[i1:i0:-1, j1], idx[i0, j1:j0:-1]])
+        loop = np.append(loop, loop[0])
+        bx, by = X.reshape(-1)[loop], Y.reshape(-1)[loop]
+        ang = np.arctan2(by - cy, bx - cx)
+        ix, iy = cx + r * np.cos(ang), cy + r * np.sin(ang)
+        outer_top, outer_bot = loop, loop + n
+        for layer in range(1, HOLE_LAYERS + 1):
+            t = layer / float(HOLE_LAYERS)
+            lx = bx + (ix - bx) * t
+            ly = by + (iy - by) * t
+            zero = np.zeros_like(lx)
+            m = len(lx) - 1
+            lt = np.arange(count, count + m)
+            lb = lt + m
+            points.append(np.stack([lx[:-1], ly[:-1], z_upper(lx[:-1], ly[:-1], zero[:-1])], -1))
+            points.append(np.stack([lx[:-1], ly[:-1], z_lower(lx[:-1], ly[:-1], zero[:-1])], -1))
+            count += 2 * m
+            inner_top, inner_bot = np.append(lt, lt[0]), np.append(lb, lb[0])
+            # annulus between CCW loops: normal up on the top, down on the bottom
+            a, b, c, d = outer_top[:-1], outer_top[1:], inner_top[1:], inner_top[:-1]
+            tris.append(np.stack([a, b, c], -1))
+            tris.append(np.stack([a, c, d], -1))
+            a, b, c, d = outer_bot[:-1], outer_bot[1:], inner_bot[1:], inner_bot[:-1]
+            tris.append(np.stack([a, c, b], -1))
+            tris.append(np.stack([a, d, c], -1))
+            outer_top, outer_bot = inner_top, inner_bot
+        tris.append(_strip(outer_top, outer_bot))
+
+    return _weld(np.concatenate(points), np.concatenate(tris).astype(np.int64))
+
+# --- PART LAYOUT ---
+
+def _holes(p, part):
+    """``(x, y, r)`` of every hole ``FM_holes`` drills into ``part``."""
+    holes = []
+    for group, x, y, d in FM_holes.expand(p, part):
+        if group.get("countersink"):
+            raise NotImplementedError("Countersunk holes are only built by the BRep path")
+        holes.append((x, y, d / 2.0))
+    return holes
+
+def _neighbour_room(holes, i):
+    # square patches cannot overlap while each spans less than half the
+    # Chebyshev distance to the nearest other hole
+    x, y, _ = holes[i]
+    near = min((max(abs(x - ox), abs(y - oy)) for j, (ox, oy, _) in enumerate(holes) if j != i),
+               default=math.inf)
+    return 0.45 * near
+
+def _patch_half(holes, i, room=math.inf):
+    r = holes[i][2]
+    h = min(_neighbour_room(holes, i), 3.0 * r + 1.0, room)
+    if h <= r + 0.05:
+        raise NotImplementedError("Holes are too close for the analytic mesher")
+    return h
+
+def _y_breaks(p, y_min, y_max):
+    ks = FM_analytic.kick_start(p)
+    ce = p["concave_len"] / 2.0
+    breaks = [y_min, y_max, 0.0, ce, -ce, ks - 0.1, -(ks - 0.1), ks, -ks,
+              ks + p["rad_nose"] * math.sin(math.radians(p["angle_nose"])),
+              -ks - p["rad_tail"] * math.sin(math.radians(p["angle_tail"]))]
+    return [b for b in breaks if y_min <= b <= y_max]
+
+def _spacing_in(patches, fine, coarse, fine_beyond):
+    # patch intervals use their own step, |t| > fine_beyond (the kicks) the fine one
+    def spacing(a, b):
+        step = fine if max(abs(a), abs(b)) > fine_beyond else coarse
+        for lo, hi, local in patches:
+            if a >= lo - 1e-9 and b <= hi + 1e-9:
+                step = min(step, local)
+        return step
+    return spacing
+
+def _mold_grid(p, spacing, part):
+    core_half = p["core_width"] / 2.0
+    gen_half = core_half + 2.5
+    base_half = p["base_width"] / 2.0
+    half_len = p["mold_len"] / 2.0
+    shelf = base_half - core_half
+    fillet = FILLET_RADIUS if p["add_fillet"] else 0.0
+    radius = p["M_Radius"] if shelf > 1e-6 else 0.0
+
+    if p["side_locks"]:
+        raise NotImplementedError("SideLocks are only built by the BRep path")
+    if p["base_height"] < 0.01:
+        raise NotImplementedError("A zero-height base is only built by the BRep path")
+    if shelf > 1e-6 and (shelf < radius or core_half + fillet > base_half - radius):
+        raise NotImplementedError("Fillet or corner radius wider than the base shelf")
+
+    x_out = base_half if shelf > 1e-6 else core_half
+    found = []
+    for x, y, r in _holes(p, part):
+        if abs(x) - r >= x_out or abs(y) - r >= half_len:
+            continue # misses this part
+        if shelf <= 1e-6 and abs(x) - r < core_half < abs(x) + r and r <= 0.1:
+            continue # pin-size hole on the bare core wall
+        found.append((x, y, r))
+    on_shelf = [i for i, (x, _, r) in enumerate(found) if shelf > 1e-6 and abs(x) - r >= core_half]
+    in_core = [i for i, (x, _, r) in enumerate(found) if abs(x) + r <= core_half]
+    if len(on_shelf) + len(in_core) < len(found):
+        raise NotImplementedError("Holes across the core wall are only built by the BRep path")
+
+    holes = []
+    band = 0.0
+    if fillet > 0 and on_shelf:
+        # the fillet leaves the core wall vertically and creases against the
+        # pressing surface within FILLET_BAND of it: finer columns there
+        clear = min(abs(found[i][0]) - found[i][2] - core_half for i in on_shelf)
+        band = max(0.0, min(FILLET_BAND, clear - 0.3))
+    inner = core_half + band + 0.05
+    for i in on_shelf:
+        gx, gy, r = found[i]
+        half = min(abs(gx) - core_half, base_half - abs(gx))
+        hx = min(half - min(0.5, 0.25 * (half - r)), _neighbour_room(found, i))
+        hy = min(hx, half_len - radius - abs(gy) - 0.01)
+        if min(hx, hy) <= r + 0.05:
+            raise NotImplementedError("Guide holes do not fit in the base shelf")
+        x0, x1 = gx - hx, gx + hx
+        if gx > 0:
+            x0 = max(x0, inner)
+        else:
+            x1 = min(x1, -inner)
+        holes.append((gx, gy, r, x0, x1, gy - hy, gy + hy))
+    for i in in_core:
+        tx, ty, r = found[i]
+        h = _patch_half(found, i, min(core_half - abs(tx), half_len - abs(ty)) - 0.05)
+        holes.append((tx, ty, r, tx - h, tx + h, ty - h, ty + h))
+
+    x_patches, y_patches = [], []
+    for cx, cy, r, x0, x1, y0, y1 in holes:
+        x_patches.append((x0, x1, min(spacing, (x1 - x0) / HOLE_SEGMENTS)))
+        y_patches.append((y0, y1, min(spacing, (y1 - y0) / HOLE_SEGMENTS)))
+    if band > 0:
+        x_patches += [(-(core_half + band), -core_half, spacing / 8.0), (core_half, core_half + band, spacing / 8.0)]
+
+    x_breaks = [-x_out, x_out, 0.0]
+    walls = [-core_half, core_half]
+    x_breaks += walls
+    if gen_half < x_out:
+        x_breaks += [-gen_half, gen_half]
+        walls += [-gen_half, gen_half]
+    if fillet > 0 and shelf > 1e-6:
+        x_breaks += [-(core_half + fillet), core_half + fillet]
+    if radius > 0:
+        x_breaks += [-(x_out - radius), x_out - radius]
+    for lo, hi, _ in x_patches:
+        x_breaks += [lo, hi]
+
+    y_breaks = _y_breaks(p, -half_len, half_len)
+    if radius > 0:
+        y_breaks += [-(half_len - radius), half_len - radius]
+    for lo, hi, _ in y_patches:
+        y_breaks += [lo, hi]
+
+    us, sides = _axis(x_breaks, _spacing_in(x_patches, spacing, spacing, 0.0), walls)
+    vs, _ = _axis(y_breaks, _spacing_in(y_patches, spacing, 2 * spacing, FM_analytic.kick_start(p)))
+
+    def to_xy(U, V):
+        if radius <= 0:
+            return U, V
+        dx = np.abs(U) - (x_out - radius)
+        dy = np.abs(V) - (half_len - radius)
+        corner = (dx > 0) & (dy > 0)
+        dist = np.hypot(dx, dy)
+        scale = np.where(corner, np.maximum(dx, dy) / np.where(corner, dist, 1.0), 1.0)
+        # squares past (x_out - R, half_len - R) onto quarter disks
+        X = np.where(dx > 0, np.sign(U) * ((x_out - radius) + dx * scale), U)
+        Y = np.where(dy > 0, np.sign(V) * ((half_len - radius) + dy * scale), V)
+        return X, Y
+
+    patches = [(cx, cy, r, (_index_of(us, x0), _index_of(us, x1), _index_of(vs, y0), _index_of(vs, y1)))
+               for cx, cy, r, x0, x1, y0, y1 in holes]
+    return us, sides, vs, to_xy, patches
+
+def _fillet_up(x, x_start, z_start, r):
+    return z_start + r - np.sqrt(np.maximum(r**2 - (x - x_start - r)**2, 0.0))
+
+def _fillet_down(x, x_start, z_start, r):
+    return (z_start - r) + np.sqrt(np.maximum(r**2 - (x - x_start - r)**2, 0.0))
+
+def male_mesh(p, spacing=GRID_SPACING):
+    us, sides, vs, to_xy, holes = _mold_grid(p, spacing, "Male_Mold")
+    core_half = p["core_width"] / 2.0
+    gen_half = core_half + 2.5
+    z_bot = p["camber"] - p["core_base_depth"] - p["base_height"]
+    z_base_top = z_bot + p["base_height"]
+    fillet = FILLET_RADIUS if p["add_fillet"] else 0.0
+
+    def upper(X, Y, S):
+        ax = np.abs(X + S * SIDE_EPS)
+        struct_top = np.where(ax <= core_half, np.inf, -np.inf)
+        if fillet > 0:
+            band = (ax > core_half) & (ax <= core_half + fillet)
+            struct_top = np.where(band, _fillet_up(ax, core_half, z_base_top, fillet), struct_top)
+        cut = np.where(ax <= gen_half, FM_analytic.surface_z(p, X, Y, "master"), np.inf)
+        return np.maximum(z_base_top, np.minimum(struct_top, cut))
+
+    def lower(X, Y, S):
+        return np.full(np.shape(X), z_bot)
+
+    return solid_mesh(us, sides, vs, to_xy, lower, upper, holes)
+
+def female_mesh(p, spacing=GRID_SPACING):
+    us, sides, vs, to_xy, holes = _mold_grid(p, spacing, "Female_Mold")
+    core_half = p["core_width"] / 2.0
+    gen_half = core_half + 2.5
+    z_f_top = (p["core_base_depth"] + 2 * p["base_height"] + p["mold_gap"]) - p["camber"]
+    f_base_z = z_f_top - p["base_height"]
+    fillet = FILLET_RADIUS if p["add_fillet"] else 0.0
+
+    def lower(X, Y, S):
+        ax = np.abs(X + S * SIDE_EPS)
+        struct_low = np.where(ax <= core_half, -np.inf, np.inf)
+        if fillet > 0:
+            band = (ax > core_half) & (ax <= core_half + fillet)
+            struct_low = np.where(band, _fillet_down(ax, core_half, f_base_z, fillet), struct_low)
+        cut = np.where(ax <= gen_half, FM_analytic.surface_z(p, X, Y, "gap"), -np.inf)
+        return np.minimum(f_base_z, np.maximum(struct_low, cut))
+
+    def upper(X, Y, S):
+        return np.full(np.shape(X), z_f_top)
+
+    return solid_mesh(us, sides, vs, to_xy, lower, upper, holes)
+
+def shaper_mesh(p, spacing=GRID_SPACING):
+    _, y_t, y_n = FM_analytic.outline_half_width(p, np.zeros(1))
+    w_half = p["board_width"] / 2.0
+    z_flat_top = 5.0 + p["shaper_height"]
+    found = []
+    for cx, cy, r in _holes(p, "Shaper_Template"):
+        half, _, _ = FM_analytic.outline_half_width(p, np.array([cy]))
+        if not (y_t < cy - r and cy + r < y_n) or abs(cx) - r >= float(half[0]):
+            if y_t - r < cy < y_n + r and abs(cx) - r < float(half[0]):
+                raise NotImplementedError("Holes across the outline are only built by the BRep path")
+            continue # misses the template
+        found.append((cx, cy, r))
+
+    holes = []
+    u_patches, v_patches = [], []
+    for i, (cx, cy, r) in enumerate(found):
+        h = _patch_half(found, i)
+        half, _, _ = FM_analytic.outline_half_width(p, np.array([cy - h, cy, cy + h]))
+        if abs(cx) + h >= 0.9 * float(half.min()):
+            raise NotImplementedError("Holes too close to the outline")
+        hu = h / float(half[1])
+        holes.append((cx, cy, r, cx / float(half[1]), hu, h))
+        u_patches.append((cx / float(half[1]) - hu, cx / float(half[1]) + hu, 2 * hu / HOLE_SEGMENTS))
+        v_patches.append((cy - h, cy + h, 2 * h / HOLE_SEGMENTS))
+
+    u_breaks = [-1.0, 0.0, 1.0] + [b for lo, hi, _ in u_patches for b in (lo, hi)]
+    us, sides = _axis(u_breaks, _spacing_in(u_patches, spacing / w_half, spacing / w_half, 0.0))
+    v_breaks = _y_breaks(p, y_t, y_n) + [b for lo, hi, _ in v_patches for b in (lo, hi)]
+    vs, _ = _axis(v_breaks, _spacing_in(v_patches, spacing, 2 * spacing, FM_analytic.kick_start(p)))
+
+    def to_xy(U, V):
+        half, _, _ = FM_analytic.outline_half_width(p, V)
+        return U * np.maximum(half, 0.05), V
+
+    def lower(X, Y, S):
+        return np.maximum(z_flat_top - 100.0, FM_analytic.surface_z(p, X, Y, "veneer"))
+
+    def upper(X, Y, S):
+        return np.full(np.shape(X), z_flat_top)
+
+    patches = [(cx, cy, r, (_index_of(us, cu - hu), _index_of(us, cu + hu),
+                            _index_of(vs, cy - hv), _index_of(vs, cy + hv)))
+               for cx, cy, r, cu, hu, hv in holes]
+    return solid_mesh(us, sides, vs, to_xy, lower, upper, patches)
+
+PART_MESHERS = {
+    "Male_Mold": male_mesh,
+    "Female_Mold": female_mesh,
+    "Shaper_Template": shaper_mesh,
+}
+
+def part_mesh(p, mold_type, spacing=GRID_SPACING):
+    if mold_type not in PART_MESHERS:
+        raise NotImplementedError(f"No analytic mesher for {mold_type}")
+    if p.get("surface_engine") == "BSpline":
+        raise NotImplementedError("Normal-offset B-spline surfaces are only built by the BRep path")
+    return PART_MESHERS[mold_type](p, spacing)
+
+# --- OUTPUT ---
+
+def mesh_volume(points, tris):
+    v0, v1, v2 = points[tris[:, 0]], points[tris[:, 1]], points[tris[:, 2]]
+    return float(np.einsum("ij,ij->i", v0, np.cross(v1, v2)).sum() / 6.0)
+
+def is_watertight(tris):
+    edges = np.concatenate([tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]])
+    fwd = np.unique(edges, axis=0, return_counts=True)
+    if np.any(fwd[1] != 1):
+        return False
+    rev = np.unique(edges[:, ::-1], axis=0)
+    return len(rev) == len(fwd[0]) and bool(np.all(rev == fwd[0]))
+
+def transform_points(points, placement):
+    if placement is None:
+        return points
+    m = np.array(placement.toMatrix().A, dtype=float).reshape(4, 4)
+    return points @ m[:3, :3].T + m[:3, 3]
+
+write_stl = FM_meshio.write_stl
+
+# --- VERIFICATION ---
+
+def _dot(u, v):
+    return np.einsum("ij,ij->i", u, v)
+
+def _closest_on_triangles(q, a, b, c):
+    # Voronoi-region test for the closest point on each triangle (Ericson, RTCD 5.1.5).
+    # Regions are written from lowest to highest precedence so later masks win.
+    ab, ac = b - a, c - a
+    d1, d2 = _dot(ab, q - a), _dot(ac, q - a)
+    d3, d4 = _dot(ab, q - b), _dot(ac, q - b)
+    d5, d6 = _dot(ab, q - c), _dot(ac, q - c)
+    va, vb, vc = d3 * d6 - d5 * d4, d5 * d2 - d1 * d6, d1 * d4 - d3 * d2
+
+    def safe(x):
+        return np.where(np.abs(x) > 1e-300, x, 1.0)
+
+    denom = safe(va + vb + vc)
+    res = a + ab * (vb / denom)[:, None] + ac * (vc / denom)[:, None]
+    m = (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0)
+    t = (d4 - d3) / safe((d4 - d3) + (d5 - d6))
+    res[m] = (b + (c - b) * t[:, None])[m]
+    m = (vb <= 0) & (d2 >= 0) & (d6 <= 0)
+    t = d2 / safe(d2 - d6)
+    res[m] = (a + ac * t[:, None])[m]
+    m = (d6 >= 0) & (d5 <= d6)
+    res[m] = c[m]
+    m = (vc <= 0) & (d1 >= 0) & (d3 <= 0)
+    t = d1 / safe(d1 - d3)
+    res[m] = (a + ab * t[:, None])[m]
+    m = (d3 >= 0) & (d4 <= d3)
+    res[m] = b[m]
+    m = (d1 <= 0) & (d2 <= 0)
+    res[m] = a[m]
+    return res
+
+def _voxel_keys(cells):
+    cells = cells.astype(np.int64) + (1 << 19)
+    return (cells[:, 0] << 40) | (cells[:, 1] << 20) | cells[:, 2]
+
+def point_mesh_distance(query, points, tris, reach=0.5, chunk=4000):
+    """Distance from every query point to the triangle mesh, capped at ``reach``.
+
+    Triangles are hashed into voxels of size ``reach``; each query only tests
+    the triangles registered in its own and the 26 neighbouring voxels.
+    """
+    a, b, c = points[tris[:, 0]], points[tris[:, 1]], points[tris[:, 2]]
+    lo = np.floor(np.minimum(np.minimum(a, b), c) / reach).astype(np.int64)
+    ext = np.floor(np.maximum(np.maximum(a, b), c) / reach).astype(np.int64) - lo + 1
+    counts = ext.prod(axis=1)
+    tri_ids = np.repeat(np.arange(len(tris)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    e = ext[tri_ids]
+    offset = np.stack([local // (e[:, 1] * e[:, 2]), (local // e[:, 2]) % e[:, 1], local % e[:, 2]], -1)
+    keys = _voxel_keys(lo[tri_ids] + offset)
+    order = np.argsort(keys, kind="stable")
+    keys, tri_ids = keys[order], tri_ids[order]
+
+    steps = np.array([(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)])
+    dist = np.full(len(query), reach)
+    for s0 in range(0, len(query), chunk):
+        q = query[s0:s0 + chunk]
+        cells = np.floor(q / reach).astype(np.int64)
+        near = _voxel_keys((cells[:, None, :] + steps[None, :, :]).reshape(-1, 3))
+        first = np.searchsorted(keys, near, "left")
+        n_hit = np.searchsorted(keys, near, "right") - first
+        q_ids = np.repeat(np.repeat(np.arange(len(q)), len(steps)), n_hit)
+        pos = np.arange(n_hit.sum()) - np.repeat(np.cumsum(n_hit) - n_hit, n_hit) + np.repeat(first, n_hit)
+        t_ids = tri_ids[pos]
+        closest = _closest_on_triangles(q[q_ids], a[t_ids], b[t_ids], c[t_ids])
+        d = np.linalg.norm(q[q_ids] - closest, axis=1)
+        block = dist[s0:s0 + chunk]
+        np.minimum.at(block, q_ids, d)
+    return dist
+
+def hausdorff(points_a, tris_a, points_b, tris_b, reach=0.5):
+    """Symmetric Hausdorff distance, measured from the vertices and triangle centroids
+    of each mesh to the surface of the other. Values above ``reach`` read as ``reach``."""
+    def samples(points, tris):
+        return np.concatenate([points, points[tris].mean(axis=1)])
+    return max(float(point_mesh_distance(samples(points_a, tris_a), points_b, tris_b, reach).max()),
+               float(point_mesh_distance(samples(points_b, tris_b), points_a, tris_a, reach).max()))
+
+def compare_with_brep(p, mold_type, tolerance=0.01, spacing=GRID_SPACING):
+    """Compare the analytic mesh with the BRep part tessellated like Mesh.export."""
+    import FM_features
+    shape = FM_features.build_part(p, mold_type)
+    pts, facets = shape.tessellate(tolerance)
+    ref_points = np.array([[v.x, v.y, v.z] for v in pts])
+    ref_tris = np.array(facets, dtype=np.int64)
+    points, tris = part_mesh(p, mold_type, spacing)
+    vol_brep = float(shape.Volume)
+    vol_mesh = mesh_volume(points, tris)
+    dist = hausdorff(points, tris, ref_points, ref_tris)
+    rel = abs(vol_mesh - vol_brep) / vol_brep if vol_brep else float("inf")
+    return {
+        "type": mold_type, "volume_brep": vol_brep, "volume_mesh": vol_mesh,
+        "volume_rel_error": rel, "hausdorff": dist, "watertight": is_watertight(tris),
+        "triangles": int(len(tris)),
+        "ok": rel <= MATCH_VOLUME_REL and dist <= MATCH_HAUSDORFF and is_watertight(tris),
+    }
@@ -0,0 +1,135 @@
+"""Mesh file writers that do not hold a whole file in memory.
+
+``StlWriter`` appends binary STL records as triangles arrive and patches
+the triangle count into the header on close. ``ThreeMFWriter`` packs
+several parts, each with its own placement, into one deflate-compressed
+3MF archive, streaming the model XML into the zip entry. NumPy only.
+"""
+import struct
+import zipfile
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+STL_RECORD = np.dtype([("n", "<f4", (3,)), ("v", "<f4", (3, 3)), ("attr", "<u2")])
+CHUNK_TRIANGLES = 50000
+WELD_DIGITS = 6
+
+# --- STL ---
+
+class StlWriter:
+    def __init__(self, path, name=b"FingerboardMoldPro"):
+        self.count = 0
+        self.file = open(path, "wb")
+        self.file.write(name[:80].ljust(80, b" "))
+        self.file.write(struct.pack("<I", 0))
+
+    def add(self, triangles):
+        """Append an ``(n, 3, 3)`` array of triangle corners."""
+        triangles = np.asarray(triangles, dtype=np.float32)
+        for start in range(0, len(triangles), CHUNK_TRIANGLES):
+            v = triangles[start:start + CHUNK_TRIANGLES]
+            normals = np.cross(v[:, 1] - v[:, 0], v[:, 2] - v[:, 0])
+            lengths = np.linalg.norm(normals, axis=1)
+            record = np.zeros(len(v), dtype=STL_RECORD)
+            record["n"] = normals / np.where(lengths > 0, lengths, 1.0)[:, None]
+            record["v"] = v
+            self.file.write(record.tobytes())
+            self.count += len(v)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(80)
+        self.file.write(struct.pack("<I", self.count))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_stl(path, points, tris, name=b"FingerboardMoldPro"):
+    with StlWriter(path, name) as writer:
+        for start in range(0, len(tris), CHUNK_TRIANGLES):
+            writer.add(points[tris[start:start + CHUNK_TRIANGLES]])
+        return writer.count
+
+def weld(triangles, ndigits=WELD_DIGITS):
+    """Indexed ``(points, tris)`` from an ``(n, 3, 3)`` triangle soup."""
+    corners = np.asarray(triangles, dtype=float).reshape(-1, 3)
+    _, first, inverse = np.unique(np.round(corners, ndigits), axis=0, return_index=True, return_inverse=True)
+    tris = inverse.reshape(-1, 3)
+    keep = (tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 0] != tris[:, 2])
+    return corners[first], tris[keep]
+
+# --- 3MF ---
+
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>
+</Types>
+"""
+RELS = """<?xml version="1.0" encoding="UTF-8"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>
+</Relationships>
+"""
+MODEL_HEAD = """<?xml version="1.0" encoding="UTF-8"?>
+<model unit="millimeter" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">
+<metadata name="Application">FingerboardMoldPro</metadata>
+<resources>
+"""
+
+def transform_attr(matrix):
+    """3MF ``transform`` attribute for a 4x4 column-vector matrix (3MF multiplies row vectors)."""
+    m = np.asarray(matrix, dtype=float).reshape(4, 4)
+    values = [m[j, i] for i in range(4) for j in range(3)]
+    return " ".join(f"{v:.6g}" for v in values)
+
+class ThreeMFWriter:
+    def __init__(self, path, compresslevel=6):
+        self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self.zip.writestr("[Content_Types].xml", CONTENT_TYPES)
+        self.zip.writestr("_rels/.rels", RELS)
+        self.model = self.zip.open("3D/3dmodel.model", "w", force_zip64=True)
+        self.model.write(MODEL_HEAD.encode("utf-8"))
+        self.items = []
+
+    def _write(self, text):
+        self.model.write(text.encode("utf-8"))
+
+    def add_object(self, name, points, tris, matrix=None):
+        """Add one part; ``matrix`` is its 4x4 placement (None = identity)."""
+        obj_id = len(self.items) + 1
+        self._write(f'<object id="{obj_id}" type="model" name={quoteattr(name)}><mesh><vertices>\n')
+        for start in range(0, len(points), CHUNK_TRIANGLES):
+            block = points[start:start + CHUNK_TRIANGLES]
+            self._write("".join(f'<vertex x="{x:.5f}" y="{y:.5f}" z="{z:.5f}"/>\n' for x, y, z in block.tolist()))
+        self._write("</vertices><triangles>\n")
+        for start in range(0, len(tris), CHUNK_TRIANGLES):
+            block = tris[start:start + CHUNK_TRIANGLES]
+            self._write("".join(f'<triangle v1="{a}" v2="{b}" v3="{c}"/>\n' for a, b, c in block.tolist()))
+        self._write("</triangles></mesh></object>\n")
+        self.items.append((obj_id, matrix))
+        return obj_id
+
+    def close(self):
+        if self.model is None:
+            return
+        self._write("</resources>\n<build>\n")
+        for obj_id, matrix in self.items:
+            transform = "" if matrix is None else f' transform="{transform_attr(matrix)}"'
+            self._write(f'<item objectid="{obj_id}"{transform}/>\n')
+        self._write("</build>\n</model>\n")
+        self.model.close()
+        self.model = None
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,20 @@
+import FreeCAD as fc # type: ignore
+
+# Tunables live in the standard FreeCAD parameter tree so they can be edited
+# from Tools > Edit parameters without touching the model.
+PREF_PATH = "User parameter:BaseApp/Preferences/Mod/FingerboardMoldPro"
+
+def prefs():
+    return fc.ParamGet(PREF_PATH)
+
+def get_int(name, default):
+    return prefs().GetInt(name, default)
+
+def get_bool(name, default):
+    return prefs().GetBool(name, default)
+
+def get_float(name, default):
+    return prefs().GetFloat(name, default)
+
+def get_string(name, default):
+    return prefs().GetString(name, default)
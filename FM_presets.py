@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import threading
+
+import FreeCAD as fc # type: ignore
+
+ADDON_DIR = os.path.join(fc.getUserAppDataDir(), "Mod", "FingerboardMoldPro")
+PRESET_FILE = os.path.join(ADDON_DIR, "fb_presets.json")
+SHAPE_FILE = os.path.join(ADDON_DIR, "fb_shapes.json")
+HOLE_FILE = os.path.join(ADDON_DIR, "fb_holes.json")
+
+class JsonStore:
+    """Parsed contents of a JSON library file, shared by every mold.
+
+    The file is parsed once and re-read only when its mtime or size
+    changes. Writes go to a temp file in the same folder that is then
+    renamed over the original, so an interrupted save never leaves a
+    truncated library behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.loads = 0
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._data = {}
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def data(self):
+        """The whole library as a dict. Raises ``ValueError`` if the file is not valid JSON."""
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp != self._stamp:
+                data = {}
+                if stamp is not None:
+                    with open(self.path, 'r') as f:
+                        data = json.load(f)
+                    self.loads += 1
+                self._data = data if isinstance(data, dict) else {}
+                self._stamp = stamp
+            return self._data
+
+    def exists(self):
+        return self._file_stamp() is not None
+
+    def names(self):
+        return sorted(self.data().keys())
+
+    def get(self, name):
+        values = self.data().get(name)
+        return dict(values) if values is not None else None
+
+    def put(self, name, values):
+        with self._lock:
+            try:
+                data = dict(self.data())
+            except ValueError:
+                data = {} # broken file: overwrite it
+            data[name] = dict(values)
+            self.write(data)
+
+    def delete(self, name):
+        with self._lock:
+            data = dict(self.data())
+            if name not in data:
+                return False
+            del data[name]
+            self.write(data)
+            return True
+
+    def write(self, data):
+        with self._lock:
+            folder = os.path.dirname(self.path) or "."
+            os.makedirs(folder, exist_ok=True)
+            try:
+                mode = os.stat(self.path).st_mode & 0o777
+            except OSError:
+                mode = 0o644
+            fd, tmp_path = tempfile.mkstemp(prefix=".fb_", suffix=".tmp", dir=folder)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.chmod(tmp_path, mode)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._data = data
+            self._stamp = self._file_stamp()
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+def store(path):
+    """The shared store for ``path`` (one per file)."""
+    path = os.path.abspath(path)
+    with _STORES_LOCK:
+        if path not in _STORES:
+            _STORES[path] = JsonStore(path)
+        return _STORES[path]
+
+PRESETS = store(PRESET_FILE)
+SHAPES = store(SHAPE_FILE)
+HOLES = store(HOLE_FILE)
@@ -0,0 +1,88 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import tempfile
+import time
+
+import FreeCAD as fc # type: ignore
+import FM_cache
+import FM_prefs
+
+# Recompute timing: the latest stage timings are shown on the object in the
+# "Timing" group. Setting the TimingLog preference to a file path also appends
+# one JSON line per recompute; ProfileNextRecompute runs the next build under
+# cProfile and clears itself.
+
+TIMING_PROPS = ["RecomputeTime", "StageTimings", "FaceCount"]
+PROFILE_LINES = 25
+
+def add_properties(obj):
+    if not hasattr(obj, "RecomputeTime"):
+        obj.addProperty("App::PropertyFloat", "RecomputeTime", "Timing")
+    if not hasattr(obj, "StageTimings"):
+        obj.addProperty("App::PropertyStringList", "StageTimings", "Timing")
+    if not hasattr(obj, "FaceCount"):
+        obj.addProperty("App::PropertyInteger", "FaceCount", "Timing")
+    for prop in TIMING_PROPS:
+        obj.setEditorMode(prop, 1)
+
+def format_timings(timings):
+    lines = []
+    for name, seconds in timings.items():
+        if seconds is None:
+            lines.append(f"{name}: cached")
+        else:
+            lines.append(f"{name}: {seconds * 1000.0:.1f} ms")
+    return lines
+
+def log_path():
+    return FM_prefs.get_string("TimingLog", "")
+
+def log_record(fp, p, timings, total, faces):
+    path = log_path()
+    if not path:
+        return
+    record = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "object": fp.Label,
+        "mold_type": fp.MoldType,
+        "params_hash": FM_cache.params_key(p),
+        "total_s": round(total, 6),
+        "stages": {k: (None if v is None else round(v, 6)) for k, v in timings.items()},
+        "faces": faces,
+    }
+    try:
+        with open(os.path.expanduser(path), 'a') as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        fc.Console.PrintWarning(f"Could not write timing log {path}: {e}\n")
+
+def record(fp, p, timings, total, shape):
+    faces = len(shape.Faces) if shape is not None and not shape.isNull() else 0
+    if hasattr(fp, "StageTimings"):
+        fp.RecomputeTime = round(total, 4)
+        fp.StageTimings = format_timings(timings)
+        fp.FaceCount = faces
+    log_record(fp, p, timings, total, faces)
+
+def take_profile_request():
+    """True once after ProfileNextRecompute was set; clears the preference."""
+    if not FM_prefs.get_bool("ProfileNextRecompute", False):
+        return False
+    FM_prefs.prefs().SetBool("ProfileNextRecompute", False)
+    return True
+
+def run_profiled(label, func, *args, **kwargs):
+    prof = cProfile.Profile()
+    try:
+        return prof.runcall(func, *args, **kwargs)
+    finally:
+        safe = "".join(c if c.isalnum() else "_" for c in label)
+        path = os.path.join(tempfile.gettempdir(), f"fb_profile_{safe}.prof")
+        prof.dump_stats(path)
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        fc.Console.PrintMessage(f"Profile of {label} saved to {path}\n")
+        fc.Console.PrintMessage(out.getvalue())
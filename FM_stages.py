@@ -0,0 +1,105 @@
+import contextlib
+import threading
+import time
+
+import FM_cache
+
+class StageGraph:
+    """Named build stages with declared inputs and dependencies.
+
+    A stage is ``func(p, *dep_results)`` registered with the parameter keys
+    it reads (``inputs``) and the stages it consumes (``deps``). Its cache
+    key hashes only those inputs plus the keys of its dependencies, so a
+    stage is rebuilt only when something it actually uses has changed, and
+    evaluating a target builds only the stages reachable from it.
+
+    Pass a dict as ``timings`` to collect the seconds each built stage took
+    (excluding its dependencies); stages served from the cache map to None.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.stages = {}
+
+    def stage(self, name, inputs=(), deps=()):
+        def register(func):
+            self.stages[name] = (func, tuple(inputs), tuple(deps))
+            return func
+        return register
+
+    def key(self, p, name, _keys=None):
+        keys = {} if _keys is None else _keys
+        if name not in keys:
+            func, inputs, deps = self.stages[name]
+            values = {k: p[k] for k in inputs}
+            values["__stage__"] = name
+            for dep in deps:
+                values["__dep_" + dep] = self.key(p, dep, keys)
+            keys[name] = FM_cache.params_key(values)
+        return keys[name]
+
+    def evaluate(self, p, name, _keys=None, timings=None):
+        keys = {} if _keys is None else _keys
+        key = self.key(p, name, keys)
+        hit = self.cache.get(key, _MISSING)
+        if hit is not _MISSING:
+            if timings is not None:
+                timings.setdefault(name, None)
+            return hit
+        func, inputs, deps = self.stages[name]
+        dep_results = [self.evaluate(p, dep, keys, timings) for dep in deps]
+        is_stale = getattr(_ACTIVE, "is_stale", None)
+        if is_stale is not None and is_stale():
+            raise Cancelled(name)
+        if timings is None:
+            result = func(p, *dep_results)
+        else:
+            outer = (getattr(_ACTIVE, "timings", None), getattr(_ACTIVE, "stage", None))
+            _ACTIVE.timings, _ACTIVE.stage = timings, name
+            t0 = time.perf_counter()
+            try:
+                result = func(p, *dep_results)
+            finally:
+                timings[name] = time.perf_counter() - t0
+                _ACTIVE.timings, _ACTIVE.stage = outer
+        self.cache.put(key, result)
+        return result
+
+    def requires(self, name, _seen=None):
+        seen = [] if _seen is None else _seen
+        for dep in self.stages[name][2]:
+            self.requires(dep, seen)
+        if name not in seen:
+            seen.append(name)
+        return seen
+
+_MISSING = object()
+
+class Cancelled(Exception):
+    """A build given up between stages because its result is no longer wanted."""
+
+_ACTIVE = threading.local()
+
+@contextlib.contextmanager
+def timed(label):
+    """Time part of the running stage as ``"<stage>/<label>"`` when the build is timed."""
+    timings = getattr(_ACTIVE, "timings", None)
+    if timings is None:
+        yield
+        return
+    name = f"{_ACTIVE.stage}/{label}"
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - t0
+
+@contextlib.contextmanager
+def cancellable(is_stale):
+    """Stop evaluations in this thread before the next stage once ``is_stale()`` is true."""
+    outer = getattr(_ACTIVE, "is_stale", None)
+    _ACTIVE.is_stale = is_stale
+    try:
+        yield
+    finally:
+        _ACTIVE.is_stale = outer
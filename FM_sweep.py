@@ -0,0 +1,269 @@
+"""Design-space sweeps for Fingerboard Mold Pro.
+
+Expands parameter ranges lazily, skips combinations that ``FM_validity``
+rejects or that the property limits of ``FB_Mold.onChanged`` would clamp,
+builds the rest in parallel worker processes and appends every result to a
+JSON-lines manifest as it finishes. Running the same sweep again resumes
+it: variants already built or skipped in the manifest are not dispatched
+again.
+
+    FreeCADCmd FM_sweep.py --pass --range Wheelbase=42:46:1 --range ConcaveDrop=1.5:2.5:0.5 \\
+        --range NoseAngle=20:26:2 --out ./sweep
+    FreeCADCmd FM_sweep.py --pass --preset "OLD SCHOOL (46/15)" --range ConcaveStyle=Flat,Organic
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+
+BASEDIR = os.path.dirname(os.path.abspath(__file__))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import FM_batch
+import FM_constraints
+import FM_validity
+
+MANIFEST_NAME = "sweep_manifest.jsonl"
+DONE_STATES = ("ok", "skipped")
+
+# --- RANGES ---
+
+def _frange(start, stop, step):
+    if step <= 0:
+        raise ValueError(f"Range step must be positive, got {step}")
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    for i in range(max(count, 0)):
+        yield round(start + i * step, 9)
+
+def parse_range(spec):
+    """``Name=start:stop:step`` (stop included), ``Name=a,b,c`` or ``Name=value``.
+
+    Returns ``(name, values)`` where ``values`` is a zero-argument callable
+    producing a fresh iterator, so an axis is never stored as a list.
+    """
+    if "=" not in spec:
+        raise ValueError(f"Bad range '{spec}', expected Name=start:stop:step or Name=a,b,c")
+    name, raw = [s.strip() for s in spec.split("=", 1)]
+    if ":" in raw:
+        parts = [float(v) for v in raw.split(":")]
+        if len(parts) == 2:
+            parts.append(1.0)
+        if len(parts) != 3:
+            raise ValueError(f"Bad range '{spec}'")
+        start, stop, step = parts
+        return name, lambda: _frange(start, stop, step)
+    items = [FM_batch._parse_value(v) for v in raw.split(",") if v.strip()]
+    return name, lambda: iter(items)
+
+def axis_size(values):
+    return sum(1 for _ in values())
+
+def expand(ranges):
+    """Yield one ``{name: value}`` dict per combination, last axis fastest."""
+    if not ranges:
+        yield {}
+        return
+    name, values = ranges[0]
+    for value in values():
+        for rest in expand(ranges[1:]):
+            yield dict({name: value}, **rest)
+
+def variant_name(values):
+    # also the STL file label, so keep it to characters FM_export.safe_label keeps
+    parts = []
+    for k, v in values.items():
+        txt = f"{v:g}" if isinstance(v, float) else str(v)
+        parts.append(f"{k}-{txt.replace('.', 'p')}")
+    return "_".join(parts)
+
+# --- CONSTRAINTS ---
+
+class ConstraintChecker:
+    """Reports which values of a variant the property limits would clamp.
+
+    Runs the ``FM_constraints`` table over the defaults plus the variant, as
+    applying it to a new mold in one transaction would, without a document.
+    """
+
+    def violations(self, values):
+        """``[(property, requested, allowed), ...]``; empty when the variant is buildable as given."""
+        _, writes, _ = FM_constraints.resolve(FM_validity.complete(values), list(values))
+        found = []
+        for name, requested in values.items():
+            if name not in FM_validity.DEFAULTS:
+                found.append((name, requested, None))
+            elif name in FM_constraints.CHOICES and requested not in FM_constraints.choices(name):
+                found.append((name, requested, "|".join(FM_constraints.choices(name))))
+            elif name in writes:
+                found.append((name, requested, writes[name]))
+        return found
+
+# --- MANIFEST ---
+
+def _records(path):
+    if not os.path.exists(path):
+        return
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue # truncated last line of a killed run
+
+def read_manifest(path):
+    """Entries already in a (possibly interrupted) manifest, by variant name."""
+    return {entry["name"]: entry for entry in _records(path) if "name" in entry}
+
+def read_setup(path):
+    """Setup hash from the manifest's header record, or None."""
+    return next((entry["setup"] for entry in _records(path) if "setup" in entry), None)
+
+def setup_hash(base_values, job_defaults):
+    # everything a variant's output depends on besides its own combination
+    job = {k: v for k, v in job_defaults.items() if k != "out_dir"}
+    text = json.dumps({"base": base_values, "job": job}, sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+class ManifestWriter:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a+')
+        # a killed run can leave a half-written line: start on a fresh one
+        if self.file.tell() > 0:
+            self.file.seek(self.file.tell() - 1)
+            if self.file.read(1) != "\n":
+                self.file.write("\n")
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+# --- DRIVER ---
+
+def sweep_jobs(combos, base_values, checker, done, job_defaults, on_skip):
+    """Lazily turn combinations into ``FM_batch.build_variant`` jobs."""
+    for i, combo in enumerate(combos):
+        name = variant_name(combo)
+        if name in done:
+            continue
+        values = dict(base_values, **combo)
+        # pure-Python screen first: no document, no OCC
+        invalid = FM_validity.errors(FM_validity.check(FM_validity.complete(values)))
+        if invalid:
+            on_skip(name, values, "; ".join(f"{p}: {msg}" for _, p, msg in invalid))
+            continue
+        if checker is not None:
+            found = checker.violations(values)
+            if found:
+                on_skip(name, values, "; ".join(f"{p}={req} (limit {got})" for p, req, got in found))
+                continue
+        yield dict(job_defaults, id=i, name=name, params=values)
+
+def run_sweep(ranges, out_dir, base_values=None, types=None, workers=None, manifest_path=None,
+              tolerance=None, engine=None, check=True, log=print):
+    types = types or FM_batch.EXPORT_TYPES
+    base_values = base_values or {}
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(out_dir, MANIFEST_NAME)
+    job_defaults = {"types": types, "out_dir": out_dir, "tolerance": tolerance, "engine": engine}
+    setup = setup_hash(base_values, job_defaults)
+    previous = read_setup(manifest_path)
+    if previous is not None and previous != setup:
+        raise ValueError(f"{manifest_path} belongs to a sweep with other base values or export settings; "
+                         f"use another --out or --manifest")
+    done = {k for k, e in read_manifest(manifest_path).items() if e.get("status") in DONE_STATES}
+    total = 1
+    for _, values in ranges:
+        total *= axis_size(values)
+    counts = {"ok": 0, "failed": 0, "skipped": 0, "resumed": len(done)}
+    if done:
+        log(f"Resuming: {len(done)} of {total} variants already in {manifest_path}")
+
+    writer = ManifestWriter(manifest_path)
+    if previous is None:
+        if done:
+            log(f"Warning: {manifest_path} has no setup record, resuming without checking it")
+        writer.write({"setup": setup, "base": base_values, "types": types, "tolerance": tolerance,
+                      "engine": engine})
+    checker = ConstraintChecker() if check else None
+
+    def progress():
+        return f"[{counts['ok'] + counts['failed'] + counts['skipped'] + counts['resumed']}/{total}]"
+
+    def on_skip(name, values, reason):
+        counts["skipped"] += 1
+        writer.write({"name": name, "params": values, "status": "skipped", "error": reason})
+        log(f"{progress()} {name}: SKIPPED ({reason})")
+
+    def on_result(job, result):
+        state = "ok" if result.get("status") == "ok" else "failed"
+        counts[state] += 1
+        writer.write(dict({"name": job["name"], "params": job["params"]}, **result))
+        log(f"{progress()} {job['name']}: {'OK' if state == 'ok' else 'FAILED (' + str(result.get('error')) + ')'}")
+
+    t0 = time.time()
+    try:
+        jobs = sweep_jobs(expand(ranges), base_values, checker, done, job_defaults, on_skip)
+        FM_batch.run_pool(jobs, FM_batch.build_variant, workers, on_result)
+    finally:
+        writer.close()
+    counts["seconds"] = round(time.time() - t0, 3)
+    log(f"Sweep finished: {counts['ok']} built, {counts['failed']} failed, {counts['skipped']} skipped, "
+        f"{counts['resumed']} resumed in {counts['seconds']}s. Manifest: {manifest_path}")
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="FM_sweep", description="Fingerboard Mold Pro design-space sweep")
+    parser.add_argument("--range", action="append", default=[], dest="ranges",
+                        help="Name=start:stop:step, Name=a,b,c or Name=value (repeatable)")
+    parser.add_argument("--preset", default=None, help="Preset the sweep starts from")
+    parser.add_argument("--presets-file", default=None, help="Presets JSON (default: installed fb_presets.json)")
+    parser.add_argument("--types", default=",".join(FM_batch.EXPORT_TYPES), help="Comma separated MoldType list")
+    parser.add_argument("--out", default="fb_sweep_output", help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--manifest", default=None, help=f"Manifest path (default: <out>/{MANIFEST_NAME})")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Linear deflection in mm (default: TessLinear preference)")
+    parser.add_argument("--engine", choices=["BRep", "Analytic"], default=None,
+                        help="STL engine (default: ExportEngine preference)")
+    parser.add_argument("--no-check", action="store_true", help="Build combinations even if limits would clamp them")
+    args = parser.parse_args(FM_batch._script_args() if argv is None else argv)
+
+    if not args.ranges:
+        parser.error("Nothing to sweep: give at least one --range")
+    try:
+        ranges = [parse_range(spec) for spec in args.ranges]
+    except ValueError as e:
+        parser.error(str(e))
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+    unknown = [t for t in types if t not in FM_batch.MOLD_TYPES]
+    if unknown:
+        parser.error(f"Unknown MoldType: {', '.join(unknown)}")
+
+    base_values = {}
+    if args.preset:
+        preset_file = args.presets_file
+        if preset_file is None:
+            import FM_presets
+            preset_file = FM_presets.PRESET_FILE
+            if not os.path.exists(preset_file):
+                preset_file = os.path.join(BASEDIR, "fb_presets.json")
+        base_values = FM_batch.load_preset_variants([args.preset], preset_file)[0]["params"]
+
+    try:
+        counts = run_sweep(ranges, args.out, base_values, types, args.workers, args.manifest, args.tolerance,
+                           args.engine, check=not args.no_check)
+    except ValueError as e:
+        parser.error(str(e))
+    return 1 if counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
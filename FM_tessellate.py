@@ -0,0 +1,164 @@
+import math
+
+import numpy as np
+
+import FreeCAD as fc # type: ignore
+import Part # type: ignore
+import FM_meshio
+import FM_prefs
+
+# Export tessellation with separate linear and angular deflection and an
+# optional per-part triangle budget. The whole part is meshed in one BRepMesh
+# run: MeshPart clears the triangulation of the shape it is given, so separate
+# per-face runs would re-discretise shared edges and open cracks. The result
+# is read back one face segment at a time, so writers can stream it.
+# BRepMesh adds no interior nodes to planar faces, so flat base faces cost
+# only their boundary; they are also skipped by the deviation check. When a
+# budget is set, both deflections are scaled up (bisected in log space) until
+# the part fits.
+
+DEFAULT_LINEAR = 0.01
+DEFAULT_ANGULAR = 28.6 # degrees, BRepMesh's own default (0.5 rad)
+MAX_ANGULAR = 60.0
+HOLE_RADIUS = 5.0
+BUDGET_MAX_SCALE = 64.0
+BUDGET_STEPS = 8
+DEVIATION_SAMPLES = 2000
+
+def enabled():
+    return FM_prefs.get_bool("AdaptiveTessellation", True)
+
+def settings():
+    return {
+        "linear": max(1e-4, FM_prefs.get_float("TessLinear", DEFAULT_LINEAR)),
+        "angular": min(MAX_ANGULAR, max(1.0, FM_prefs.get_float("TessAngular", DEFAULT_ANGULAR))),
+        "budget": max(0, FM_prefs.get_int("TriangleBudget", 0)),
+    }
+
+def part_budget(m_type, budgets=None):
+    """Triangle budget for one part: ``budgets[m_type]`` or the TriangleBudget preference (0 = none)."""
+    if budgets and budgets.get(m_type) is not None:
+        return max(0, int(budgets[m_type]))
+    return settings()["budget"]
+
+def face_kind(face):
+    surf = face.Surface
+    if isinstance(surf, Part.Plane):
+        return "planar"
+    if isinstance(surf, Part.Cylinder) and surf.Radius <= HOLE_RADIUS:
+        return "hole"
+    return "curved"
+
+def _clean(shape):
+    # never mesh the shared cached shape itself, and drop any display mesh
+    if hasattr(shape, "cleaned"):
+        return shape.cleaned()
+    return shape.copy()
+
+def mesh_shape(shape, linear, angular_deg):
+    """The whole part as one ``Mesh.Mesh`` from a single BRepMesh run, one segment per face."""
+    import MeshPart # type: ignore
+    return MeshPart.meshFromShape(Shape=_clean(shape), LinearDeflection=linear,
+                                  AngularDeflection=math.radians(angular_deg), Relative=False,
+                                  Segments=True)
+
+def _arrays(mesh):
+    points, facets = mesh.Topology
+    pts = np.array([(v.x, v.y, v.z) for v in points], dtype=float).reshape(-1, 3)
+    return pts, np.array(facets, dtype=np.int64).reshape(-1, 3)
+
+def face_meshes(shape, mesh):
+    """Yield ``(face_index, points, tris)`` one face at a time.
+
+    Only one face is converted to arrays at a time. If the segments do not
+    match ``shape.Faces``, the whole mesh is yielded once with index -1.
+    """
+    if mesh.countSegments() != len(shape.Faces):
+        yield (-1,) + _arrays(mesh)
+        return
+    for i in range(mesh.countSegments()):
+        yield (i,) + _arrays(mesh.meshFromSegment(mesh.getSegment(i)))
+
+def face_deviation(face, points, tris, samples):
+    """Largest distance from the centroids of the ``samples`` largest triangles to ``face``.
+
+    That is where the chord error is biggest. Planar faces are exact and
+    return 0.
+    """
+    if not len(tris) or face_kind(face) == "planar":
+        return 0.0
+    v = points[tris]
+    area = np.linalg.norm(np.cross(v[:, 1] - v[:, 0], v[:, 2] - v[:, 0]), axis=1)
+    surf = face.Surface
+    worst = 0.0
+    for k in np.argsort(area)[::-1][:samples]:
+        point = fc.Vector(*v[k].mean(axis=0))
+        u, w = surf.parameter(point)
+        worst = max(worst, (surf.value(u, w) - point).Length)
+    return worst
+
+def _fit(shape, linear, angular, budget):
+    # mesh once; with a budget, scale both deflections up (bisected in log
+    # space) until the part fits. Only the facet counts are read here.
+    def run(scale):
+        return mesh_shape(shape, linear * scale, min(MAX_ANGULAR, angular * scale))
+
+    mesh = run(1.0)
+    if not budget or mesh.CountFacets <= budget:
+        return mesh, 1.0
+    lo, hi = 1.0, BUDGET_MAX_SCALE
+    best = run(hi)
+    if best.CountFacets <= budget:
+        for _ in range(BUDGET_STEPS):
+            mid = math.sqrt(lo * hi)
+            trial = run(mid)
+            if trial.CountFacets <= budget:
+                hi, best = mid, trial
+            else:
+                lo = mid
+    return best, hi
+
+def stream(shape, add, linear=None, angular=None, budget=None):
+    """Mesh ``shape`` for export, handing ``add(points, tris)`` one face at a time.
+
+    The part is meshed in one BRepMesh run, but converted to arrays face by
+    face, so a streaming writer never holds the whole part in Python. Returns
+    the report: triangle count (total and per face kind), maximum sampled
+    deviation, the deflections actually used and whether the budget was met.
+    """
+    opts = settings()
+    linear = opts["linear"] if linear is None else linear
+    angular = opts["angular"] if angular is None else angular
+    budget = opts["budget"] if budget is None else budget
+
+    mesh, scale = _fit(shape, linear, angular, budget)
+    faces = shape.Faces
+    per_face = max(1, DEVIATION_SAMPLES // max(1, len(faces)))
+    counts = {"planar": 0, "hole": 0, "curved": 0}
+    total, deviation = 0, 0.0
+    for i, points, tris in face_meshes(shape, mesh):
+        add(points, tris)
+        total += len(tris)
+        if i < 0:
+            deviation = None
+            continue
+        counts[face_kind(faces[i])] += len(tris)
+        if deviation is not None:
+            deviation = max(deviation, face_deviation(faces[i], points, tris, per_face))
+    return {
+        "triangles": total,
+        "by_kind": counts,
+        "max_deviation": None if deviation is None else round(deviation, 5),
+        "linear": round(linear * scale, 5),
+        "angular": round(min(MAX_ANGULAR, angular * scale), 3),
+        "budget": budget or None,
+        "within_budget": (not budget) or total <= budget,
+    }
+
+def tessellate(shape, linear=None, angular=None, budget=None):
+    """Mesh ``shape`` for export as one indexed ``(points, tris, report)``; see ``stream``."""
+    soup = []
+    report = stream(shape, lambda points, tris: soup.append(points[tris]), linear, angular, budget)
+    # faces come with their own copies of the shared edge nodes: weld them back
+    points, tris = FM_meshio.weld(np.concatenate(soup) if soup else np.zeros((0, 3, 3)))
+    return points, tris, report
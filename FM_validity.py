@@ -0,0 +1,204 @@
+"""Derived dimensions and sanity checks, without FreeCAD.
+
+``derive`` turns raw property values (``{"Wheelbase": 44.0, ...}``) into the
+clamped parameter dict the build stages use, with the limits of
+``FM_constraints``. ``check`` looks for parameter sets that cannot be
+lofted, or that build but are not a usable mold, before any OCC work starts.
+Both run in microseconds, so batch tools can screen whole design spaces.
+"""
+import math
+
+import FM_constraints
+
+# Defaults of a new FB_Mold
+DEFAULTS = {
+    "MoldBaseWidth": 75.0, "MoldBaseHeight": 10.0, "GuideDiameter": 6.5, "MoldCornerRadius": 5.0,
+    "AddFillet": True, "SideLocks": False,
+    "MoldCoreWidth": 45.0, "MoldCoreHeight": 5.0, "MoldLength": 115.0, "MoldGap": 2.5,
+    "BoardWidth": 34.0, "Wheelbase": 44.0, "ConcaveDrop": 1.5, "ConcaveLength": 40.0,
+    "ConcaveStyle": "Flat", "TubWidth": 8.0, "VeneerThickness": 2.5,
+    "TransitionLength": 8.0, "KickGap": 1.0, "NoseLength": 16.5, "TailLength": 16.5,
+    "NoseAngle": 24.0, "TailAngle": 24.0,
+    "TruckHoleDiam": 1.7, "TruckHoleDistL": 7.5, "TruckHoleDistW": 5.5,
+    "ShaperHeight": 10.0, "NoseFlatness": 60, "TailFlatness": 60,
+    "NoseTaperStart": 22.0, "TailTaperStart": 22.0,
+    "HolePattern": "Standard",
+}
+# What objects created before these properties existed are built with
+LEGACY = {"TubWidth": 0.0, "ConcaveStyle": "Organic", "SideLocks": False}
+
+FLAT_RADIUS = 5000.0 # concave radius treated as flat by the offset lofts
+PROFILE_MARGIN = 5.0 # the section profiles are MoldCoreWidth + 5 wide
+ERROR = "error"
+WARNING = "warning"
+
+class InvalidParameters(ValueError):
+    pass
+
+def clamp(n, minn, maxn):
+    return max(min(maxn, n), minn)
+
+def complete(values):
+    """``values`` with every missing property at its default."""
+    return dict(DEFAULTS, **values)
+
+def kick_height(rad, angle, length):
+    limit_y = rad * math.sin(math.radians(angle))
+    if length <= limit_y:
+        return rad - math.sqrt(max(rad**2 - length**2, 0.0))
+    h_curve = rad - (rad * math.cos(math.radians(angle)))
+    return h_curve + (length - limit_y) * math.tan(math.radians(angle))
+
+def concave_radius(board_width, tub_width, concave_depth):
+    eff_width_half = (board_width - tub_width) / 2.0
+    if concave_depth > 0.01 and eff_width_half > 0.1:
+        return (eff_width_half**2 + concave_depth**2) / (2.0 * concave_depth)
+    return 100000.0
+
+def kick_start(wheelbase, truck_hole_len, kick_gap):
+    """Distance from the centre to where the kicks start (flat zone half length)."""
+    return (wheelbase + 2 * truck_hole_len + 2 * kick_gap) / 2.0
+
+def derive(values):
+    """Clamped build parameters and derived dimensions from raw property values."""
+    v = dict(LEGACY, **values)
+    # the same limits FB_Mold applies to its properties
+    r, _, _ = FM_constraints.resolve(v)
+    core_width = r["MoldCoreWidth"]
+    core_base_depth = r["MoldCoreHeight"]
+    base_width = r["MoldBaseWidth"]
+    base_height = r["MoldBaseHeight"]
+    M_Radius = r["MoldCornerRadius"]
+    board_width = r["BoardWidth"]
+    wheelbase = r["Wheelbase"]
+    concave_depth = r["ConcaveDrop"]
+    tub_width = r["TubWidth"]
+
+    concave_len = r["ConcaveLength"]
+    kick_gap = r["KickGap"]
+    nose_len = r["NoseLength"]
+    tail_len = r["TailLength"]
+    angle_nose = r["NoseAngle"]
+    angle_tail = r["TailAngle"]
+
+    # Radius from Transition Length
+    trans_len = r["TransitionLength"]
+    sin_n = math.sin(math.radians(angle_nose))
+    rad_nose = clamp((trans_len / sin_n) if sin_n > 0.001 else 500.0, 2.0, 1000.0)
+    sin_t = math.sin(math.radians(angle_tail))
+    rad_tail = clamp((trans_len / sin_t) if sin_t > 0.001 else 500.0, 2.0, 1000.0)
+
+    truck_hole_len = v["TruckHoleDistL"]
+    board_len = FM_constraints.board_length(r)
+    mold_len = r["MoldLength"]
+    veneer_thick = r["VeneerThickness"]
+    mold_gap = r["MoldGap"]
+
+    radius_concave = concave_radius(board_width, tub_width, concave_depth)
+    flat = radius_concave >= FLAT_RADIUS
+    return {
+        "core_width": core_width, "core_base_depth": core_base_depth,
+        "base_width": base_width, "base_height": base_height, "M_Radius": M_Radius,
+        "board_width": board_width, "wheelbase": wheelbase, "concave_depth": concave_depth,
+        "tub_width": tub_width, "truck_hole_len": truck_hole_len,
+        "truck_hole_width": v["TruckHoleDistW"], "truck_hole_diam": v["TruckHoleDiam"],
+        "concave_len": concave_len, "camber": 0.0, "kick_gap": kick_gap,
+        "nose_len": nose_len, "tail_len": tail_len,
+        "angle_nose": angle_nose, "angle_tail": angle_tail, "trans_len": trans_len,
+        "rad_nose": rad_nose, "rad_tail": rad_tail,
+        "board_len": board_len, "mold_len": mold_len,
+        "veneer_thick": veneer_thick, "mold_gap": mold_gap,
+        "guide_diam": r["GuideDiameter"],
+        "shaper_height": r["ShaperHeight"],
+        "h_nose": kick_height(rad_nose, angle_nose, nose_len),
+        "h_tail": kick_height(rad_tail, angle_tail, tail_len),
+        "radius_concave": radius_concave,
+        "radius_ven": radius_concave if flat else radius_concave - veneer_thick,
+        "radius_gap": radius_concave if flat else radius_concave + mold_gap,
+        "kick_start": kick_start(wheelbase, truck_hole_len, kick_gap),
+        "concave_style": v["ConcaveStyle"],
+        "add_fillet": bool(v["AddFillet"]),
+        "side_locks": bool(v["SideLocks"]),
+        "nose_taper": v["NoseTaperStart"],
+        "tail_taper": v["TailTaperStart"],
+        "nose_flatness": r["NoseFlatness"] / 100.0,
+        "tail_flatness": r["TailFlatness"] / 100.0,
+    }
+
+def check(values, p=None):
+    """``[(level, property, message), ...]`` for ``values``; ``p`` is ``derive(values)`` if known.
+
+    Errors are parameter sets the lofts cannot be built from; warnings build
+    but give a mold that is probably not what was meant.
+    """
+    p = derive(values) if p is None else p
+    v = values
+    issues = []
+
+    # --- CONCAVE SURFACES ---
+    # each section is an arc across MoldCoreWidth + 5 (minus the tub): a
+    # surface radius shorter than that half span has no arc
+    half_span = (p["core_width"] + PROFILE_MARGIN - p["tub_width"]) / 2.0
+    if p["radius_concave"] < FLAT_RADIUS:
+        if p["radius_ven"] <= 0:
+            issues.append((ERROR, "VeneerThickness",
+                           f"veneer surface radius is {p['radius_ven']:.2f} mm: the concave radius "
+                           f"({p['radius_concave']:.2f} mm) is smaller than the veneer"))
+        else:
+            for name, radius in (("concave", p["radius_concave"]), ("veneer", p["radius_ven"])):
+                if radius < half_span:
+                    level = ERROR if p["tub_width"] > 0.1 else WARNING
+                    issues.append((level, "ConcaveDrop",
+                                   f"{name} radius {radius:.2f} mm is smaller than the profile half "
+                                   f"width {half_span:.2f} mm; reduce ConcaveDrop or TubWidth"))
+                    break
+
+    # --- KICKS ---
+    for side in ("Nose", "Tail"):
+        length = p[side.lower() + "_len"]
+        limit = max(length - 2.0, 1.0)
+        if v["TransitionLength"] > limit:
+            issues.append((WARNING, "TransitionLength",
+                           f"TransitionLength {v['TransitionLength']:g} mm does not fit the "
+                           f"{length:g} mm {side.lower()} (limit {limit:g} mm)"))
+            break
+
+    # --- HOLES ---
+    shelf = ((p["base_width"] - p["core_width"]) / 2.0) - 2.0
+    if shelf < 0.1:
+        issues.append((WARNING, "GuideDiameter",
+                       f"no room for guide holes: MoldBaseWidth leaves a {shelf + 2.0:g} mm shelf"))
+    elif v["GuideDiameter"] > shelf:
+        issues.append((WARNING, "GuideDiameter",
+                       f"guide holes ({v['GuideDiameter']:g} mm) do not fit the base shelf (max {shelf:g} mm)"))
+    diam = p["truck_hole_diam"]
+    if diam <= 0:
+        issues.append((ERROR, "TruckHoleDiam", "TruckHoleDiam must be positive"))
+    else:
+        if p["truck_hole_width"] < diam or p["truck_hole_len"] < diam:
+            issues.append((WARNING, "TruckHoleDiam", "truck holes overlap each other"))
+        if (p["truck_hole_width"] + diam) / 2.0 >= p["board_width"] / 2.0:
+            issues.append((WARNING, "TruckHoleDistW", "truck holes break out of the deck edge"))
+        if p["kick_gap"] < diam / 2.0:
+            issues.append((WARNING, "KickGap", "outer truck holes reach into the kicks"))
+
+    # --- OUTLINE ---
+    if p["nose_taper"] + p["tail_taper"] > p["board_len"]:
+        issues.append((ERROR, "NoseTaperStart",
+                       f"NoseTaperStart + TailTaperStart ({p['nose_taper'] + p['tail_taper']:g} mm) "
+                       f"exceed the board length ({p['board_len']:g} mm)"))
+    if p["board_len"] > 130.0:
+        issues.append((WARNING, "MoldLength", f"board length {p['board_len']:g} mm exceeds the 130 mm mold"))
+    elif v["MoldLength"] < p["board_len"]:
+        issues.append((WARNING, "MoldLength",
+                       f"MoldLength {v['MoldLength']:g} mm is raised to the board length {p['board_len']:g} mm"))
+    return issues
+
+def errors(issues):
+    return [i for i in issues if i[0] == ERROR]
+
+def status(issues):
+    """One-line summary for the ValidityStatus property."""
+    if not issues:
+        return "OK"
+    return "; ".join(f"{level.upper()} {prop}: {msg}" for level, prop, msg in issues)
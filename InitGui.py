@@ -24,7 +24,7 @@ class FingerboardMoldProWorkbench(FreeCADGui.Workbench):
         # ---------------------------
 
         import FM_commands
-        self.cmd_list = ["FB_CreateMold", "FB_SavePreset", "FB_DeletePreset", "FB_ExportSTL"]
+        self.cmd_list = ["FB_CreateMold", "FB_SavePreset", "FB_DeletePreset", "FB_ExportSTL", "FB_GapAnalysis"]
         self.appendToolbar("Mold Construction", self.cmd_list)
         self.appendMenu("Fingerboard Mold", self.cmd_list)
         
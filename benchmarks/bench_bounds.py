@@ -0,0 +1,79 @@
+"""Fixed-size versus tight-bounds cutters and stock, over the bundled presets.
+
+Every part is built cold (empty stage cache) both ways. Reported per part:
+the total build time, the time spent in the boolean stages, validity and
+volume; the tight build must give the same volume. Exits with 1 when a
+volume differs by more than ``--volume-rel``:
+
+    FreeCADCmd benchmarks/bench_bounds.py --pass
+    FreeCADCmd benchmarks/bench_bounds.py --pass --repeat 3 --types Male_Mold,Female_Mold
+"""
+import argparse
+import os
+import sys
+import time
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import FM_batch
+import FM_features
+
+MODES = (("fixed", False), ("tight", True))
+BOOLEAN_STAGES = ("male_body", "female_body", "Male_Mold", "Female_Mold", "Shaper_Template", "Board_Preview")
+VOLUME_REL = 1e-6
+
+def time_build(p, mold_type, repeat):
+    best = None
+    for _ in range(repeat):
+        FM_features.STAGE_CACHE.clear()
+        timings = {}
+        t0 = time.perf_counter()
+        shape = FM_features.GRAPH.evaluate(p, mold_type, timings=timings)
+        seconds = time.perf_counter() - t0
+        booleans = sum(timings.get(name) or 0.0 for name in BOOLEAN_STAGES)
+        if best is None or seconds < best[0]:
+            best = (seconds, booleans, shape)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_bounds")
+    parser.add_argument("--presets-file", default=os.path.join(BASEDIR, "fb_presets.json"))
+    parser.add_argument("--types", default=",".join(FM_features.MOLD_TYPES))
+    parser.add_argument("--repeat", type=int, default=1, help="Builds per mode, fastest is kept")
+    parser.add_argument("--volume-rel", type=float, default=VOLUME_REL)
+    args = parser.parse_args(FM_batch._script_args() if argv is None else argv)
+
+    variants = [{"name": "Default", "params": {}}]
+    variants += FM_batch.load_preset_variants(None, args.presets_file)
+    types = [t for t in args.types.split(",") if t]
+
+    print(f"{'variant':<28} {'part':<16} {'mode':<6} {'total s':>8} {'bool s':>8} {'valid':>6} "
+          f"{'volume':>10} {'dV rel':>9}")
+    totals = {mode: [0.0, 0.0] for mode, _ in MODES}
+    mismatches = 0
+    for variant in variants:
+        p = FM_batch.variant_params(variant["params"])
+        for mold_type in types:
+            volumes = {}
+            for mode, tight in MODES:
+                seconds, booleans, shape = time_build(dict(p, tight_bounds=tight), mold_type, max(1, args.repeat))
+                totals[mode][0] += seconds
+                totals[mode][1] += booleans
+                volumes[mode] = shape.Volume
+                rel = abs(shape.Volume - volumes["fixed"]) / volumes["fixed"] if volumes["fixed"] else 0.0
+                if rel > args.volume_rel:
+                    mismatches += 1
+                print(f"{variant['name']:<28} {mold_type:<16} {mode:<6} {seconds:>8.3f} {booleans:>8.3f} "
+                      f"{str(shape.isValid()):>6} {shape.Volume:>10.1f} {rel:>9.2e}")
+    for mode, (seconds, booleans) in totals.items():
+        print(f"{'TOTAL':<28} {'':<16} {mode:<6} {seconds:>8.3f} {booleans:>8.3f}")
+    fixed, tight = totals["fixed"][1], totals["tight"][1]
+    if fixed:
+        print(f"Boolean time, tight vs fixed: {tight / fixed:.2f}x")
+    print(f"Volume mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
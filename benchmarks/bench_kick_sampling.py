@@ -0,0 +1,80 @@
+"""Fixed versus tolerance-driven kick sections, over the bundled presets.
+
+For every preset the master loft and the Male mold are built twice from an
+empty stage cache: with the legacy STEPS_KICK sampling (KickTolerance 0) and
+with the adaptive stations. Reported per mode: kick sections, loft and Male
+build time, and the largest distance between the exact kick centre line and
+the lofted surface:
+
+    FreeCADCmd benchmarks/bench_kick_sampling.py --pass
+    FreeCADCmd benchmarks/bench_kick_sampling.py --pass --tolerance 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import numpy as np
+
+import FreeCAD as fc # type: ignore
+import Part # type: ignore
+import FM_analytic
+import FM_batch
+import FM_features
+
+def kick_error(p, loft, samples=40):
+    """Largest distance from the exact centre line (x = 0) of both kicks to the loft."""
+    y0 = FM_analytic.kick_start(p)
+    y1 = p["mold_len"] / 2.0
+    worst = 0.0
+    for y in np.concatenate([np.linspace(y0, y1, samples), -np.linspace(y0, y1, samples)]):
+        z = float(FM_analytic.surface_z(p, 0.0, y, "master"))
+        dist = loft.distToShape(Part.Vertex(fc.Vector(0.0, float(y), z)))[0]
+        worst = max(worst, dist)
+    return worst
+
+def run_mode(p, tolerance):
+    p = dict(p, kick_tol=tolerance)
+    FM_features.STAGE_CACHE.clear()
+    sec = FM_features.GRAPH.evaluate(p, "sections")
+    kick_sections = len(sec["slices"]) - (sec["split_2"] - sec["split_1"] - 1)
+    t0 = time.perf_counter()
+    loft = FM_features.GRAPH.evaluate(p, "loft_master")
+    t_loft = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    FM_features.build_part(p, "Male_Mold")
+    t_male = time.perf_counter() - t0 + t_loft
+    return {"sections": kick_sections, "loft_s": t_loft, "male_s": t_male, "error": kick_error(p, loft)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_kick_sampling")
+    parser.add_argument("--presets-file", default=os.path.join(BASEDIR, "fb_presets.json"))
+    parser.add_argument("--tolerance", type=float, default=FM_features.DEFAULT_KICK_TOLERANCE)
+    args = parser.parse_args(FM_batch._script_args() if argv is None else argv)
+
+    variants = [{"name": "Default", "params": {}}]
+    variants += FM_batch.load_preset_variants(None, args.presets_file)
+
+    print(f"{'variant':<28} {'mode':<9} {'sections':>8} {'loft s':>8} {'male s':>8} {'max err mm':>11}")
+    totals = {"fixed": [0, 0.0, 0.0, 0.0], "adaptive": [0, 0.0, 0.0, 0.0]}
+    for variant in variants:
+        p = FM_batch.variant_params(variant["params"])
+        for mode, tol in (("fixed", 0.0), ("adaptive", args.tolerance)):
+            r = run_mode(p, tol)
+            t = totals[mode]
+            t[0] += r["sections"]
+            t[1] += r["loft_s"]
+            t[2] += r["male_s"]
+            t[3] = max(t[3], r["error"])
+            print(f"{variant['name']:<28} {mode:<9} {r['sections']:>8} {r['loft_s']:>8.3f} "
+                  f"{r['male_s']:>8.3f} {r['error']:>11.4f}")
+    for mode, (n, t_loft, t_male, err) in totals.items():
+        print(f"{'TOTAL':<28} {mode:<9} {n:>8} {t_loft:>8.3f} {t_male:>8.3f} {err:>11.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
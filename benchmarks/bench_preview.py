@@ -0,0 +1,84 @@
+"""Exact versus light Board_Preview construction, over the bundled presets.
+
+For every preset the preview is built both ways, cold (empty stage cache)
+and warm (lofts, cutters and outline already cached, as when the linked
+molds have just been built). Reported per mode: build time, face count,
+validity, number of solids and volume; the light deck's volume is
+compared to the exact one. Exits 1 if a preview is not one valid solid:
+
+    FreeCADCmd benchmarks/bench_preview.py --pass
+    FreeCADCmd benchmarks/bench_preview.py --pass --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import FM_batch
+import FM_features
+
+MODES = (("exact", False), ("light", True))
+
+def time_build(p, repeat, warm):
+    best = None
+    for _ in range(repeat):
+        FM_features.STAGE_CACHE.clear()
+        if warm:
+            for stage in FM_features.GRAPH.requires(FM_features.part_stage(p, "Board_Preview"))[:-1]:
+                FM_features.GRAPH.evaluate(p, stage)
+        t0 = time.perf_counter()
+        shape = FM_features.build_part(p, "Board_Preview")
+        seconds = time.perf_counter() - t0
+        best = seconds if best is None else min(best, seconds)
+    return best, shape
+
+def run_mode(p, light, repeat):
+    p = dict(p, light_preview=light)
+    cold, shape = time_build(p, repeat, warm=False)
+    warm, _ = time_build(p, repeat, warm=True)
+    return {"cold_s": cold, "warm_s": warm, "faces": len(shape.Faces), "solids": len(shape.Solids),
+            "valid": shape.isValid(), "volume": shape.Volume}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_preview")
+    parser.add_argument("--presets-file", default=os.path.join(BASEDIR, "fb_presets.json"))
+    parser.add_argument("--repeat", type=int, default=1, help="Builds per mode, fastest is kept")
+    args = parser.parse_args(FM_batch._script_args() if argv is None else argv)
+
+    variants = [{"name": "Default", "params": {}}]
+    variants += FM_batch.load_preset_variants(None, args.presets_file)
+
+    print(f"{'variant':<28} {'mode':<6} {'cold s':>8} {'warm s':>8} {'faces':>6} {'solids':>6} {'valid':>6} "
+          f"{'volume':>10} {'dV %':>7}")
+    totals = {mode: [0.0, 0.0] for mode, _ in MODES}
+    worst = 0.0
+    broken = 0
+    for variant in variants:
+        p = FM_batch.variant_params(variant["params"])
+        exact_volume = None
+        for mode, light in MODES:
+            r = run_mode(p, light, max(1, args.repeat))
+            totals[mode][0] += r["cold_s"]
+            totals[mode][1] += r["warm_s"]
+            if exact_volume is None:
+                exact_volume = r["volume"]
+            diff = 100.0 * (r["volume"] - exact_volume) / exact_volume if exact_volume else 0.0
+            worst = max(worst, abs(diff))
+            if r["solids"] != 1 or not r["valid"]:
+                broken += 1
+            print(f"{variant['name']:<28} {mode:<6} {r['cold_s']:>8.3f} {r['warm_s']:>8.3f} {r['faces']:>6} "
+                  f"{r['solids']:>6} {str(r['valid']):>6} {r['volume']:>10.1f} {diff:>7.2f}")
+    for mode, (cold, warm) in totals.items():
+        print(f"{'TOTAL':<28} {mode:<6} {cold:>8.3f} {warm:>8.3f}")
+    print(f"Largest volume difference of the light preview: {worst:.2f}%")
+    if broken:
+        print(f"{broken} previews are not one valid solid")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
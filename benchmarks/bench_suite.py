@@ -0,0 +1,192 @@
+"""Headless benchmark over presets x MoldType x ConcaveStyle x SideLocks x AddFillet.
+
+Every case is built cold (empty stage cache) in its own worker process and
+reports wall time, peak RSS of the worker, shape validity, face/solid
+counts, volume and the triangle count of the STL export. Results go to JSON
+and CSV; with ``--baseline`` the run fails when a case got slower or bigger
+than the threshold, became invalid, or changed volume:
+
+    FreeCADCmd benchmarks/bench_suite.py --pass --out bench.json
+    FreeCADCmd benchmarks/bench_suite.py --pass --out new.json --baseline bench.json --threshold 0.2
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import FM_batch
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+CONCAVE_STYLES = ["Flat", "Organic"]
+FLAGS = [False, True]
+DEFAULT_THRESHOLD = 0.20
+MIN_SECONDS = 0.05 # wall-time differences below this are noise
+VOLUME_REL = 0.001
+CSV_FIELDS = ["case", "preset", "mold_type", "concave_style", "side_locks", "add_fillet", "status",
+              "seconds", "peak_rss_mb", "valid", "faces", "solids", "volume", "triangles", "error"]
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+
+def case_id(preset, mold_type, style, locks, fillet):
+    return f"{preset}|{mold_type}|{style}|locks={int(locks)}|fillet={int(fillet)}"
+
+def iter_cases(variants, types):
+    i = 0
+    for variant, mold_type, style, locks, fillet in itertools.product(variants, types, CONCAVE_STYLES, FLAGS, FLAGS):
+        params = dict(variant["params"], ConcaveStyle=style, SideLocks=locks, AddFillet=fillet)
+        yield {"id": i, "name": case_id(variant["name"], mold_type, style, locks, fillet),
+               "preset": variant["name"], "mold_type": mold_type, "concave_style": style,
+               "side_locks": locks, "add_fillet": fillet, "params": params}
+        i += 1
+
+def run_case(job):
+    import FM_export
+    import FM_features
+
+    p = FM_batch.variant_params(job["params"], f"FB_Bench_{job['id']}")
+    best = None
+    for _ in range(job["repeat"]):
+        FM_features.STAGE_CACHE.clear()
+        t0 = time.perf_counter()
+        shape = FM_features.build_part(p, job["mold_type"])
+        seconds = time.perf_counter() - t0
+        best = seconds if best is None else min(best, seconds)
+    return {
+        "status": "ok",
+        "seconds": round(best, 4),
+        "valid": bool(shape.isValid()),
+        "faces": len(shape.Faces),
+        "solids": len(shape.Solids),
+        "volume": round(shape.Volume, 3),
+        "triangles": int(FM_export.tessellate(shape, job["tolerance"]).CountFacets),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def environment():
+    env = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+    try:
+        import FreeCAD as fc # type: ignore
+        import Part # type: ignore
+        env["freecad"] = ".".join(fc.Version()[:3])
+        env["occ"] = Part.OCC_VERSION
+    except Exception:
+        pass
+    return env
+
+def compare(results, baseline, threshold):
+    """Regression messages for ``results`` against a previous run (both keyed by case)."""
+    problems = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None or old.get("status") != "ok":
+            continue
+        if new.get("status") != "ok":
+            problems.append(f"{name}: failed ({new.get('error')})")
+            continue
+        if old.get("valid") and not new.get("valid"):
+            problems.append(f"{name}: shape is no longer valid")
+        if new["seconds"] - old["seconds"] > MIN_SECONDS and new["seconds"] > old["seconds"] * (1 + threshold):
+            problems.append(f"{name}: {old['seconds']:.3f}s -> {new['seconds']:.3f}s")
+        if old.get("peak_rss_mb") and new.get("peak_rss_mb") and new["peak_rss_mb"] > old["peak_rss_mb"] * (1 + threshold):
+            problems.append(f"{name}: peak RSS {old['peak_rss_mb']} -> {new['peak_rss_mb']} MB")
+        if abs(new["volume"] - old["volume"]) > VOLUME_REL * max(abs(old["volume"]), 1.0):
+            problems.append(f"{name}: volume {old['volume']} -> {new['volume']}")
+    return problems
+
+def write_csv(path, results):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for name in sorted(results):
+            writer.writerow(dict(results[name], case=name))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_suite")
+    parser.add_argument("--presets-file", default=os.path.join(BASEDIR, "fb_presets.json"))
+    parser.add_argument("--preset", action="append", default=[], help="Only these presets (repeatable)")
+    parser.add_argument("--types", default=",".join(FM_batch.MOLD_TYPES))
+    parser.add_argument("--repeat", type=int, default=1, help="Builds per case, fastest is kept")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel cases (>1 skews timings)")
+    parser.add_argument("--tolerance", type=float, default=FM_batch.STL_TOLERANCE)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--csv", default=None, help="CSV path (default: next to --out)")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative slowdown / RSS growth (0.2 = 20%%)")
+    args = parser.parse_args(FM_batch._script_args() if argv is None else argv)
+
+    default = {"name": "Default", "params": {}}
+    if args.preset:
+        names = [n for n in args.preset if n != "Default"]
+        variants = [default] if "Default" in args.preset else []
+        if names:
+            variants += FM_batch.load_preset_variants(names, args.presets_file)
+    else:
+        variants = [default] + FM_batch.load_preset_variants(None, args.presets_file)
+    types = [t.strip() for t in args.types.split(",") if t.strip()]
+
+    jobs = []
+    for job in iter_cases(variants, types):
+        job.update(repeat=max(1, args.repeat), tolerance=args.tolerance)
+        jobs.append(job)
+
+    results = {}
+
+    def on_result(job, result):
+        entry = {k: job[k] for k in ("preset", "mold_type", "concave_style", "side_locks", "add_fillet")}
+        entry.update(result)
+        results[job["name"]] = entry
+        if result.get("status") == "ok":
+            print(f"[{len(results)}/{len(jobs)}] {job['name']:<60} {result['seconds']:8.3f}s "
+                  f"{result['peak_rss_mb'] or 0:8.1f}MB valid={result['valid']} faces={result['faces']} "
+                  f"tris={result['triangles']}")
+        else:
+            print(f"[{len(results)}/{len(jobs)}] {job['name']:<60} FAILED ({result.get('error')})")
+
+    t0 = time.time()
+    FM_batch.run_pool(jobs, run_case, args.workers, on_result)
+    report = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(t0)),
+        "seconds": round(time.time() - t0, 3),
+        "environment": environment(),
+        "repeat": args.repeat,
+        "workers": args.workers,
+        "cases": {k: results[k] for k in sorted(results)},
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=4)
+    csv_path = args.csv or os.path.splitext(args.out)[0] + ".csv"
+    write_csv(csv_path, results)
+    print(f"Results written to {args.out} and {csv_path}")
+
+    failed = [k for k, r in results.items() if r.get("status") != "ok" or not r.get("valid")]
+    for name in failed:
+        print(f"FAIL {name}: {results[name].get('error') or 'invalid shape'}")
+    problems = []
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            problems = compare(results, json.load(f).get("cases", {}), args.threshold)
+        for msg in problems:
+            print(f"REGRESSION {msg}")
+        print(f"{len(problems)} regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 1 if failed or problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
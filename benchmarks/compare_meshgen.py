@@ -0,0 +1,47 @@
+"""Compare FM_meshgen meshes with the BRep export path.
+
+Runs under FreeCADCmd and prints volume error and Hausdorff distance for
+every analytic part of each variant; exits non-zero if any part is outside
+FM_meshgen.MATCH_VOLUME_REL / MATCH_HAUSDORFF:
+
+    FreeCADCmd benchmarks/compare_meshgen.py --pass --all-presets
+"""
+import argparse
+import os
+import sys
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import FM_batch
+import FM_meshgen
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="compare_meshgen")
+    parser.add_argument("--preset", action="append", default=[])
+    parser.add_argument("--all-presets", action="store_true")
+    parser.add_argument("--presets-file", default=os.path.join(BASEDIR, "fb_presets.json"))
+    parser.add_argument("--spacing", type=float, default=FM_meshgen.GRID_SPACING)
+    args = parser.parse_args(FM_batch._script_args() if argv is None else argv)
+
+    variants = [{"name": "Default", "params": {}}]
+    if args.all_presets or args.preset:
+        variants += FM_batch.load_preset_variants(args.preset or None, args.presets_file)
+
+    failed = 0
+    for variant in variants:
+        p = FM_batch.variant_params(variant["params"])
+        for m_type in FM_meshgen.PART_MESHERS:
+            try:
+                r = FM_meshgen.compare_with_brep(p, m_type, spacing=args.spacing)
+            except NotImplementedError as e:
+                print(f"{variant['name']:<28} {m_type:<16} skipped ({e})")
+                continue
+            failed += not r["ok"]
+            print(f"{variant['name']:<28} {m_type:<16} dV={r['volume_rel_error'] * 100:6.3f}%  "
+                  f"H={r['hausdorff']:.3f} mm  tris={r['triangles']:<7} {'OK' if r['ok'] else 'FAIL'}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Lofted versus grid-approximated B-spline deck surfaces.
+
+Runs under FreeCADCmd. For every variant and ConcaveStyle the master, gap
+and veneer surfaces are built cold with each SurfaceEngine. Reported per
+surface: build time of both engines, the distance from the B-spline surface
+to the loft (max and mean over samples inside the mold core) and the fit
+error of the B-spline at the grid points it was approximated through. The
+gap and veneer surfaces are expected to differ from the lofts: the B-spline
+ones are normal offsets, the lofts vertical ones.
+
+    FreeCADCmd benchmarks/compare_surfaces.py --pass
+    FreeCADCmd benchmarks/compare_surfaces.py --pass --all-presets --samples 30
+"""
+import argparse
+import os
+import sys
+import time
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import FreeCAD as fc # type: ignore
+import Part # type: ignore
+import FM_batch
+import FM_features
+
+SURFACES = ("loft_master", "loft_gap", "loft_veneer")
+STYLES = ("Flat", "Organic")
+
+def build(p, engine):
+    p = dict(p, surface_engine=engine)
+    FM_features.STAGE_CACHE.clear()
+    timings = {}
+    t0 = time.perf_counter()
+    shapes = {name: FM_features.GRAPH.evaluate(p, name, timings=timings) for name in SURFACES}
+    total = time.perf_counter() - t0
+    return shapes, timings, total
+
+def samples(face, p, n):
+    # points of the B-spline face over the mold core
+    u0, u1, v0, v1 = face.ParameterRange
+    surf = face.Surface
+    pts = []
+    for i in range(n):
+        for j in range(3 * n):
+            pt = surf.value(u0 + (u1 - u0) * i / (n - 1), v0 + (v1 - v0) * j / (3 * n - 1))
+            if abs(pt.x) <= p["core_width"] / 2.0 and abs(pt.y) <= p["mold_len"] / 2.0:
+                pts.append(pt)
+    return pts
+
+def distances(points, shape):
+    return [Part.Vertex(pt).distToShape(shape)[0] for pt in points]
+
+def fit_error(p, name, face):
+    # the grid the surface was approximated through, checked at a subset of nodes
+    points, normals = FM_features.GRAPH.evaluate(dict(p, surface_engine="BSpline"), "deck_grid")
+    offset = {"loft_master": 0.0, "loft_gap": p["mold_gap"], "loft_veneer": -p["veneer_thick"]}[name]
+    grid = (points + normals * offset)[::2, ::4].reshape(-1, 3)
+    return max(distances([fc.Vector(*pt) for pt in grid.tolist()], face))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="compare_surfaces")
+    parser.add_argument("--preset", action="append", default=[])
+    parser.add_argument("--all-presets", action="store_true")
+    parser.add_argument("--presets-file", default=os.path.join(BASEDIR, "fb_presets.json"))
+    parser.add_argument("--samples", type=int, default=20, help="Sample columns across the surface (3x along)")
+    args = parser.parse_args(FM_batch._script_args() if argv is None else argv)
+
+    variants = [{"name": "Default", "params": {}}]
+    if args.all_presets or args.preset:
+        variants += FM_batch.load_preset_variants(args.preset or None, args.presets_file)
+
+    print(f"{'variant':<28} {'style':<8} {'surface':<12} {'loft s':>8} {'bspl s':>8} "
+          f"{'max dev':>8} {'mean dev':>8} {'fit err':>8}")
+    totals = {"Loft": 0.0, "BSpline": 0.0}
+    fallbacks = 0
+    for variant in variants:
+        for style in STYLES:
+            p = FM_batch.variant_params(dict(variant["params"], ConcaveStyle=style))
+            lofts, loft_t, loft_total = build(p, "Loft")
+            splines, spline_t, spline_total = build(p, "BSpline")
+            totals["Loft"] += loft_total
+            totals["BSpline"] += spline_total
+            for name in SURFACES:
+                label = name.replace("loft_", "")
+                if f"{name}/profile_wires" in spline_t:
+                    fallbacks += 1
+                    print(f"{variant['name']:<28} {style:<8} {label:<12} lofted (B-spline fallback)")
+                    continue
+                face = splines[name].Faces[0]
+                dev = distances(samples(face, p, max(2, args.samples)), lofts[name])
+                mean = sum(dev) / len(dev) if dev else 0.0
+                print(f"{variant['name']:<28} {style:<8} {label:<12} {loft_t[name]:>8.3f} {spline_t[name]:>8.3f} "
+                      f"{max(dev, default=0.0):>8.4f} {mean:>8.4f} {fit_error(p, name, face):>8.4f}")
+    print(f"Total surface build time (sections and grid included): "
+          f"Loft {totals['Loft']:.3f} s, BSpline {totals['BSpline']:.3f} s")
+    print(f"B-spline fallbacks to the loft: {fallbacks}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""The constraint table against the values the workbench ships with.
+
+``FM_constraints.LIMITS`` follows the clamps the geometry always applied,
+which are tighter than some of the old ``onChanged`` property limits. The
+defaults and every bundled preset must still load without being clamped.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import FM_constraints
+import FM_validity
+
+with open(os.path.join(BASEDIR, "fb_presets.json"), "r") as f:
+    PRESETS = json.load(f)
+
+def test_defaults_are_within_limits():
+    _, writes, notes = FM_constraints.resolve(dict(FM_validity.DEFAULTS))
+    assert writes == {}
+    assert notes == []
+
+@pytest.mark.parametrize("name", sorted(PRESETS))
+def test_preset_round_trips(name):
+    values = PRESETS[name]
+    # as applying the preset to a new mold, then reloading the document
+    for changed in (list(values), None):
+        resolved, writes, _ = FM_constraints.resolve(FM_validity.complete(values), changed)
+        assert writes == {}
+        assert {k: resolved[k] for k in values} == values
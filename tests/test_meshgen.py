@@ -0,0 +1,115 @@
+"""Analytic mesher against the analytic surfaces it is built from.
+
+The meshes must be closed and consistently oriented, and their volume must
+match a fine midpoint integration of the same height functions over the
+footprint. With FreeCAD importable they are also compared with the BRep
+parts (``FM_meshgen.compare_with_brep``).
+"""
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+import FM_analytic
+import FM_holes
+import FM_meshgen
+import FM_validity
+
+PARTS = tuple(FM_meshgen.PART_MESHERS)
+with open(os.path.join(BASEDIR, "fb_holes.json"), "r") as f:
+    PATTERNS = {name: d for name, d in json.load(f).items()
+                if not any(g.get("countersink") for g in d["groups"])}
+STEP = 0.05 # mm, integration grid
+VOLUME_REL = 1e-3
+
+@pytest.fixture(scope="module")
+def params():
+    # the fillet is left out so the reference volume stays a plain integral
+    return FM_validity.derive(dict(FM_validity.DEFAULTS, AddFillet=False))
+
+@pytest.fixture(scope="module")
+def meshes(params):
+    return {t: FM_meshgen.part_mesh(params, t) for t in PARTS}
+
+def _grid(x_half, y_lo, y_hi):
+    x = np.arange(-x_half + STEP / 2.0, x_half, STEP)
+    y = np.arange(y_lo + STEP / 2.0, y_hi, STEP)
+    return np.meshgrid(x, y, indexing="ij")
+
+def _drill(p, part, X, Y, inside):
+    for hx, hy, d in FM_holes.holes(p, part):
+        inside &= np.hypot(X - hx, Y - hy) > d / 2.0
+    return inside
+
+def _mold_volume(p, part):
+    base_half, half_len, r = p["base_width"] / 2.0, p["mold_len"] / 2.0, p["M_Radius"]
+    X, Y = _grid(base_half, -half_len, half_len)
+    dx, dy = np.abs(X) - (base_half - r), np.abs(Y) - (half_len - r)
+    inside = ~((dx > 0) & (dy > 0) & (np.hypot(dx, dy) > r))
+    inside = _drill(p, part, X, Y, inside)
+    core = np.abs(X) <= p["core_width"] / 2.0
+    if part == "Male_Mold":
+        z_bot = p["camber"] - p["core_base_depth"] - p["base_height"]
+        z_base = z_bot + p["base_height"]
+        top = np.where(core, np.maximum(z_base, FM_analytic.surface_z(p, X, Y, "master")), z_base)
+        thickness = top - z_bot
+    else:
+        z_top = (p["core_base_depth"] + 2 * p["base_height"] + p["mold_gap"]) - p["camber"]
+        z_base = z_top - p["base_height"]
+        bottom = np.where(core, np.minimum(z_base, FM_analytic.surface_z(p, X, Y, "gap")), z_base)
+        thickness = z_top - bottom
+    return float(thickness[inside].sum()) * STEP * STEP
+
+def _shaper_volume(p):
+    _, y_t, y_n = FM_analytic.outline_half_width(p, np.zeros(1))
+    X, Y = _grid(p["board_width"] / 2.0, y_t, y_n)
+    half, _, _ = FM_analytic.outline_half_width(p, Y[0])
+    inside = _drill(p, "Shaper_Template", X, Y, np.abs(X) <= half[None, :])
+    z_top = 5.0 + p["shaper_height"]
+    bottom = np.maximum(z_top - 100.0, FM_analytic.surface_z(p, X, Y, "veneer"))
+    return float((z_top - bottom)[inside].sum()) * STEP * STEP
+
+@pytest.mark.parametrize("part", PARTS)
+def test_mesh_is_closed_and_oriented(meshes, part):
+    points, tris = meshes[part]
+    assert FM_meshgen.is_watertight(tris)
+    # outward normals give a positive signed volume
+    assert FM_meshgen.mesh_volume(points, tris) > 0
+
+@pytest.mark.parametrize("part", PARTS)
+def test_mesh_volume_matches_surfaces(params, meshes, part):
+    expected = _shaper_volume(params) if part == "Shaper_Template" else _mold_volume(params, part)
+    volume = FM_meshgen.mesh_volume(*meshes[part])
+    assert volume == pytest.approx(expected, rel=VOLUME_REL)
+
+@pytest.mark.parametrize("pattern", sorted(PATTERNS))
+@pytest.mark.parametrize("part", PARTS)
+def test_hole_patterns(params, pattern, part):
+    p = dict(params, hole_pattern=FM_holes.canonical(PATTERNS[pattern]))
+    points, tris = FM_meshgen.part_mesh(p, part)
+    assert FM_meshgen.is_watertight(tris)
+    expected = _shaper_volume(p) if part == "Shaper_Template" else _mold_volume(p, part)
+    assert FM_meshgen.mesh_volume(points, tris) == pytest.approx(expected, rel=VOLUME_REL)
+
+def test_unsupported_parts_fall_back(params):
+    with pytest.raises(NotImplementedError):
+        FM_meshgen.part_mesh(dict(params, side_locks=True), "Male_Mold")
+    with pytest.raises(NotImplementedError):
+        FM_meshgen.part_mesh(params, "Board_Preview")
+    sunk = {"groups": [{"type": "truck", "countersink": {"diameter": 4.0, "depth": 1.0}}]}
+    with pytest.raises(NotImplementedError):
+        FM_meshgen.part_mesh(dict(params, hole_pattern=FM_holes.canonical(sunk)), "Male_Mold")
+
+@pytest.mark.parametrize("part", PARTS)
+def test_mesh_matches_brep(part):
+    pytest.importorskip("FreeCAD")
+    import FM_batch
+    p = FM_batch.variant_params({})
+    result = FM_meshgen.compare_with_brep(p, part)
+    assert result["ok"], result
@@ -0,0 +1,39 @@
+"""FB_Mold transactions in a FreeCAD document (skipped without FreeCAD)."""
+import os
+import sys
+
+import pytest
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASEDIR not in sys.path:
+    sys.path.insert(0, BASEDIR)
+
+fc = pytest.importorskip("FreeCAD")
+
+import FM_features
+import FM_presets
+
+PRESET = "HYBRID FLOW (44/17)"
+SHAPE = "Popsicle Classic"
+
+@pytest.fixture
+def mold(monkeypatch):
+    # the libraries shipped in the repo, not the installed copies
+    monkeypatch.setattr(FM_presets, "PRESETS", FM_presets.JsonStore(os.path.join(BASEDIR, "fb_presets.json")))
+    monkeypatch.setattr(FM_presets, "SHAPES", FM_presets.JsonStore(os.path.join(BASEDIR, "fb_shapes.json")))
+    doc = fc.newDocument("FB_TestTransaction")
+    obj = doc.addObject("Part::FeaturePython", "Board_Preview")
+    FM_features.FB_Mold(obj)
+    obj.MoldType = "Board_Preview"
+    yield obj
+    fc.closeDocument(doc.Name)
+
+def test_shape_preset_in_transaction_keeps_preset(mold):
+    mold.Preset = PRESET
+    assert mold.Preset == PRESET
+    mold.Proxy.apply_values(mold, {"NoseShape": SHAPE, "VeneerThickness": 5.0})
+    assert mold.Preset == PRESET
+    assert mold.NoseShape == SHAPE
+    assert mold.NoseTaperStart.Value == FM_presets.SHAPES.get(SHAPE)["TaperStart"]
+    assert mold.VeneerThickness.Value == 3.5
+    assert not mold.Proxy.is_updating_preset